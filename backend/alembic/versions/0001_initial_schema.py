@@ -0,0 +1,90 @@
+"""Initial schema
+
+Matches the tables created by ``init_db`` before migrations were introduced.
+Databases created that way should be stamped at this revision
+(``alembic stamp 0001``) before running ``alembic upgrade head``.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("username", sa.String(50), nullable=False, unique=True),
+        sa.Column("email", sa.String(255), nullable=False, unique=True),
+        sa.Column("hashed_password", sa.String(255), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("idx_username", "users", ["username"])
+    op.create_index("idx_email", "users", ["email"])
+
+    op.create_table(
+        "leaderboard_entries",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column(
+            "user_id",
+            sa.String(36),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("username", sa.String(50), nullable=False),
+        sa.Column("score", sa.Integer, nullable=False),
+        sa.Column("mode", sa.String(20), nullable=False),
+        sa.Column("timestamp", sa.DateTime(timezone=True), nullable=False),
+        sa.CheckConstraint("mode IN ('walls', 'pass-through')", name="check_mode"),
+    )
+    op.create_index(
+        "idx_score_desc", "leaderboard_entries", ["score"],
+        postgresql_ops={"score": "DESC"},
+    )
+    op.create_index(
+        "idx_mode_score", "leaderboard_entries", ["mode", "score"],
+        postgresql_ops={"score": "DESC"},
+    )
+    op.create_index("idx_timestamp", "leaderboard_entries", ["timestamp"])
+
+    op.create_table(
+        "active_players",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("username", sa.String(50), nullable=False),
+        sa.Column("score", sa.Integer, nullable=False),
+        sa.Column("mode", sa.String(20), nullable=False),
+        sa.Column("snake", sa.JSON, nullable=True),
+        sa.Column("food", sa.JSON, nullable=True),
+        sa.Column("is_game_over", sa.Boolean, nullable=False),
+        sa.Column("direction", sa.String(10), nullable=False),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=False),
+        sa.CheckConstraint("mode IN ('walls', 'pass-through')", name="check_active_mode"),
+        sa.CheckConstraint(
+            "direction IN ('UP', 'DOWN', 'LEFT', 'RIGHT')", name="check_direction"
+        ),
+    )
+    op.create_index("idx_game_over", "active_players", ["is_game_over"])
+
+    op.create_table(
+        "token_blacklist",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("token", sa.Text, nullable=False, unique=True),
+        sa.Column("blacklisted_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("idx_token", "token_blacklist", ["token"])
+    op.create_index("idx_expires", "token_blacklist", ["expires_at"])
+
+
+def downgrade() -> None:
+    op.drop_table("token_blacklist")
+    op.drop_table("active_players")
+    op.drop_table("leaderboard_entries")
+    op.drop_table("users")
@@ -0,0 +1,85 @@
+"""Key token_blacklist by a fixed-size digest
+
+Replaces the full-JWT ``token`` Text column (unique constraint plus
+``idx_token``) with a 32-byte ``token_hash`` primary key. Existing rows are
+rewritten as SHA-256 digests of the stored token, which is how legacy tokens
+without a ``jti`` claim are keyed at runtime. Rows whose token has already
+expired are dropped rather than copied.
+
+Downgrading cannot recover token text, so revocations are discarded.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+import hashlib
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 10_000
+
+
+def upgrade() -> None:
+    op.create_table(
+        "token_blacklist_new",
+        sa.Column("token_hash", sa.LargeBinary(32), primary_key=True),
+        sa.Column("blacklisted_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sqlite_with_rowid=False,
+    )
+
+    old = sa.table(
+        "token_blacklist",
+        sa.column("token", sa.Text),
+        sa.column("blacklisted_at", sa.DateTime(timezone=True)),
+        sa.column("expires_at", sa.DateTime(timezone=True)),
+    )
+    new = sa.table(
+        "token_blacklist_new",
+        sa.column("token_hash", sa.LargeBinary(32)),
+        sa.column("blacklisted_at", sa.DateTime(timezone=True)),
+        sa.column("expires_at", sa.DateTime(timezone=True)),
+    )
+
+    conn = op.get_bind()
+    result = conn.execution_options(yield_per=BATCH_SIZE).execute(
+        sa.select(old.c.token, old.c.blacklisted_at, old.c.expires_at).where(
+            old.c.expires_at >= datetime.now(timezone.utc)
+        )
+    )
+    for rows in result.partitions():
+        conn.execute(
+            new.insert(),
+            [
+                {
+                    "token_hash": hashlib.sha256(row.token.encode("utf-8")).digest(),
+                    "blacklisted_at": row.blacklisted_at,
+                    "expires_at": row.expires_at,
+                }
+                for row in rows
+            ],
+        )
+
+    op.drop_table("token_blacklist")
+    op.rename_table("token_blacklist_new", "token_blacklist")
+    op.create_index("idx_expires", "token_blacklist", ["expires_at"])
+
+
+def downgrade() -> None:
+    op.drop_table("token_blacklist")
+    op.create_table(
+        "token_blacklist",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("token", sa.Text, nullable=False, unique=True),
+        sa.Column("blacklisted_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("idx_token", "token_blacklist", ["token"])
+    op.create_index("idx_expires", "token_blacklist", ["expires_at"])
@@ -0,0 +1,46 @@
+"""Track when each active player last reported state
+
+Adds ``active_players.last_seen_at``, backfilled from ``started_at``, and a
+partial index on it covering only live games, which is what the inactive
+player sweep filters on.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("active_players") as batch:
+        batch.add_column(sa.Column("last_seen_at", sa.DateTime(timezone=True), nullable=True))
+
+    players = sa.table(
+        "active_players",
+        sa.column("started_at", sa.DateTime(timezone=True)),
+        sa.column("last_seen_at", sa.DateTime(timezone=True)),
+    )
+    op.execute(players.update().values(last_seen_at=players.c.started_at))
+
+    with op.batch_alter_table("active_players") as batch:
+        batch.alter_column("last_seen_at", nullable=False)
+
+    op.create_index(
+        "idx_live_last_seen",
+        "active_players",
+        ["last_seen_at"],
+        sqlite_where=sa.text("is_game_over = 0"),
+        postgresql_where=sa.text("is_game_over = false"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_live_last_seen", table_name="active_players")
+    with op.batch_alter_table("active_players") as batch:
+        batch.drop_column("last_seen_at")
@@ -0,0 +1,79 @@
+"""Rework indexes to match the CRUD queries
+
+Leaderboard pages, per-user score lists and top scores all order by
+``score DESC, timestamp``; each now has a composite index in exactly that
+order (behind ``mode`` or ``user_id`` where the query filters on it), so
+no query sorts. ``user_id`` was not indexed at all before.
+
+Dropped: ``idx_score_desc`` and ``idx_mode_score`` (superseded),
+``idx_game_over`` (a boolean; replaced by a partial index over finished
+games only) and ``idx_username`` / ``idx_email`` (duplicates of the
+unique constraints' own indexes).
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.drop_index("idx_username", table_name="users")
+    op.drop_index("idx_email", table_name="users")
+
+    op.drop_index("idx_score_desc", table_name="leaderboard_entries")
+    op.drop_index("idx_mode_score", table_name="leaderboard_entries")
+    op.create_index(
+        "idx_leaderboard_rank",
+        "leaderboard_entries",
+        [sa.text("score DESC"), "timestamp"],
+    )
+    op.create_index(
+        "idx_leaderboard_mode_rank",
+        "leaderboard_entries",
+        ["mode", sa.text("score DESC"), "timestamp"],
+    )
+    op.create_index(
+        "idx_leaderboard_user_rank",
+        "leaderboard_entries",
+        ["user_id", sa.text("score DESC"), "timestamp"],
+    )
+
+    op.drop_index("idx_game_over", table_name="active_players")
+    op.create_index(
+        "idx_active_finished",
+        "active_players",
+        ["is_game_over"],
+        sqlite_where=sa.text("is_game_over = 1"),
+        postgresql_where=sa.text("is_game_over = true"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_active_finished", table_name="active_players")
+    op.create_index("idx_game_over", "active_players", ["is_game_over"])
+
+    op.drop_index("idx_leaderboard_user_rank", table_name="leaderboard_entries")
+    op.drop_index("idx_leaderboard_mode_rank", table_name="leaderboard_entries")
+    op.drop_index("idx_leaderboard_rank", table_name="leaderboard_entries")
+    op.create_index(
+        "idx_mode_score",
+        "leaderboard_entries",
+        ["mode", "score"],
+        postgresql_ops={"score": "DESC"},
+    )
+    op.create_index(
+        "idx_score_desc",
+        "leaderboard_entries",
+        ["score"],
+        postgresql_ops={"score": "DESC"},
+    )
+
+    op.create_index("idx_email", "users", ["email"])
+    op.create_index("idx_username", "users", ["username"])
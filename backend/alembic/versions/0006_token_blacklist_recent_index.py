@@ -0,0 +1,24 @@
+"""Index revoked tokens by when they were revoked
+
+Every worker re-reads the tokens revoked since its last sync every few
+seconds; ``idx_blacklisted_at`` keeps that a range read instead of a scan
+of the whole blacklist.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("idx_blacklisted_at", "token_blacklist", ["blacklisted_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("idx_blacklisted_at", table_name="token_blacklist")
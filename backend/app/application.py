@@ -0,0 +1,81 @@
+"""FastAPI application factory"""
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+
+from app.config import settings
+from app.routers import (
+    auth_router,
+    leaderboard_router,
+    spectate_router,
+    users_router,
+)
+from app.startup import Startup, prewarm, start_services, stop_services
+from app.utils.admission import AdmissionControl, create_limiters
+
+
+def create_app(startup: Startup, manage_lifespan: bool = True) -> FastAPI:
+    """Build the API app.
+
+    With ``manage_lifespan`` the app starts and stops the services itself;
+    ``startup.LazyApp`` passes False because it runs them around the app.
+    """
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        """Lifespan context manager for startup and shutdown events"""
+        # Startup
+        await startup.run(start_services(app, startup))
+        startup.background(prewarm(startup))
+        yield
+        # Shutdown
+        await startup.stop()
+        await stop_services(app)
+
+    # Create FastAPI app
+    app = FastAPI(
+        title=settings.project_name,
+        version=settings.version,
+        description="Backend API for Neon Snake Arena Online game",
+        lifespan=lifespan if manage_lifespan else None,
+    )
+
+    # Shed load per route group (inside CORS, so 503s carry CORS headers)
+    if settings.admission_control:
+        app.add_middleware(AdmissionControl, limiters=create_limiters(), prefix=settings.api_v1_prefix)
+
+    # Configure CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.cors_origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["X-Next-Cursor"],
+    )
+
+    # Include routers
+    app.include_router(auth_router, prefix=settings.api_v1_prefix)
+    app.include_router(leaderboard_router, prefix=settings.api_v1_prefix)
+    app.include_router(spectate_router, prefix=settings.api_v1_prefix)
+    app.include_router(users_router, prefix=settings.api_v1_prefix)
+
+    @app.get("/")
+    async def root():
+        """Root endpoint"""
+        return {
+            "message": "Neon Snake Arena API",
+            "version": settings.version,
+            "docs": "/docs",
+        }
+
+    @app.get("/health")
+    async def health():
+        """Health check endpoint"""
+        if startup.error is not None:
+            return JSONResponse({"status": "unhealthy"}, status_code=503)
+        return {"status": "healthy"}
+
+    return app
@@ -1,4 +1,6 @@
 """Application configuration"""
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
 
@@ -14,6 +16,38 @@ class Settings(BaseSettings):
     secret_key: str = "your-secret-key-change-in-production"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 1440  # 24 hours
+    password_hash_workers: int = 4  # 0 hashes inline on the event loop
+    password_hash_queue_timeout: float = 2.0  # Seconds to wait before 503
+    token_revocation_filter: bool = True  # Skip blacklist queries for unrevoked tokens
+    token_revocation_filter_capacity: int = 100_000
+    token_revocation_filter_error_rate: float = 0.01
+    # With a shared invalidation bus, seconds between re-reads of recently
+    # blacklisted tokens, in case a logout message from another worker was lost
+    token_revocation_sync_interval: float = 5.0
+    user_cache_size: int = 10_000  # Authenticated users kept in memory (0 disables)
+    user_cache_ttl: float = 300.0  # Seconds
+    trust_token_claims: bool = False  # Serve /auth/me from signed token claims
+    
+    # Hot read endpoints, per route: seconds a cached response is fresh, and
+    # how much longer it is still served while one background load replaces
+    # it. Concurrent identical requests share one load even at 0 and 0
+    response_cache_fresh: dict[str, float] = {
+        "leaderboard": 1.0,
+        "leaderboard_top": 1.0,
+        "user_scores": 2.0,
+        "user_profile": 5.0,
+        "user_stats": 5.0,
+        "spectate_players": 0.0,
+        "spectate_player": 0.0,
+    }
+    response_cache_stale: dict[str, float] = {
+        "leaderboard": 5.0,
+        "leaderboard_top": 5.0,
+        "user_scores": 10.0,
+        "user_profile": 30.0,
+        "user_stats": 30.0,
+    }
+    response_cache_size: int = 1024  # Entries kept per route
     
     # CORS
     cors_origins: list[str] = [
@@ -34,6 +68,55 @@ class Settings(BaseSettings):
     db_max_overflow: int = 10
     db_pool_timeout: int = 30
     db_pool_recycle: int = 3600
+    db_query_cache_size: int = 1200  # Compiled SQL statements cached per engine
+    # Prepared statements kept per asyncpg connection; 0 behind PgBouncer
+    # in transaction mode, where the connection under a session changes
+    db_prepared_statement_cache_size: int = 256
+    read_database_urls: list[str] = []  # Replicas for read-only routes
+    read_replica_check_interval: float = 5.0  # Seconds between replica health checks
+    read_your_writes_seconds: float = 5.0  # Reads stay on the primary after a score submit (0 disables)
+    # SQLite file databases (ignored otherwise)
+    sqlite_read_pool_size: int = 4  # Read-only connections; writes share one connection
+    sqlite_busy_timeout: int = 5000  # Milliseconds to wait for a lock before failing
+    sqlite_cache_size: int = 65_536  # Page cache per connection, in KiB
+    sqlite_mmap_size: int = 268_435_456  # Bytes of the file read through mmap
+    
+    # Maintenance (intervals in seconds)
+    maintenance_enabled: bool = True
+    maintenance_chunk_size: int = 1000  # Rows deleted per statement
+    maintenance_time_budget: float = 5.0  # Seconds per job run
+    maintenance_jitter: float = 0.1  # +/- fraction applied to each interval
+    token_cleanup_interval: float = 3600
+    player_cleanup_interval: float = 300
+    player_inactive_minutes: int = 30  # Backstop for rows the registry never expired
+    score_cleanup_interval: float = 86400
+    score_retention_days: int = 0  # 0 keeps scores forever
+    
+    # Spectate streaming
+    spectate_tick_interval: float = 0.1  # Seconds between pushed frames
+    spectate_send_queue: int = 4  # Frames buffered per spectator before coalescing
+    spectate_keyframe_interval: int = 50  # Frames between full-state keyframes
+    spectate_heartbeat_interval: float = 20.0  # Seconds before a quiet stream resends a keyframe
+    player_state_flush_interval: float = 0.5  # Seconds between batched state writes
+    player_timeout: float = 15.0  # Seconds without a state report before a game is dropped
+    
+    # Admission control: concurrent API requests per route group ("reads",
+    # "writes", "auth" for login/signup). Limits shrink while requests
+    # take longer than the group's target latency and grow back after
+    admission_control: bool = True
+    admission_max_concurrency: dict[str, int] = {"reads": 64, "writes": 16, "auth": 16}
+    admission_target_latency: dict[str, float] = {"reads": 0.25, "writes": 0.5, "auth": 1.0}
+    admission_queue_timeout: float = 0.25  # Seconds a request may wait for a slot before 503
+    
+    # Worker processes
+    # Bind and answer /health first; import routers, check the schema and
+    # start services in the background while other requests wait
+    lazy_startup: bool = False
+    web_concurrency: int = 1  # Also read by uvicorn as its default --workers
+    # How workers tell each other to drop cached state; "auto" is "unix"
+    # with more than one worker, else "local" (this process only)
+    invalidation_bus: Literal["auto", "local", "unix", "postgres"] = "auto"
+    invalidation_socket_dir: str = ""  # Directory of worker sockets; defaults under the temp dir
     
     @property
     def is_sqlite(self) -> bool:
@@ -43,15 +126,24 @@ class Settings(BaseSettings):
     @property
     def async_database_url(self) -> str:
         """Get async database URL"""
-        # Ensure async drivers are used
-        if "postgresql" in self.database_url and "asyncpg" not in self.database_url:
-            return self.database_url.replace("postgresql://", "postgresql+asyncpg://")
-        if "sqlite" in self.database_url and "aiosqlite" not in self.database_url:
-            return self.database_url.replace("sqlite://", "sqlite+aiosqlite://")
-        return self.database_url
+        return to_async_url(self.database_url)
+    
+    @property
+    def async_read_database_urls(self) -> list[str]:
+        """Get async read replica URLs"""
+        return [to_async_url(url) for url in self.read_database_urls]
     
     class Config:
         env_file = ".env"
 
 
+def to_async_url(url: str) -> str:
+    """Ensure async drivers are used"""
+    if "postgresql" in url and "asyncpg" not in url:
+        return url.replace("postgresql://", "postgresql+asyncpg://")
+    if "sqlite" in url and "aiosqlite" not in url:
+        return url.replace("sqlite://", "sqlite+aiosqlite://")
+    return url
+
+
 settings = Settings()
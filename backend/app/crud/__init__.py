@@ -1,9 +1,10 @@
 """CRUD operations for database models"""
-from . import active_players, leaderboard, token_blacklist, users
+from . import active_players, job_leases, leaderboard, token_blacklist, users
 
 __all__ = [
     "users",
     "leaderboard",
     "active_players",
     "token_blacklist",
+    "job_leases",
 ]
@@ -1,39 +1,93 @@
-"""CRUD operations for active players"""
+"""CRUD operations for active players.
+
+Live game state is owned by ``ActivePlayerRegistry``; these functions are
+a facade over it. The ``active_players`` table only holds snapshots, read
+once to recover games after a restart.
+"""
+import base64
+from collections.abc import Iterable
 from datetime import datetime, timedelta, timezone
 from typing import Literal
 
-from sqlalchemy import select
+from sqlalchemy import bindparam, delete, select, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app import schemas
+from app.invalidation import PLAYER_STATE, invalidation_bus
 from app.models.db_models import ActivePlayer
+from app.services.player_registry import ActivePlayerRegistry, active_player_registry
+
+
+async def _registry(db: AsyncSession) -> ActivePlayerRegistry:
+    """The registry, recovered from the table on first use"""
+    if not active_player_registry.loaded:
+        await active_player_registry.load(db)
+    return active_player_registry
 
 
 async def get_active_players(
     db: AsyncSession,
     mode: Literal["walls", "pass-through"] | None = None,
-) -> list[ActivePlayer]:
-    """Get all active players"""
-    query = select(ActivePlayer).where(ActivePlayer.is_game_over == False)
-    
-    if mode:
-        query = query.where(ActivePlayer.mode == mode)
-    
-    result = await db.execute(query)
-    return list(result.scalars().all())
+) -> list[schemas.ActivePlayer]:
+    """Get all active players, highest score first"""
+    return (await _registry(db)).active_players(mode)
+
+
+def encode_cursor(sort: str, key: tuple) -> str:
+    """Opaque cursor resuming a listing after ``key``"""
+    raw = f"{sort}:{key[0]!r}:{key[1]}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(sort: str, cursor: str) -> tuple:
+    """Sort key from ``encode_cursor``; ValueError if malformed or for another sort"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        cursor_sort, value, player_id = raw.split(":", 2)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Malformed cursor") from e
+    if cursor_sort != sort:
+        raise ValueError("Cursor belongs to another sort order")
+    return (int(value) if sort == "score" else float(value), player_id)
+
+
+async def list_active_players(
+    db: AsyncSession,
+    mode: Literal["walls", "pass-through"] | None = None,
+    sort: Literal["score", "started_at"] = "score",
+    limit: int | None = None,
+    cursor: str | None = None,
+) -> tuple[list[schemas.ActivePlayer], str | None]:
+    """One page of active players, highest score or newest first.
+
+    Returns the players and the cursor for the next page (None on the
+    last). Raises ValueError for an invalid cursor.
+    """
+    after = decode_cursor(sort, cursor) if cursor else None
+    players, last = (await _registry(db)).page(mode=mode, sort=sort, limit=limit, after=after)
+    return players, (encode_cursor(sort, last) if last is not None else None)
 
 
 async def get_active_player(
     db: AsyncSession,
     player_id: str,
-) -> ActivePlayer | None:
+) -> schemas.ActivePlayer | None:
     """Get a specific active player"""
-    result = await db.execute(
-        select(ActivePlayer).where(
-            ActivePlayer.id == player_id,
-            ActivePlayer.is_game_over == False,
-        )
-    )
-    return result.scalar_one_or_none()
+    return (await _registry(db)).get_active(player_id)
+
+
+async def get_player(
+    db: AsyncSession,
+    player_id: str,
+) -> schemas.ActivePlayer | None:
+    """Get a player whether or not their game is over"""
+    record = (await _registry(db)).get(player_id)
+    if record is not None:
+        return record.view()
+    # Finished games are only kept in the table
+    row = await db.get(ActivePlayer, player_id)
+    return schemas.ActivePlayer.model_validate(row) if row else None
 
 
 async def create_active_player(
@@ -41,93 +95,162 @@ async def create_active_player(
     player_id: str,
     username: str,
     mode: Literal["walls", "pass-through"],
-    snake: dict,
+    snake: list,
     food: dict,
     direction: Literal["UP", "DOWN", "LEFT", "RIGHT"] = "RIGHT",
-) -> ActivePlayer:
-    """Create a new active player"""
-    player = ActivePlayer(
-        id=player_id,
+) -> schemas.ActivePlayer | None:
+    """Create a new active player and insert its initial row.
+
+    If another request or worker inserted the row first, that game is
+    returned instead, finished or not.
+    """
+    registry = await _registry(db)
+    existing = registry.get(player_id)
+    if existing is not None:
+        return existing.view()
+    record = registry.create(
+        player_id=player_id,
         username=username,
-        score=0,
         mode=mode,
         snake=snake,
         food=food,
-        is_game_over=False,
         direction=direction,
-        started_at=datetime.now(timezone.utc),
     )
-    db.add(player)
-    await db.commit()
-    await db.refresh(player)
-    return player
+    values = {**record.row(), "username": username, "started_at": record.started_at}
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    try:
+        result = await db.execute(
+            dialect.insert(ActivePlayer).values(**values).on_conflict_do_nothing(index_elements=["id"])
+        )
+        await db.commit()
+    except Exception:
+        if registry.get(player_id) is record:
+            registry.discard(player_id)
+        raise
+    if result.rowcount == 0:
+        if registry.get(player_id) is record:
+            registry.discard(player_id)
+        row = await db.get(ActivePlayer, player_id, populate_existing=True)
+        if row is None or row.is_game_over:
+            return schemas.ActivePlayer.model_validate(row) if row else None
+        return registry.adopt(row).view()
+    if invalidation_bus.shared:
+        invalidation_bus.send(PLAYER_STATE, **record.message())
+    return record.view()
 
 
 async def update_player_state(
     db: AsyncSession,
     player_id: str,
     score: int | None = None,
-    snake: dict | None = None,
+    snake: list | None = None,
     food: dict | None = None,
     direction: Literal["UP", "DOWN", "LEFT", "RIGHT"] | None = None,
-) -> ActivePlayer | None:
-    """Update player game state"""
-    result = await db.execute(
-        select(ActivePlayer).where(ActivePlayer.id == player_id)
+    mode: Literal["walls", "pass-through"] | None = None,
+    is_game_over: bool | None = None,
+) -> schemas.ActivePlayer | None:
+    """Update player game state in memory; persisted by the next snapshot"""
+    registry = await _registry(db)
+    changes = dict(
+        score=score,
+        snake=snake,
+        food=food,
+        direction=direction,
+        mode=mode,
+        is_game_over=is_game_over,
     )
-    player = result.scalar_one_or_none()
-    
-    if not player:
-        return None
-    
-    if score is not None:
-        player.score = score
-    if snake is not None:
-        player.snake = snake
-    if food is not None:
-        player.food = food
-    if direction is not None:
-        player.direction = direction
-    
-    await db.commit()
-    await db.refresh(player)
-    return player
+    record = registry.update(player_id, **changes)
+    if record is None:
+        # Started on another worker, or expired here but still reporting
+        row = await db.get(ActivePlayer, player_id)
+        if row is None or row.is_game_over:
+            return None
+        registry.adopt(row)
+        record = registry.update(player_id, **changes)
+    if invalidation_bus.shared:
+        invalidation_bus.send(PLAYER_STATE, **record.message())
+    return record.view()
 
 
 async def mark_game_over(
     db: AsyncSession,
     player_id: str,
-) -> ActivePlayer | None:
+) -> schemas.ActivePlayer | None:
     """Mark player's game as over"""
+    return await update_player_state(db, player_id, is_game_over=True)
+
+
+async def save_player_states(db: AsyncSession) -> int:
+    """Write pending in-memory changes now instead of at the next snapshot"""
+    return await active_player_registry.snapshot(db)
+
+
+async def load_live_players(db: AsyncSession) -> list[ActivePlayer]:
+    """Rows of games that were live at the last snapshot"""
     result = await db.execute(
-        select(ActivePlayer).where(ActivePlayer.id == player_id)
+        select(ActivePlayer).where(ActivePlayer.is_game_over == False)
     )
-    player = result.scalar_one_or_none()
-    
-    if not player:
-        return None
-    
-    player.is_game_over = True
+    return list(result.scalars().all())
+
+
+async def bulk_update_player_states(
+    db: AsyncSession,
+    states: list[dict],
+) -> int:
+    """Write many players' state in one batched UPDATE by primary key.
+
+    Each dict holds ``id`` plus the columns to set. Rows that no longer
+    exist are skipped: unlike the ORM's bulk UPDATE, this Core statement
+    does not check how many rows each parameter set matched.
+    """
+    if not states:
+        return 0
+    table = ActivePlayer.__table__
+    statement = update(table).where(table.c.id == bindparam("player_id"))
+    params = [{"player_id": state["id"], **{k: v for k, v in state.items() if k != "id"}} for state in states]
+    await db.execute(statement, params)
     await db.commit()
-    await db.refresh(player)
-    return player
+    return len(states)
+
+
+async def delete_players(
+    db: AsyncSession,
+    player_ids: Iterable[str],
+    commit: bool = True,
+    seen_before: datetime | None = None,
+) -> int:
+    """Delete many players' rows in one statement.
+
+    With ``seen_before``, rows written since then are kept: another worker
+    is still persisting reports for them.
+    """
+    player_ids = list(player_ids)
+    if not player_ids:
+        return 0
+    condition = ActivePlayer.id.in_(player_ids)
+    if seen_before is not None:
+        condition &= ActivePlayer.last_seen_at < seen_before
+    result = await db.execute(delete(ActivePlayer).where(condition))
+    if commit:
+        await db.commit()
+    return result.rowcount or 0
 
 
 async def cleanup_inactive_players(
     db: AsyncSession,
     inactive_minutes: int = 30,
+    limit: int | None = None,
 ) -> int:
-    """Remove inactive players (game over or started too long ago)"""
+    """Remove inactive players (game over or not seen for too long)"""
     cutoff_time = datetime.now(timezone.utc) - timedelta(minutes=inactive_minutes)
-    
-    query = select(ActivePlayer).where(
-        (ActivePlayer.is_game_over == True) | (ActivePlayer.started_at < cutoff_time)
+
+    condition = (ActivePlayer.is_game_over == True) | (
+        (ActivePlayer.is_game_over == False) & (ActivePlayer.last_seen_at < cutoff_time)
     )
-    result = await db.execute(query)
-    players = list(result.scalars().all())
-    
-    for player in players:
-        await db.delete(player)
-    
+    if limit is not None:
+        condition = ActivePlayer.id.in_(
+            select(ActivePlayer.id).where(condition).limit(limit)
+        )
+    result = await db.execute(delete(ActivePlayer).where(condition))
     await db.commit()
-    return len(players)
+    return result.rowcount or 0
@@ -0,0 +1,55 @@
+"""CRUD operations for background job leases"""
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.db_models import JobLease
+
+
+async def acquire_lease(
+    db: AsyncSession,
+    name: str,
+    owner: str,
+    ttl_seconds: float,
+) -> bool:
+    """Take or renew the lease on a job; False if another owner holds it"""
+    now = datetime.now(timezone.utc)
+    expires_at = now + timedelta(seconds=ttl_seconds)
+    
+    # Renew our own lease or take over an expired one in a single statement
+    result = await db.execute(
+        update(JobLease)
+        .where(
+            JobLease.name == name,
+            or_(JobLease.owner == owner, JobLease.expires_at < now),
+        )
+        .values(owner=owner, expires_at=expires_at)
+    )
+    if result.rowcount:
+        await db.commit()
+        return True
+    
+    # No row yet: whoever inserts first wins
+    db.add(JobLease(name=name, owner=owner, expires_at=expires_at))
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        return False
+    return True
+
+
+async def release_lease(
+    db: AsyncSession,
+    name: str,
+    owner: str,
+) -> None:
+    """Give up a lease we hold so another worker can take over immediately"""
+    await db.execute(
+        update(JobLease)
+        .where(JobLease.name == name, JobLease.owner == owner)
+        .values(expires_at=datetime.now(timezone.utc))
+    )
+    await db.commit()
@@ -2,11 +2,13 @@
 from datetime import datetime, timezone
 from typing import Literal
 
-from sqlalchemy import desc, func, select
+from sqlalchemy import delete, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.db_models import LeaderboardEntry
 
+from . import statements
+
 
 async def get_leaderboard(
     db: AsyncSession,
@@ -15,25 +17,17 @@ async def get_leaderboard(
     offset: int = 0,
 ) -> tuple[list[LeaderboardEntry], int]:
     """Get leaderboard with filtering and pagination"""
-    # Build base query
-    query = select(LeaderboardEntry)
-    
     if mode:
-        query = query.where(LeaderboardEntry.mode == mode)
-    
+        count_query, query = statements.LEADERBOARD_MODE_COUNT, statements.LEADERBOARD_MODE_PAGE
+    else:
+        count_query, query = statements.LEADERBOARD_COUNT, statements.LEADERBOARD_PAGE
+    params = {"mode": mode, "limit": limit, "offset": offset}
+
     # Get total count
-    count_query = select(func.count(LeaderboardEntry.id))
-    if mode:
-        count_query = count_query.where(LeaderboardEntry.mode == mode)
-    
-    total_result = await db.execute(count_query)
+    total_result = await db.execute(count_query, params)
     total = total_result.scalar_one()
-    
-    # Apply ordering and pagination
-    query = query.order_by(desc(LeaderboardEntry.score), LeaderboardEntry.timestamp)
-    query = query.limit(limit).offset(offset)
-    
-    result = await db.execute(query)
+
+    result = await db.execute(query, params)
     entries = list(result.scalars().all())
     
     return entries, total
@@ -45,14 +39,8 @@ async def get_user_scores(
     mode: Literal["walls", "pass-through"] | None = None,
 ) -> list[LeaderboardEntry]:
     """Get all scores for a user"""
-    query = select(LeaderboardEntry).where(LeaderboardEntry.user_id == user_id)
-    
-    if mode:
-        query = query.where(LeaderboardEntry.mode == mode)
-    
-    query = query.order_by(desc(LeaderboardEntry.score), LeaderboardEntry.timestamp)
-    
-    result = await db.execute(query)
+    query = statements.USER_MODE_SCORES if mode else statements.USER_SCORES
+    result = await db.execute(query, {"user_id": user_id, "mode": mode})
     return list(result.scalars().all())
 
 
@@ -64,16 +52,19 @@ async def add_score(
     mode: Literal["walls", "pass-through"],
 ) -> LeaderboardEntry:
     """Add a new score to leaderboard"""
-    entry = LeaderboardEntry(
-        user_id=user_id,
-        username=username,
-        score=score,
-        mode=mode,
-        timestamp=datetime.now(timezone.utc),
+    result = await db.scalars(
+        insert(LeaderboardEntry)
+        .values(
+            user_id=user_id,
+            username=username,
+            score=score,
+            mode=mode,
+            timestamp=datetime.now(timezone.utc),
+        )
+        .returning(LeaderboardEntry)
     )
-    db.add(entry)
+    entry = result.one()
     await db.commit()
-    await db.refresh(entry)
     return entry
 
 
@@ -83,28 +74,22 @@ async def get_top_score_by_user(
     mode: Literal["walls", "pass-through"] | None = None,
 ) -> LeaderboardEntry | None:
     """Get user's top score"""
-    query = select(LeaderboardEntry).where(LeaderboardEntry.user_id == user_id)
-    
-    if mode:
-        query = query.where(LeaderboardEntry.mode == mode)
-    
-    query = query.order_by(desc(LeaderboardEntry.score)).limit(1)
-    
-    result = await db.execute(query)
+    query = statements.USER_MODE_TOP_SCORE if mode else statements.USER_TOP_SCORE
+    result = await db.execute(query, {"user_id": user_id, "mode": mode})
     return result.scalar_one_or_none()
 
 
 async def delete_old_scores(
     db: AsyncSession,
     before_date: datetime,
+    limit: int | None = None,
 ) -> int:
-    """Delete scores older than a certain date"""
-    query = select(LeaderboardEntry).where(LeaderboardEntry.timestamp < before_date)
-    result = await db.execute(query)
-    entries = list(result.scalars().all())
-    
-    for entry in entries:
-        await db.delete(entry)
-    
+    """Delete scores older than a certain date, at most ``limit`` rows if given"""
+    condition = LeaderboardEntry.timestamp < before_date
+    if limit is not None:
+        condition = LeaderboardEntry.id.in_(
+            select(LeaderboardEntry.id).where(condition).limit(limit)
+        )
+    result = await db.execute(delete(LeaderboardEntry).where(condition))
     await db.commit()
-    return len(entries)
+    return result.rowcount or 0
@@ -0,0 +1,52 @@
+"""Pre-built statements for the hot read queries.
+
+Each statement is constructed once at import with ``bindparam`` values in
+place of the arguments, and executed with a parameter dict. SQLAlchemy
+memoizes a construct's cache key, so a call skips both building the
+``select`` and walking it for its key, and goes straight to the engine's
+compiled cache. The SQL text is the same on every call, so asyncpg's
+per-connection prepared statement cache reuses one prepared statement
+per query on each pooled connection.
+
+Optional filters get one statement per variant rather than a conditional
+``where``, which would need a new construct.
+"""
+from sqlalchemy import bindparam, desc, func, select
+
+from app.models.db_models import LeaderboardEntry, TokenBlacklist, User
+
+# Users
+
+USER_BY_ID = select(User).where(User.id == bindparam("user_id"))
+USER_BY_EMAIL = select(User).where(User.email == bindparam("email"))
+USER_BY_USERNAME = select(User).where(User.username == bindparam("username"))
+USER_COUNT = select(func.count(User.id))
+
+# Leaderboard; every ranking is ORDER BY score DESC, timestamp
+
+_RANK = (desc(LeaderboardEntry.score), LeaderboardEntry.timestamp)
+_MODE = LeaderboardEntry.mode == bindparam("mode")
+_USER = LeaderboardEntry.user_id == bindparam("user_id")
+
+LEADERBOARD_PAGE = (
+    select(LeaderboardEntry)
+    .order_by(*_RANK)
+    .limit(bindparam("limit"))
+    .offset(bindparam("offset"))
+)
+LEADERBOARD_MODE_PAGE = LEADERBOARD_PAGE.where(_MODE)
+LEADERBOARD_COUNT = select(func.count(LeaderboardEntry.id))
+LEADERBOARD_MODE_COUNT = LEADERBOARD_COUNT.where(_MODE)
+
+USER_SCORES = select(LeaderboardEntry).where(_USER).order_by(*_RANK)
+USER_MODE_SCORES = USER_SCORES.where(_MODE)
+USER_TOP_SCORE = (
+    select(LeaderboardEntry).where(_USER).order_by(desc(LeaderboardEntry.score)).limit(1)
+)
+USER_MODE_TOP_SCORE = USER_TOP_SCORE.where(_MODE)
+
+# Token blacklist
+
+TOKEN_BLACKLISTED = select(TokenBlacklist.token_hash).where(
+    TokenBlacklist.token_hash == bindparam("token_hash")
+)
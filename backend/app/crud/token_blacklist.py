@@ -1,48 +1,85 @@
 """CRUD operations for token blacklist"""
 from datetime import datetime, timezone
 
-from sqlalchemy import delete, select
+from sqlalchemy import delete, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.db_models import TokenBlacklist
 
+from . import statements
+
 
 async def blacklist_token(
     db: AsyncSession,
-    token: str,
+    token_hash: bytes,
     expires_at: datetime,
 ) -> TokenBlacklist:
     """Add token to blacklist"""
-    blacklisted = TokenBlacklist(
-        token=token,
-        blacklisted_at=datetime.now(timezone.utc),
-        expires_at=expires_at,
+    result = await db.scalars(
+        insert(TokenBlacklist)
+        .values(
+            token_hash=token_hash,
+            blacklisted_at=datetime.now(timezone.utc),
+            expires_at=expires_at,
+        )
+        .returning(TokenBlacklist)
     )
-    db.add(blacklisted)
+    blacklisted = result.one()
     await db.commit()
-    await db.refresh(blacklisted)
     return blacklisted
 
 
 async def is_token_blacklisted(
     db: AsyncSession,
-    token: str,
+    token_hash: bytes,
 ) -> bool:
     """Check if token is blacklisted"""
+    result = await db.execute(statements.TOKEN_BLACKLISTED, {"token_hash": token_hash})
+    return result.scalar_one_or_none() is not None
+
+
+async def get_unexpired_tokens(
+    db: AsyncSession,
+) -> list[tuple[bytes, datetime]]:
+    """Get (token_hash, expires_at) for every blacklisted token still valid"""
+    now = datetime.now(timezone.utc)
     result = await db.execute(
-        select(TokenBlacklist).where(TokenBlacklist.token == token)
+        select(TokenBlacklist.token_hash, TokenBlacklist.expires_at).where(
+            TokenBlacklist.expires_at >= now
+        )
     )
-    return result.scalar_one_or_none() is not None
+    return [(row.token_hash, row.expires_at) for row in result]
+
+
+async def get_tokens_revoked_since(
+    db: AsyncSession,
+    since: datetime,
+) -> list[tuple[bytes, datetime]]:
+    """Get (token_hash, expires_at) for unexpired tokens blacklisted at or after ``since``"""
+    now = datetime.now(timezone.utc)
+    result = await db.execute(
+        select(TokenBlacklist.token_hash, TokenBlacklist.expires_at).where(
+            TokenBlacklist.blacklisted_at >= since,
+            TokenBlacklist.expires_at >= now,
+        )
+    )
+    return [(row.token_hash, row.expires_at) for row in result]
 
 
 async def cleanup_expired_tokens(
     db: AsyncSession,
+    limit: int | None = None,
 ) -> int:
-    """Remove expired tokens from blacklist"""
+    """Remove expired tokens from blacklist, at most ``limit`` rows if given"""
     now = datetime.now(timezone.utc)
     
     # Use delete statement directly for efficiency
-    stmt = delete(TokenBlacklist).where(TokenBlacklist.expires_at < now)
+    condition = TokenBlacklist.expires_at < now
+    if limit is not None:
+        condition = TokenBlacklist.token_hash.in_(
+            select(TokenBlacklist.token_hash).where(condition).limit(limit)
+        )
+    stmt = delete(TokenBlacklist).where(condition)
     result = await db.execute(stmt)
     await db.commit()
     
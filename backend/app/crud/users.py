@@ -1,25 +1,27 @@
 """CRUD operations for users"""
-from sqlalchemy import func, select
+from sqlalchemy import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.db_models import User
 
+from . import statements
+
 
 async def get_user_by_id(db: AsyncSession, user_id: str) -> User | None:
     """Get user by ID"""
-    result = await db.execute(select(User).where(User.id == user_id))
+    result = await db.execute(statements.USER_BY_ID, {"user_id": user_id})
     return result.scalar_one_or_none()
 
 
 async def get_user_by_email(db: AsyncSession, email: str) -> User | None:
     """Get user by email"""
-    result = await db.execute(select(User).where(User.email == email))
+    result = await db.execute(statements.USER_BY_EMAIL, {"email": email})
     return result.scalar_one_or_none()
 
 
 async def get_user_by_username(db: AsyncSession, username: str) -> User | None:
     """Get user by username"""
-    result = await db.execute(select(User).where(User.username == username))
+    result = await db.execute(statements.USER_BY_USERNAME, {"username": username})
     return result.scalar_one_or_none()
 
 
@@ -31,19 +33,22 @@ async def create_user(
     hashed_password: str,
 ) -> User:
     """Create a new user"""
-    db_user = User(
-        id=user_id,
-        username=username,
-        email=email,
-        hashed_password=hashed_password,
+    result = await db.scalars(
+        insert(User)
+        .values(
+            id=user_id,
+            username=username,
+            email=email,
+            hashed_password=hashed_password,
+        )
+        .returning(User)
     )
-    db.add(db_user)
+    db_user = result.one()
     await db.commit()
-    await db.refresh(db_user)
     return db_user
 
 
 async def get_user_count(db: AsyncSession) -> int:
     """Get total number of users"""
-    result = await db.execute(select(func.count(User.id)))
+    result = await db.execute(statements.USER_COUNT)
     return result.scalar_one()
@@ -1,6 +1,18 @@
 """Database configuration and session management"""
+import asyncio
+import hashlib
+import itertools
+import logging
+import re
+import time
+from contextlib import AsyncExitStack
+from functools import cache
+from pathlib import Path
 from typing import AsyncGenerator
 
+from fastapi import Request
+from sqlalchemy import Column, MetaData, String, Table, event, inspect, insert
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
@@ -10,25 +22,123 @@ from sqlalchemy.ext.asyncio import (
 
 from app.config import settings
 from app.models.db_models import Base
+from app.invalidation import READS_PINNED, invalidation_bus
 
-# Create async engine
-engine: AsyncEngine = create_async_engine(
-    settings.async_database_url,
-    echo=settings.database_echo,
-    pool_pre_ping=True,
-    # Only use pool settings for non-SQLite databases
-    **({}
-        if settings.is_sqlite
-        else {
-            "pool_size": settings.db_pool_size,
-            "max_overflow": settings.db_max_overflow,
-            "pool_timeout": settings.db_pool_timeout,
-            "pool_recycle": settings.db_pool_recycle,
+logger = logging.getLogger(__name__)
+
+
+def is_sqlite_memory(url: str) -> bool:
+    """Whether ``url`` is an in-memory SQLite database (one per connection)"""
+    return url.startswith("sqlite") and (":memory:" in url or "mode=memory" in url or url.endswith("://"))
+
+
+def engine_options(url: str) -> dict:
+    """Statement caching options shared by every engine.
+
+    ``query_cache_size`` bounds SQLAlchemy's compiled cache (SQL strings
+    keyed by statement structure). On asyncpg, both the dialect's and the
+    driver's per-connection caches of server-side prepared statements are
+    sized so the hot queries in ``crud.statements`` stay prepared on each
+    pooled connection.
+    """
+    options: dict = {"query_cache_size": settings.db_query_cache_size}
+    if "+asyncpg" in url:
+        size = settings.db_prepared_statement_cache_size
+        options["connect_args"] = {
+            "prepared_statement_cache_size": size,
+            "statement_cache_size": size,
         }
-    ),
-)
+    return options
+
+
+def apply_sqlite_profile(engine: AsyncEngine, read_only: bool) -> None:
+    """Tune every connection of a file-backed SQLite engine.
+
+    Connections use WAL (readers and the writer no longer block each
+    other), ``synchronous=NORMAL`` (fsync at checkpoints rather than every
+    commit; safe against corruption in WAL mode), a busy timeout instead of
+    failing at once with "database is locked", and a larger page cache and
+    mmap window for reads. Writer transactions start with ``BEGIN
+    IMMEDIATE`` so they take the write lock up front, where the busy
+    timeout applies, instead of failing when a read upgrades to a write.
+    Read-only engines refuse writes with ``query_only``.
+    """
+    pragmas = [
+        f"PRAGMA busy_timeout = {settings.sqlite_busy_timeout}",
+        "PRAGMA synchronous = NORMAL",
+        f"PRAGMA cache_size = -{settings.sqlite_cache_size}",
+        f"PRAGMA mmap_size = {settings.sqlite_mmap_size}",
+        "PRAGMA temp_store = MEMORY",
+    ]
+    pragmas.insert(0, "PRAGMA query_only = ON" if read_only else "PRAGMA journal_mode = WAL")
+    begin = "BEGIN" if read_only else "BEGIN IMMEDIATE"
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        # Transactions are begun by the "begin" listener, not the driver
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def on_begin(conn):
+        conn.exec_driver_sql(begin)
 
-# Create async session factory
+
+def create_sqlite_engines(url: str, read_pool_size: int) -> tuple[AsyncEngine, AsyncEngine]:
+    """A single-connection writer engine and a read-only pool for one file.
+
+    All writes queue for the writer's one connection, so they are
+    serialized in the process rather than contending for the file lock.
+    """
+    writer = create_async_engine(
+        url,
+        echo=settings.database_echo,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=settings.db_pool_timeout,
+        **engine_options(url),
+    )
+    reader = create_async_engine(
+        url,
+        echo=settings.database_echo,
+        pool_size=read_pool_size,
+        max_overflow=0,
+        pool_timeout=settings.db_pool_timeout,
+        **engine_options(url),
+    )
+    apply_sqlite_profile(writer, read_only=False)
+    apply_sqlite_profile(reader, read_only=True)
+    return writer, reader
+
+
+if settings.is_sqlite and not is_sqlite_memory(settings.async_database_url):
+    engine, read_engine = create_sqlite_engines(
+        settings.async_database_url, settings.sqlite_read_pool_size
+    )
+else:
+    # Create async engine
+    engine: AsyncEngine = create_async_engine(
+        settings.async_database_url,
+        echo=settings.database_echo,
+        pool_pre_ping=True,
+        # Only use pool settings for non-SQLite databases
+        **({}
+            if settings.is_sqlite
+            else {
+                "pool_size": settings.db_pool_size,
+                "max_overflow": settings.db_max_overflow,
+                "pool_timeout": settings.db_pool_timeout,
+                "pool_recycle": settings.db_pool_recycle,
+            }
+        ),
+        **engine_options(settings.async_database_url),
+    )
+    read_engine: AsyncEngine = engine
+
+# Create async session factories
 AsyncSessionLocal = async_sessionmaker(
     engine,
     class_=AsyncSession,
@@ -37,22 +147,375 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False,
 )
 
+ReadSessionLocal = async_sessionmaker(
+    read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False,
+)
+
+
+class ReadReplicas:
+    """Spreads read-only sessions over replica engines.
+
+    Sessions go round-robin to replicas that passed their last health
+    check (``SELECT 1`` every ``check_interval`` seconds); with none
+    healthy, or none configured, they come from ``primary``. A client can
+    be pinned to the primary for a while after a write so it reads its own
+    writes despite replication lag. Pins are kept per process.
+    """
+
+    def __init__(
+        self,
+        engines: list[AsyncEngine],
+        primary: async_sessionmaker[AsyncSession],
+        check_interval: float = 5.0,
+        check_timeout: float = 2.0,
+    ):
+        self.engines = engines
+        self.primary = primary
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+        self.sessions = [
+            async_sessionmaker(e, class_=AsyncSession, expire_on_commit=False, autoflush=False)
+            for e in engines
+        ]
+        self.healthy = [True] * len(engines)
+        self._turn = itertools.count()
+        self._pins: dict[str, float] = {}
+        self._task: asyncio.Task | None = None
+
+    def is_pinned(self, pin_key: str | None) -> bool:
+        """Whether ``pin_key``'s reads must currently go to the primary"""
+        if pin_key is None or not self._pins:
+            return False
+        until = self._pins.get(pin_key)
+        if until is None:
+            return False
+        if until > time.monotonic():
+            return True
+        del self._pins[pin_key]
+        return False
+
+    def session_factory(self, pin_key: str | None = None) -> async_sessionmaker[AsyncSession]:
+        """Where the next read-only session should come from"""
+        if self.is_pinned(pin_key):
+            return self.primary
+        healthy = [i for i, ok in enumerate(self.healthy) if ok]
+        if not healthy:
+            return self.primary
+        return self.sessions[healthy[next(self._turn) % len(healthy)]]
+
+    @property
+    def pinned(self) -> bool:
+        """Whether any client may currently be pinned"""
+        return bool(self._pins)
+
+    def pin(self, key: str, seconds: float) -> None:
+        """Serve ``key``'s reads from the primary for ``seconds``"""
+        if seconds > 0 and self.engines:
+            self._pins[key] = time.monotonic() + seconds
+
+    async def check(self) -> None:
+        """Probe every replica and update its health"""
+        for i, engine in enumerate(self.engines):
+            try:
+                async with asyncio.timeout(self.check_timeout):
+                    async with engine.connect() as conn:
+                        await conn.exec_driver_sql("SELECT 1")
+            except Exception as e:
+                if self.healthy[i]:
+                    logger.warning("Read replica %d failed its health check: %s", i, e)
+                self.healthy[i] = False
+            else:
+                if not self.healthy[i]:
+                    logger.info("Read replica %d is healthy again", i)
+                self.healthy[i] = True
+
+        now = time.monotonic()
+        self._pins = {key: until for key, until in self._pins.items() if until > now}
+
+    def start(self) -> None:
+        """Start periodic health checks"""
+        if self.engines and self._task is None:
+            self._task = asyncio.create_task(self._loop(), name="read-replica-checks")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(self.check_interval)
+
+
+read_replicas = ReadReplicas(
+    engines=[
+        create_async_engine(
+            url,
+            echo=settings.database_echo,
+            pool_pre_ping=True,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+            **engine_options(url),
+        )
+        for url in settings.async_read_database_urls
+    ],
+    primary=ReadSessionLocal,
+    check_interval=settings.read_replica_check_interval,
+)
+
+
+def client_key(request: Request) -> str | None:
+    """Identifies the client for read pins: a digest of its Authorization header"""
+    authorization = request.headers.get("authorization")
+    if not authorization:
+        return None
+    return hashlib.blake2b(authorization.encode(), digest_size=16).hexdigest()
+
+
+def pin_reads_to_primary(request: Request) -> None:
+    """Pin this client's reads to the primary on every worker.
+
+    Its reads stay off the replicas for ``read_your_writes_seconds``.
+    """
+    key = client_key(request)
+    if key and read_replicas.engines:
+        invalidation_bus.publish(READS_PINNED, client=key)
+
+
+invalidation_bus.subscribe(
+    READS_PINNED,
+    lambda message: read_replicas.pin(message["client"], settings.read_your_writes_seconds),
+)
+
+
+class LazySession:
+    """Stands in for an ``AsyncSession`` until a handler first uses it.
+
+    The real session is created on first attribute access, and it only
+    checks out a pooled connection (pinging it when ``pool_pre_ping`` is
+    on) when it first executes. Requests answered without touching the
+    database, such as cache hits or 304s, never create a session or use
+    the pool. Declare the dependency with ``scope="function"`` so that
+    ``close`` returns the connection as soon as the handler returns,
+    not after the response has been sent.
+    """
+
+    __slots__ = ("_factory", "_session")
+
+    def __init__(self, factory: async_sessionmaker[AsyncSession]):
+        self._factory = factory
+        self._session: AsyncSession | None = None
+
+    @property
+    def opened(self) -> bool:
+        """Whether the real session was created"""
+        return self._session is not None
+
+    def __getattr__(self, name: str):
+        session = self._session
+        if session is None:
+            session = self._session = self._factory()
+        return getattr(session, name)
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """Get database session dependency"""
-    async with AsyncSessionLocal() as session:
-        try:
-            yield session
-        finally:
-            await session.close()
+    session = LazySession(AsyncSessionLocal)
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """Get a session for read-only requests.
+
+    Sessions come from a healthy read replica when any are configured.
+    Otherwise, on SQLite they draw from the read-only connection pool so
+    reads never wait for the writer connection, and elsewhere they are
+    the same as ``get_db``. Clients pinned by ``pin_reads_to_primary``
+    skip the replicas.
+    """
+    key = client_key(request) if read_replicas.pinned else None
+    session = LazySession(read_replicas.session_factory(key))
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+async def get_pinned_read_db(request: Request) -> AsyncGenerator[AsyncSession | None, None]:
+    """A primary session for clients pinned by ``pin_reads_to_primary``.
+
+    Yields None for everyone else. Cached routes load pinned clients'
+    reads on it instead of serving them a shared, possibly older entry.
+    """
+    key = client_key(request) if read_replicas.pinned else None
+    if not read_replicas.is_pinned(key):
+        yield None
+        return
+    session = LazySession(read_replicas.primary)
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+_REVISION = re.compile(r"^(down_)?revision\b[^=]*=(.*)$", re.MULTILINE)
+
+
+@cache
+def schema_head() -> str | None:
+    """Newest Alembic revision, or None when it cannot be told.
+
+    Read straight from the ``revision`` / ``down_revision`` lines of the
+    migration scripts, which is much cheaper at startup than importing
+    Alembic's script machinery.
+    """
+    versions = Path(__file__).resolve().parent.parent / "alembic" / "versions"
+    revisions, parents = set(), set()
+    for script in versions.glob("*.py"):
+        for down, value in _REVISION.findall(script.read_text()):
+            ids = re.findall(r"[\"']([^\"']+)[\"']", value)
+            (parents if down else revisions).update(ids)
+    heads = revisions - parents
+    return heads.pop() if len(heads) == 1 else None
+
 
+async def _schema_revision(conn) -> str | None:
+    try:
+        async with conn.begin_nested():
+            result = await conn.exec_driver_sql("SELECT version_num FROM alembic_version")
+            return result.scalar_one_or_none()
+    except DBAPIError:
+        # Never migrated: the table does not exist
+        return None
 
-async def init_db() -> None:
-    """Initialize database tables"""
+
+_alembic_version = Table(
+    "alembic_version",
+    MetaData(),
+    Column("version_num", String(32), primary_key=True),
+)
+
+
+# Advisory lock key held while a worker sets up the schema
+SCHEMA_LOCK_KEY = int.from_bytes(hashlib.blake2b(b"snake-arena:schema", digest_size=4).digest(), "big")
+
+
+async def _lock_schema(conn) -> None:
+    """Make other workers wait here until this transaction ends.
+
+    Only Postgres needs it: SQLite writer transactions already begin
+    with ``BEGIN IMMEDIATE``, which serializes them.
+    """
+    if conn.dialect.name == "postgresql":
+        await conn.exec_driver_sql(f"SELECT pg_advisory_xact_lock({SCHEMA_LOCK_KEY})")
+
+
+def _upgrade_to_head(connection) -> None:
+    from alembic import command
+    from alembic.config import Config
+
+    # No ini file: alembic.ini's logging setup would replace the server's
+    config = Config()
+    config.set_main_option("script_location", str(Path(__file__).resolve().parent.parent / "alembic"))
+    config.attributes["connection"] = connection
+    command.upgrade(config, "head")
+
+
+def _unversioned_revision(connection) -> str | None:
+    """Revision matching a schema ``create_all`` made without Alembic.
+
+    Each check is something a migration added, oldest first; the schema
+    is at the revision before the first one it lacks.
+    """
+    inspector = inspect(connection)
+    tables = set(inspector.get_table_names())
+
+    def columns(table: str) -> set[str]:
+        return {c["name"] for c in inspector.get_columns(table)} if table in tables else set()
+
+    def indexes(table: str) -> set[str]:
+        return {i["name"] for i in inspector.get_indexes(table)} if table in tables else set()
+
+    added = (
+        ("0001", lambda: "token_hash" in columns("token_blacklist")),
+        ("0002", lambda: "job_leases" in tables),
+        ("0003", lambda: "last_seen_at" in columns("active_players")),
+        ("0004", lambda: "idx_leaderboard_rank" in indexes("leaderboard_entries")),
+        ("0005", lambda: "idx_blacklisted_at" in indexes("token_blacklist")),
+    )
+    for revision, has_next in added:
+        if not has_next():
+            return revision
+    return schema_head()
+
+
+async def init_db() -> bool:
+    """Initialize database tables.
+
+    Does nothing when Alembic has already migrated the database to the
+    newest revision, which skips ``create_all`` and its per-table
+    existence checks. An empty database is created with ``create_all``
+    and stamped at the newest revision. One created by ``create_all``
+    before migrations existed is stamped at the revision its tables
+    match. Either way, a database behind the newest revision is then
+    upgraded to it. Workers starting together take turns; the first sets
+    the schema up and the rest find it at the newest revision. Returns
+    whether the schema was created or changed.
+    """
+    head = schema_head()
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+        await _lock_schema(conn)
+        revision = await _schema_revision(conn)
+        if head is not None and revision == head:
+            return False
+        if head is None:
+            await conn.run_sync(Base.metadata.create_all)
+            return True
+        if revision is None:
+            if not await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_table_names()):
+                await conn.run_sync(Base.metadata.create_all)
+                revision = head
+            else:
+                revision = await conn.run_sync(_unversioned_revision)
+                logger.info("Database has no Alembic revision; its tables match %s", revision)
+            await conn.run_sync(_alembic_version.create)
+            await conn.execute(insert(_alembic_version).values(version_num=revision))
+        if revision != head:
+            logger.info("Upgrading database schema from revision %s to %s", revision, head)
+            await conn.run_sync(_upgrade_to_head)
+    return True
+
+
+async def prewarm_pools() -> None:
+    """Fill each engine's pool with open connections ahead of traffic"""
+    engines = {id(e): e for e in (engine, read_engine, *read_replicas.engines)}
+    for pooled in engines.values():
+        size = getattr(pooled.pool, "size", lambda: 1)()
+        async with AsyncExitStack() as stack:
+            for _ in range(size):
+                await stack.enter_async_context(pooled.connect())
 
 
 async def close_db() -> None:
     """Close database connections"""
     await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
+    for replica in read_replicas.engines:
+        await replica.dispose()
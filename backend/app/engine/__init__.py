@@ -0,0 +1,30 @@
+"""Server-side snake simulation"""
+from .batch import GameBatch
+from .rules import (
+    FOOD_SCORE,
+    GRID_SIZE,
+    GameState,
+    change_direction,
+    check_collision,
+    create_initial_state,
+    generate_food,
+    get_next_head_position,
+    state_update,
+    update_game,
+)
+from .scheduler import TickScheduler
+
+__all__ = [
+    "FOOD_SCORE",
+    "GRID_SIZE",
+    "GameState",
+    "change_direction",
+    "check_collision",
+    "create_initial_state",
+    "generate_food",
+    "get_next_head_position",
+    "state_update",
+    "update_game",
+    "GameBatch",
+    "TickScheduler",
+]
@@ -0,0 +1,198 @@
+"""Many games stepped together"""
+import random
+from array import array
+
+from .rules import FOOD_SCORE, GRID_SIZE, OPPOSITES, STEPS, Cell, Direction, GameMode, GameState
+
+CELLS = GRID_SIZE * GRID_SIZE
+# A snake can never be longer than the grid, so a ring of CELLS never overflows
+RING = CELLS
+OCCUPANCY_BYTES = (CELLS + 7) // 8
+
+DIRECTIONS: tuple[Direction, ...] = ("UP", "DOWN", "LEFT", "RIGHT")
+DIRECTION_CODES = {direction: code for code, direction in enumerate(DIRECTIONS)}
+MODES: tuple[GameMode, ...] = ("walls", "pass-through")
+MODE_CODES = {mode: code for code, mode in enumerate(MODES)}
+
+
+def _next_cells(wrap: bool, direction: Direction) -> array:
+    """Cell after each cell moving in ``direction``, or -1 for a wall"""
+    dx, dy = STEPS[direction]
+    table = array("h")
+    for cell in range(CELLS):
+        x, y = cell % GRID_SIZE + dx, cell // GRID_SIZE + dy
+        if wrap:
+            x %= GRID_SIZE
+            y %= GRID_SIZE
+        elif not (0 <= x < GRID_SIZE and 0 <= y < GRID_SIZE):
+            table.append(-1)
+            continue
+        table.append(y * GRID_SIZE + x)
+    return table
+
+
+# _NEXT[mode code][direction code][cell]
+_NEXT = [[_next_cells(mode == "pass-through", d) for d in DIRECTIONS] for mode in MODES]
+# 1 << n and its complement for each bit of an occupancy byte
+_BIT = bytes(1 << n for n in range(8))
+_CLEAR = bytes(~(1 << n) & 0xFF for n in range(8))
+
+
+class GameBatch:
+    """State of up to ``capacity`` games in flat arrays, one slot per game.
+
+    Every field is a separate array indexed by slot (struct of arrays), so a
+    tick is one pass over the live slots with no per-game objects. Cells
+    are ``y * GRID_SIZE + x``. Each snake lives in its own ``RING``-cell
+    span of ``body`` as a ring buffer: moving writes the new head before
+    the old one and forgets the tail, so a step costs the same at any
+    length. A per-game occupancy bitset makes self-collision one bit test.
+
+    The rules are those of ``rules.update_game``; given the same random
+    source, a game produces the same states in both.
+    """
+
+    def __init__(self, capacity: int, rng: random.Random | None = None):
+        self.capacity = capacity
+        self.rng = rng or random.Random()
+        self.mode = bytearray(capacity)
+        self.direction = bytearray(capacity)
+        self.score = array("l", bytes(array("l").itemsize * capacity))
+        self.food = array("h", bytes(2 * capacity))
+        self.head = array("H", bytes(2 * capacity))
+        self.length = array("H", bytes(2 * capacity))
+        self.game_over = bytearray(capacity)
+        self.body = array("H", bytes(2 * capacity * RING))
+        self.occupied = bytearray(capacity * OCCUPANCY_BYTES)
+        self._free = list(range(capacity - 1, -1, -1))
+        self._live: list[int] = []
+
+    def __len__(self) -> int:
+        """Games held, finished or not"""
+        return self.capacity - len(self._free)
+
+    @property
+    def live_count(self) -> int:
+        return len(self._live)
+
+    def add_game(
+        self,
+        mode: GameMode = "walls",
+        snake: list[Cell] | None = None,
+        food: Cell | None = None,
+        direction: Direction = "RIGHT",
+        score: int = 0,
+    ) -> int:
+        """Start a game and return its slot; IndexError when full.
+
+        Defaults to the initial state of ``rules.create_initial_state``,
+        with food placed off the snake.
+        """
+        if not self._free:
+            raise IndexError("GameBatch is full")
+        if snake is None:
+            snake = [(10, 10), (9, 10), (8, 10)]
+        slot = self._free.pop()
+
+        self.mode[slot] = MODE_CODES[mode]
+        self.direction[slot] = DIRECTION_CODES[direction]
+        self.score[slot] = score
+        self.game_over[slot] = 0
+        self.head[slot] = 0
+        self.length[slot] = len(snake)
+        base = slot * RING
+        occupied = self.occupied
+        offset = slot * OCCUPANCY_BYTES
+        occupied[offset:offset + OCCUPANCY_BYTES] = bytes(OCCUPANCY_BYTES)
+        for i, (x, y) in enumerate(snake):
+            cell = y * GRID_SIZE + x
+            self.body[base + i] = cell
+            occupied[offset + (cell >> 3)] |= 1 << (cell & 7)
+        self.food[slot] = food[1] * GRID_SIZE + food[0] if food is not None else self._place_food(slot)
+
+        self._live.append(slot)
+        return slot
+
+    def remove_game(self, slot: int) -> None:
+        """Free a slot for reuse"""
+        if not self.game_over[slot]:
+            self._live.remove(slot)
+        self.game_over[slot] = 1
+        self._free.append(slot)
+
+    def change_direction(self, slot: int, direction: Direction) -> None:
+        """Turn a snake for the next tick; reversing onto itself is ignored"""
+        current = DIRECTIONS[self.direction[slot]]
+        if OPPOSITES[current] != direction:
+            self.direction[slot] = DIRECTION_CODES[direction]
+
+    def state(self, slot: int) -> GameState:
+        """One game as a ``rules.GameState``"""
+        body, base, head = self.body, slot * RING, self.head[slot]
+        snake = []
+        for i in range(self.length[slot]):
+            cell = body[base + (head + i) % RING]
+            snake.append((cell % GRID_SIZE, cell // GRID_SIZE))
+        food = self.food[slot]
+        return GameState(
+            snake=snake,
+            food=(food % GRID_SIZE, food // GRID_SIZE),
+            direction=DIRECTIONS[self.direction[slot]],
+            score=self.score[slot],
+            is_game_over=bool(self.game_over[slot]),
+            mode=MODES[self.mode[slot]],
+        )
+
+    def _place_food(self, slot: int) -> int:
+        # Same draws as rules.generate_food: x, then y, until a free cell
+        rand = self.rng.random
+        occupied, offset = self.occupied, slot * OCCUPANCY_BYTES
+        while True:
+            cell = int(rand() * GRID_SIZE) + int(rand() * GRID_SIZE) * GRID_SIZE
+            if not occupied[offset + (cell >> 3)] >> (cell & 7) & 1:
+                return cell
+
+    def step(self) -> list[int]:
+        """Advance every live game one tick; returns the slots that ended"""
+        mode, direction, food, head, length, score, game_over = (
+            self.mode, self.direction, self.food, self.head, self.length, self.score, self.game_over
+        )
+        body, occupied = self.body, self.occupied
+        survivors: list[int] = []
+        ended: list[int] = []
+        keep, end = survivors.append, ended.append
+
+        for slot in self._live:
+            base = slot * RING
+            h = head[slot]
+            cell = _NEXT[mode[slot]][direction[slot]][body[base + h]]
+            byte = slot * OCCUPANCY_BYTES + (cell >> 3)
+            bit = _BIT[cell & 7]
+            # The current tail counts, as in rules.check_collision
+            if cell < 0 or occupied[byte] & bit:
+                game_over[slot] = 1
+                end(slot)
+                continue
+
+            h = h - 1 if h else RING - 1
+            head[slot] = h
+            body[base + h] = cell
+            occupied[byte] |= bit
+
+            n = length[slot]
+            if cell == food[slot]:
+                length[slot] = n + 1
+                score[slot] += FOOD_SCORE
+                if n + 1 == CELLS:
+                    game_over[slot] = 1
+                    end(slot)
+                    continue
+                food[slot] = self._place_food(slot)
+            else:
+                t = h + n
+                tail = body[base + (t - RING if t >= RING else t)]
+                occupied[slot * OCCUPANCY_BYTES + (tail >> 3)] &= _CLEAR[tail & 7]
+            keep(slot)
+
+        self._live = survivors
+        return ended
@@ -0,0 +1,122 @@
+"""Snake game rules.
+
+A direct port of ``frontend/src/lib/gameEngine.ts``, kept function for
+function so the two can be compared side by side. Positions are ``(x, y)``
+tuples; a head may leave the grid in walls mode, which is what ends the
+game. ``GameBatch`` implements the same rules for many games at once.
+"""
+import random
+from dataclasses import dataclass, replace
+from typing import Literal
+
+from app.schemas import PlayerStateUpdate
+
+Cell = tuple[int, int]
+Direction = Literal["UP", "DOWN", "LEFT", "RIGHT"]
+GameMode = Literal["walls", "pass-through"]
+
+GRID_SIZE = 20
+FOOD_SCORE = 10
+
+STEPS: dict[str, Cell] = {"UP": (0, -1), "DOWN": (0, 1), "LEFT": (-1, 0), "RIGHT": (1, 0)}
+OPPOSITES: dict[str, str] = {"UP": "DOWN", "DOWN": "UP", "LEFT": "RIGHT", "RIGHT": "LEFT"}
+
+
+@dataclass(frozen=True)
+class GameState:
+    """One game, snake head first"""
+    snake: list[Cell]
+    food: Cell
+    direction: Direction
+    score: int
+    is_game_over: bool
+    mode: GameMode
+
+
+def create_initial_state(mode: GameMode = "walls", rng: random.Random | None = None) -> GameState:
+    return GameState(
+        snake=[(10, 10), (9, 10), (8, 10)],
+        food=generate_food([(10, 10)], rng),
+        direction="RIGHT",
+        score=0,
+        is_game_over=False,
+        mode=mode,
+    )
+
+
+def generate_food(snake: list[Cell], rng: random.Random | None = None) -> Cell:
+    """A random cell not on the snake"""
+    rand = (rng or random).random
+    occupied = set(snake)
+    while True:
+        food = (int(rand() * GRID_SIZE), int(rand() * GRID_SIZE))
+        if food not in occupied:
+            return food
+
+
+def get_next_head_position(head: Cell, direction: Direction, mode: GameMode) -> Cell:
+    dx, dy = STEPS[direction]
+    x, y = head[0] + dx, head[1] + dy
+
+    # Pass-through mode wraps around edges
+    if mode == "pass-through":
+        x %= GRID_SIZE
+        y %= GRID_SIZE
+    return (x, y)
+
+
+def check_collision(head: Cell, snake: list[Cell], mode: GameMode) -> bool:
+    # Wall collision only in walls mode
+    if mode == "walls" and not (0 <= head[0] < GRID_SIZE and 0 <= head[1] < GRID_SIZE):
+        return True
+
+    # Self collision, against the body as it was before this move
+    return head in snake[1:]
+
+
+def update_game(state: GameState, rng: random.Random | None = None) -> GameState:
+    """Advance one tick"""
+    if state.is_game_over:
+        return state
+
+    new_head = get_next_head_position(state.snake[0], state.direction, state.mode)
+
+    # Check collision before moving
+    if check_collision(new_head, state.snake, state.mode):
+        return replace(state, is_game_over=True)
+
+    new_snake = [new_head, *state.snake]
+
+    if new_head == state.food:
+        if len(new_snake) == GRID_SIZE * GRID_SIZE:
+            # No free cell left for food: the game is won, which ends it
+            return replace(
+                state, snake=new_snake, score=state.score + FOOD_SCORE, is_game_over=True
+            )
+        return replace(
+            state,
+            snake=new_snake,
+            food=generate_food(new_snake, rng),
+            score=state.score + FOOD_SCORE,
+        )
+
+    # Remove tail if no food eaten
+    new_snake.pop()
+    return replace(state, snake=new_snake)
+
+
+def change_direction(current: Direction, new: Direction) -> Direction:
+    """The new direction, unless it would reverse the snake"""
+    return current if OPPOSITES[current] == new else new
+
+
+def state_update(state: GameState) -> PlayerStateUpdate:
+    """The spectate state report for a game"""
+    return PlayerStateUpdate(
+        mode=state.mode,
+        score=state.score,
+        snake=[{"x": x, "y": y} for x, y in state.snake],
+        food={"x": state.food[0], "y": state.food[1]},
+        direction=state.direction,
+        is_game_over=state.is_game_over,
+    )
@@ -0,0 +1,73 @@
+"""Fixed-rate tick loop for a game batch"""
+import asyncio
+import logging
+import time
+from collections.abc import Callable
+
+from .batch import GameBatch
+
+logger = logging.getLogger(__name__)
+
+
+class TickScheduler:
+    """Steps every game of a ``GameBatch`` once per ``tick_interval``.
+
+    One task drives all games, so the event loop wakes once per tick no
+    matter how many games run. Ticks are scheduled against a fixed
+    timeline; when a step overruns, the missed ticks are skipped rather
+    than run back to back, and counted in ``overruns``. ``on_tick`` is
+    called after each step with the slots whose game ended.
+    """
+
+    def __init__(
+        self,
+        batch: GameBatch,
+        tick_interval: float,
+        on_tick: Callable[[list[int]], None] | None = None,
+    ):
+        self.batch = batch
+        self.tick_interval = tick_interval
+        self.on_tick = on_tick
+        self.ticks = 0
+        self.game_ticks = 0
+        self.overruns = 0
+        self.busy_seconds = 0.0
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="game-ticks")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def tick(self) -> list[int]:
+        """Step every live game once"""
+        started = time.perf_counter()
+        self.game_ticks += self.batch.live_count
+        ended = self.batch.step()
+        self.ticks += 1
+        if self.on_tick is not None:
+            self.on_tick(ended)
+        self.busy_seconds += time.perf_counter() - started
+        return ended
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            try:
+                self.tick()
+            except Exception:
+                logger.exception("Game tick failed")
+
+            next_tick += self.tick_interval
+            now = loop.time()
+            if next_tick < now:
+                missed = int((now - next_tick) / self.tick_interval) + 1
+                self.overruns += missed
+                next_tick += missed * self.tick_interval
+            await asyncio.sleep(next_tick - now)
@@ -0,0 +1,270 @@
+"""Cache invalidation shared between worker processes"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import tempfile
+import uuid
+from collections import defaultdict
+from collections.abc import Callable
+from pathlib import Path
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Topics
+TOKEN_REVOKED = "token_revoked"  # fingerprint (hex), expires_at (epoch seconds)
+USER_CHANGED = "user_changed"  # user_id
+READS_PINNED = "reads_pinned"  # client (see database.client_key)
+SCORE_ADDED = "score_added"  # user_id, mode
+PLAYER_STATE = "player_state"  # a live game's full state (see PlayerRecord.message)
+# Local only: messages from other workers may have been lost, so state kept
+# in sync by the bus should be reloaded from the database
+BUS_RESET = "bus_reset"
+
+Handler = Callable[[dict], None]
+
+
+class InvalidationBus:
+    """Tells every worker process that some cached state is stale.
+
+    ``publish`` runs this process's handlers for the topic at once, then
+    forwards the message to the other workers, whose handlers run when it
+    arrives. Messages are small JSON objects and delivery is best effort:
+    caches that depend on the bus must also expire on their own. Each
+    worker numbers its messages, so a receiver that sees a gap (a dropped
+    datagram, a failed ``NOTIFY``) dispatches ``BUS_RESET`` locally. This
+    base class only delivers locally, which is all a single worker needs.
+    """
+
+    # Whether other processes share this bus
+    shared = False
+
+    def __init__(self):
+        self.origin = uuid.uuid4().hex[:12]
+        self._handlers: defaultdict[str, list[Handler]] = defaultdict(list)
+        self._last_seq: dict[str, int] = {}
+        self.sent = 0
+        self.received = 0
+        self.resets = 0
+
+    def subscribe(self, topic: str, handler: Handler) -> None:
+        """Call ``handler(message)`` for every message on ``topic``"""
+        self._handlers[topic].append(handler)
+
+    def publish(self, topic: str, **data) -> None:
+        """Invalidate in this process now and in every other worker soon"""
+        message = {"topic": topic, **data}
+        self._dispatch(message)
+        self._forward(message)
+
+    @property
+    def healthy(self) -> bool:
+        """Whether messages from other workers can currently arrive"""
+        return True
+
+    def send(self, topic: str, **data) -> None:
+        """Tell the other workers only; this process has applied the change"""
+        if self.shared:
+            self._forward({"topic": topic, **data})
+
+    def _forward(self, message: dict) -> None:
+        self.sent += 1
+        payload = json.dumps({**message, "origin": self.origin, "seq": self.sent}, separators=(",", ":"))
+        self._send(payload.encode())
+
+    def _reset(self) -> None:
+        self.resets += 1
+        self._dispatch({"topic": BUS_RESET})
+
+    def _send(self, payload: bytes) -> None:
+        pass
+
+    def _receive(self, payload: bytes | str) -> None:
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            logger.warning("Dropped a malformed invalidation message")
+            return
+        origin, seq = message.pop("origin", None), message.pop("seq", None)
+        if origin == self.origin:
+            return
+        self.received += 1
+        if seq is not None:
+            last = self._last_seq.get(origin)
+            self._last_seq[origin] = seq
+            if last is not None and seq != last + 1:
+                self._reset()
+        self._dispatch(message)
+
+    def _dispatch(self, message: dict) -> None:
+        for handler in self._handlers.get(message.get("topic"), ()):
+            try:
+                handler(message)
+            except Exception:
+                logger.exception("Invalidation handler failed for %s", message.get("topic"))
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+
+class UnixDatagramBus(InvalidationBus):
+    """Workers on one host, each bound to a datagram socket in ``directory``.
+
+    A message is one ``sendto`` per peer socket found in the directory; no
+    broker and no connection state. Sockets left behind by dead workers
+    refuse the datagram and are removed.
+    """
+
+    shared = True
+
+    def __init__(self, directory: str | Path):
+        super().__init__()
+        self.directory = Path(directory)
+        self.path = self.directory / f"{os.getpid()}-{self.origin}.sock"
+        self._sock: socket.socket | None = None
+
+    async def start(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.setblocking(False)
+        sock.bind(str(self.path))
+        self._sock = sock
+        asyncio.get_running_loop().add_reader(sock.fileno(), self._on_readable)
+
+    async def stop(self) -> None:
+        if self._sock is None:
+            return
+        asyncio.get_running_loop().remove_reader(self._sock.fileno())
+        self._sock.close()
+        self._sock = None
+        self.path.unlink(missing_ok=True)
+
+    def _on_readable(self) -> None:
+        while self._sock is not None:
+            try:
+                payload = self._sock.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                return
+            self._receive(payload)
+
+    def _send(self, payload: bytes) -> None:
+        if self._sock is None:
+            return
+        for peer in self.directory.glob("*.sock"):
+            if peer == self.path:
+                continue
+            try:
+                self._sock.sendto(payload, str(peer))
+            except (ConnectionRefusedError, FileNotFoundError):
+                peer.unlink(missing_ok=True)
+            except BlockingIOError:
+                logger.warning("Invalidation bus peer %s is not reading; message dropped", peer.name)
+
+
+class PostgresBus(InvalidationBus):
+    """Workers on any host, over Postgres ``LISTEN`` / ``NOTIFY``.
+
+    Holds one dedicated asyncpg connection that listens on ``channel`` and
+    sends notifications. Postgres echoes a notification to its sender,
+    which skips messages carrying its own origin. A lost connection is
+    re-established in the background; messages published meanwhile are
+    only applied locally. ``BUS_RESET`` is dispatched when the connection
+    drops and again once it is back, since messages from others were
+    missed meanwhile.
+    """
+
+    shared = True
+
+    def __init__(self, dsn: str, channel: str = "cache_invalidation", retry_interval: float = 1.0):
+        super().__init__()
+        self.dsn = dsn
+        self.channel = channel
+        self.retry_interval = retry_interval
+        self._conn = None
+        self._reconnecting = False
+        self._task: asyncio.Task | None = None
+        self._pending: set[asyncio.Task] = set()
+
+    @property
+    def healthy(self) -> bool:
+        return self._conn is not None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._connect(), name="invalidation-bus")
+
+    async def stop(self) -> None:
+        for task in (self._task, *self._pending):
+            if task is not None:
+                task.cancel()
+        await asyncio.gather(*(t for t in (self._task, *self._pending) if t), return_exceptions=True)
+        self._task = None
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+    async def _connect(self) -> None:
+        import asyncpg
+
+        while True:
+            try:
+                conn = await asyncpg.connect(self.dsn)
+                await conn.add_listener(self.channel, self._on_notify)
+            except (OSError, asyncpg.PostgresError) as e:
+                logger.warning("Invalidation bus cannot reach Postgres: %s", e)
+                await asyncio.sleep(self.retry_interval)
+                continue
+            conn.add_termination_listener(self._on_terminated)
+            reconnected, self._conn = self._reconnecting, conn
+            if reconnected:
+                self._reset()
+            return
+
+    def _on_notify(self, conn, pid: int, channel: str, payload: str) -> None:
+        self._receive(payload)
+
+    def _on_terminated(self, conn) -> None:
+        logger.warning("Invalidation bus lost its Postgres connection; reconnecting")
+        self._conn = None
+        self._reconnecting = True
+        self._reset()
+        self._task = asyncio.create_task(self._connect(), name="invalidation-bus")
+
+    def _send(self, payload: bytes) -> None:
+        if self._conn is None:
+            return
+        task = asyncio.create_task(self._notify(self._conn, payload.decode()))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _notify(self, conn, payload: str) -> None:
+        try:
+            await conn.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+        except Exception as e:
+            logger.warning("Invalidation message not sent: %s", e)
+
+
+def create_invalidation_bus() -> InvalidationBus:
+    """The bus selected by ``settings.invalidation_bus``"""
+    kind = settings.invalidation_bus
+    if kind == "auto":
+        kind = "unix" if settings.web_concurrency > 1 else "local"
+    if kind == "unix":
+        directory = settings.invalidation_socket_dir or Path(tempfile.gettempdir()) / "snake-arena-bus"
+        return UnixDatagramBus(directory)
+    if kind == "postgres":
+        if settings.is_sqlite:
+            raise ValueError("INVALIDATION_BUS=postgres needs a Postgres DATABASE_URL")
+        return PostgresBus(settings.database_url.replace("+asyncpg", ""))
+    if settings.web_concurrency > 1:
+        # Workers would serve stale caches, revoked tokens and only their own live games
+        raise ValueError("WEB_CONCURRENCY above 1 needs INVALIDATION_BUS=unix or postgres")
+    return InvalidationBus()
+
+
+invalidation_bus = create_invalidation_bus()
@@ -9,8 +9,10 @@ from sqlalchemy import (
     ForeignKey,
     Index,
     Integer,
+    LargeBinary,
     String,
-    Text,
+    desc,
+    text,
 )
 from sqlalchemy.dialects.postgresql import JSON as PGJSON
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
@@ -41,10 +43,7 @@ class User(Base):
         cascade="all, delete-orphan"
     )
 
-    __table_args__ = (
-        Index("idx_username", "username"),
-        Index("idx_email", "email"),
-    )
+    # Lookups by username and email use the unique constraints' indexes
 
 
 class LeaderboardEntry(Base):
@@ -69,9 +68,12 @@ class LeaderboardEntry(Base):
     # Relationship to user
     user: Mapped["User"] = relationship(back_populates="leaderboard_entries")
 
+    # Each index matches a query in crud.leaderboard column for column, so
+    # ORDER BY score DESC, timestamp is read off the index without a sort
     __table_args__ = (
-        Index("idx_score_desc", "score", postgresql_ops={"score": "DESC"}),
-        Index("idx_mode_score", "mode", "score", postgresql_ops={"score": "DESC"}),
+        Index("idx_leaderboard_rank", desc("score"), "timestamp"),
+        Index("idx_leaderboard_mode_rank", "mode", desc("score"), "timestamp"),
+        Index("idx_leaderboard_user_rank", "user_id", desc("score"), "timestamp"),
         Index("idx_timestamp", "timestamp"),
         CheckConstraint("mode IN ('walls', 'pass-through')", name="check_mode"),
     )
@@ -94,20 +96,43 @@ class ActivePlayer(Base):
         nullable=False,
         default=lambda: datetime.now(timezone.utc)
     )
+    last_seen_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc)
+    )
 
     __table_args__ = (
-        Index("idx_game_over", "is_game_over"),
+        # Finished games, for the cleanup sweep; live rows stay out of the index
+        Index(
+            "idx_active_finished",
+            "is_game_over",
+            sqlite_where=text("is_game_over = 1"),
+            postgresql_where=text("is_game_over = true"),
+        ),
+        # Only live games are swept by age; finished rows stay out of the index
+        Index(
+            "idx_live_last_seen",
+            "last_seen_at",
+            sqlite_where=text("is_game_over = 0"),
+            postgresql_where=text("is_game_over = false"),
+        ),
         CheckConstraint("mode IN ('walls', 'pass-through')", name="check_active_mode"),
         CheckConstraint("direction IN ('UP', 'DOWN', 'LEFT', 'RIGHT')", name="check_direction"),
     )
 
 
 class TokenBlacklist(Base):
-    """Token blacklist database model."""
+    """Token blacklist database model.
+
+    Revoked tokens are keyed by a 32-byte SHA-256 digest of their ``jti``
+    claim (or of the whole token for legacy tokens issued without one), so
+    the primary key is the only index needed for lookups. ``blacklisted_at``
+    is indexed for the workers' periodic re-reads of recent revocations.
+    """
     __tablename__ = "token_blacklist"
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    token: Mapped[str] = mapped_column(Text, unique=True, nullable=False)
+    token_hash: Mapped[bytes] = mapped_column(LargeBinary(32), primary_key=True)
     blacklisted_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         nullable=False,
@@ -116,6 +141,17 @@ class TokenBlacklist(Base):
     expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
 
     __table_args__ = (
-        Index("idx_token", "token"),
         Index("idx_expires", "expires_at"),
+        Index("idx_blacklisted_at", "blacklisted_at"),
+        # SQLite: store rows in the primary-key B-tree, no separate rowid table
+        {"sqlite_with_rowid": False},
     )
+
+
+class JobLease(Base):
+    """Leader lease for a background job, shared by every worker."""
+    __tablename__ = "job_leases"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    owner: Mapped[str] = mapped_column(String(100), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
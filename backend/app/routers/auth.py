@@ -4,11 +4,12 @@ from datetime import datetime, timedelta, timezone
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import crud
 from app.config import settings
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.schemas import (
     ErrorResponse,
     LoginRequest,
@@ -17,11 +18,14 @@ from app.schemas import (
     User,
 )
 from app.utils import (
-    CurrentUser,
+    CurrentUserFromClaims,
     create_access_token,
     decode_access_token,
-    get_password_hash,
-    verify_password,
+    get_password_hash_async,
+    revoke_token,
+    user_cache,
+    user_token_claims,
+    verify_password_async,
 )
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
@@ -33,28 +37,39 @@ security = HTTPBearer()
     response_model=TokenResponse,
     responses={
         401: {"model": ErrorResponse, "description": "Invalid credentials"},
+        503: {"model": ErrorResponse, "description": "Authentication service busy"},
     }
 )
-async def login(request: LoginRequest, db: AsyncSession = Depends(get_db)):
+async def login(
+    request: LoginRequest,
+    db: AsyncSession = Depends(get_db, scope="function"),
+    read_db: AsyncSession = Depends(get_read_db, scope="function"),
+):
     """Authenticate a user with email and password"""
-    # Get user by email
-    user_in_db = await crud.users.get_user_by_email(db, request.email)
+    # Get user by email; a lagging replica may not have a new user yet, so
+    # misses are checked on the primary
+    user_in_db = await crud.users.get_user_by_email(read_db, request.email)
+    if user_in_db is None:
+        user_in_db = await crud.users.get_user_by_email(db, request.email)
     
-    if not user_in_db or not verify_password(request.password, user_in_db.hashed_password):
+    if not user_in_db or not await verify_password_async(
+        request.password, user_in_db.hashed_password
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password",
         )
     
-    # Create access token
-    access_token = create_access_token(data={"sub": user_in_db.id})
-    
     user = User(
         id=user_in_db.id,
         username=user_in_db.username,
         email=user_in_db.email,
         created_at=user_in_db.created_at
     )
+    user_cache.set(user.id, user)
+    
+    # Create access token
+    access_token = create_access_token(data=user_token_claims(user))
     
     return TokenResponse(user=user, token=access_token)
 
@@ -65,12 +80,18 @@ async def login(request: LoginRequest, db: AsyncSession = Depends(get_db)):
     status_code=status.HTTP_201_CREATED,
     responses={
         409: {"model": ErrorResponse, "description": "User already exists"},
+        503: {"model": ErrorResponse, "description": "Authentication service busy"},
     }
 )
-async def signup(request: SignupRequest, db: AsyncSession = Depends(get_db)):
+async def signup(
+    request: SignupRequest,
+    db: AsyncSession = Depends(get_db, scope="function"),
+    read_db: AsyncSession = Depends(get_read_db, scope="function"),
+):
     """Create a new user account"""
-    # Check if user already exists
-    existing_user = await crud.users.get_user_by_email(db, request.email)
+    # Check if user already exists; hashing below must not hold the writer.
+    # A lagging replica can miss a new user, which the insert catches
+    existing_user = await crud.users.get_user_by_email(read_db, request.email)
     
     if existing_user:
         raise HTTPException(
@@ -80,18 +101,22 @@ async def signup(request: SignupRequest, db: AsyncSession = Depends(get_db)):
     
     # Create new user
     user_id = str(uuid.uuid4())
-    hashed_password = get_password_hash(request.password)
-    
-    new_user = await crud.users.create_user(
-        db,
-        user_id=user_id,
-        username=request.username,
-        email=request.email,
-        hashed_password=hashed_password,
-    )
+    hashed_password = await get_password_hash_async(request.password)
     
-    # Create access token
-    access_token = create_access_token(data={"sub": user_id})
+    try:
+        new_user = await crud.users.create_user(
+            db,
+            user_id=user_id,
+            username=request.username,
+            email=request.email,
+            hashed_password=hashed_password,
+        )
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="User already exists",
+        )
     
     user = User(
         id=new_user.id,
@@ -99,6 +124,10 @@ async def signup(request: SignupRequest, db: AsyncSession = Depends(get_db)):
         email=new_user.email,
         created_at=new_user.created_at
     )
+    user_cache.set(user.id, user)
+    
+    # Create access token
+    access_token = create_access_token(data=user_token_claims(user))
     
     return TokenResponse(user=user, token=access_token)
 
@@ -112,7 +141,7 @@ async def signup(request: SignupRequest, db: AsyncSession = Depends(get_db)):
 )
 async def logout(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_db, scope="function"),
 ):
     """Invalidate the current user session"""
     token = credentials.credentials
@@ -135,7 +164,7 @@ async def logout(
         )
     
     # Add token to blacklist
-    await crud.token_blacklist.blacklist_token(db, token, expires_at)
+    await revoke_token(db, token, payload, expires_at)
     
     return {"message": "Logged out successfully"}
 
@@ -147,6 +176,6 @@ async def logout(
         401: {"model": ErrorResponse, "description": "Unauthorized"},
     }
 )
-async def get_me(current_user: CurrentUser):
+async def get_me(current_user: CurrentUserFromClaims):
     """Get currently authenticated user's information"""
     return current_user
@@ -1,11 +1,12 @@
 """Leaderboard router"""
 from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import crud
-from app.database import get_db
+from app.database import get_db, get_pinned_read_db, pin_reads_to_primary
+from app.invalidation import SCORE_ADDED, invalidation_bus
 from app.schemas import (
     ErrorResponse,
     LeaderboardEntry,
@@ -13,41 +14,67 @@ from app.schemas import (
     SubmitScoreRequest,
 )
 from app.utils import CurrentUser
+from app.utils.cache import leaderboard_cache, top_scores_cache, user_scores_cache
 
 router = APIRouter(prefix="/leaderboard", tags=["Leaderboard"])
 
+Mode = Literal["walls", "pass-through"]
+
+
+def to_entry(e) -> LeaderboardEntry:
+    return LeaderboardEntry(
+        id=str(e.id),
+        user_id=e.user_id,
+        username=e.username,
+        score=e.score,
+        mode=e.mode,
+        timestamp=e.timestamp
+    )
+
+
+async def leaderboard_page(
+    mode: Mode | None, limit: int, offset: int, pinned: AsyncSession | None = None
+) -> LeaderboardResponse:
+    """One leaderboard page, cached and shared between concurrent requests"""
+    async def load(db: AsyncSession) -> LeaderboardResponse:
+        entries, total = await crud.leaderboard.get_leaderboard(
+            db, mode=mode, limit=limit, offset=offset
+        )
+        return LeaderboardResponse(
+            entries=[to_entry(e) for e in entries],
+            total=total,
+            limit=limit,
+            offset=offset
+        )
+
+    return await leaderboard_cache.get((mode, limit, offset), load, pinned)
+
+
+async def top_scores(
+    mode: Mode | None, limit: int, pinned: AsyncSession | None = None
+) -> list[LeaderboardEntry]:
+    """The top ``limit`` scores, cached and shared between concurrent requests"""
+    async def load(db: AsyncSession) -> list[LeaderboardEntry]:
+        entries, _ = await crud.leaderboard.get_leaderboard(
+            db, mode=mode, limit=limit, offset=0
+        )
+        return [to_entry(e) for e in entries]
+
+    return await top_scores_cache.get((mode, limit), load, pinned)
+
 
 @router.get(
     "",
     response_model=LeaderboardResponse,
 )
 async def get_leaderboard(
-    mode: Literal["walls", "pass-through"] | None = Query(None, description="Filter by game mode"),
+    mode: Mode | None = Query(None, description="Filter by game mode"),
     limit: int = Query(20, ge=1, le=100, description="Maximum entries to return"),
     offset: int = Query(0, ge=0, description="Number of entries to skip"),
-    db: AsyncSession = Depends(get_db),
+    pinned: AsyncSession | None = Depends(get_pinned_read_db, scope="function"),
 ):
     """Get full leaderboard with filtering and pagination"""
-    entries, total = await crud.leaderboard.get_leaderboard(
-        db, mode=mode, limit=limit, offset=offset
-    )
-    
-    return LeaderboardResponse(
-        entries=[
-            LeaderboardEntry(
-                id=str(e.id),
-                user_id=e.user_id,
-                username=e.username,
-                score=e.score,
-                mode=e.mode,
-                timestamp=e.timestamp
-            )
-            for e in entries
-        ],
-        total=total,
-        limit=limit,
-        offset=offset
-    )
+    return await leaderboard_page(mode, limit, offset, pinned)
 
 
 @router.get(
@@ -56,25 +83,11 @@ async def get_leaderboard(
 )
 async def get_top_scores(
     limit: int = Query(10, ge=1, le=100, description="Number of top scores"),
-    mode: Literal["walls", "pass-through"] | None = Query(None, description="Filter by game mode"),
-    db: AsyncSession = Depends(get_db),
+    mode: Mode | None = Query(None, description="Filter by game mode"),
+    pinned: AsyncSession | None = Depends(get_pinned_read_db, scope="function"),
 ):
     """Get top N scores from the leaderboard"""
-    entries, _ = await crud.leaderboard.get_leaderboard(
-        db, mode=mode, limit=limit, offset=0
-    )
-    
-    return [
-        LeaderboardEntry(
-            id=str(e.id),
-            user_id=e.user_id,
-            username=e.username,
-            score=e.score,
-            mode=e.mode,
-            timestamp=e.timestamp
-        )
-        for e in entries
-    ]
+    return await top_scores(mode, limit, pinned)
 
 
 @router.post(
@@ -88,7 +101,8 @@ async def get_top_scores(
 async def submit_score(
     request: SubmitScoreRequest,
     current_user: CurrentUser,
-    db: AsyncSession = Depends(get_db),
+    http_request: Request,
+    db: AsyncSession = Depends(get_db, scope="function"),
 ):
     """Submit a new score to the leaderboard"""
     new_entry = await crud.leaderboard.add_score(
@@ -98,15 +112,12 @@ async def submit_score(
         score=request.score,
         mode=request.mode,
     )
-    
-    return LeaderboardEntry(
-        id=str(new_entry.id),
-        user_id=new_entry.user_id,
-        username=new_entry.username,
-        score=new_entry.score,
-        mode=new_entry.mode,
-        timestamp=new_entry.timestamp
-    )
+    # Drop cached leaderboards and the player's cached scores on every worker
+    invalidation_bus.publish(SCORE_ADDED, user_id=current_user.id, mode=request.mode)
+    # Replicas may lag: let the player see their score on the next read
+    pin_reads_to_primary(http_request)
+
+    return to_entry(new_entry)
 
 
 @router.get(
@@ -118,29 +129,21 @@ async def submit_score(
 )
 async def get_user_scores(
     user_id: str,
-    mode: Literal["walls", "pass-through"] | None = Query(None, description="Filter by game mode"),
-    db: AsyncSession = Depends(get_db),
+    mode: Mode | None = Query(None, description="Filter by game mode"),
+    pinned: AsyncSession | None = Depends(get_pinned_read_db, scope="function"),
 ):
     """Get all scores for a specific user"""
-    # Check if user exists
-    user = await crud.users.get_user_by_id(db, user_id)
-    
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found",
-        )
-    
-    entries = await crud.leaderboard.get_user_scores(db, user_id, mode=mode)
-    
-    return [
-        LeaderboardEntry(
-            id=str(e.id),
-            user_id=e.user_id,
-            username=e.username,
-            score=e.score,
-            mode=e.mode,
-            timestamp=e.timestamp
-        )
-        for e in entries
-    ]
+    async def load(db: AsyncSession) -> list[LeaderboardEntry]:
+        # Check if user exists
+        user = await crud.users.get_user_by_id(db, user_id)
+
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found",
+            )
+
+        entries = await crud.leaderboard.get_user_scores(db, user_id, mode=mode)
+        return [to_entry(e) for e in entries]
+
+    return await user_scores_cache.get((user_id, mode), load, pinned)
@@ -1,68 +1,228 @@
 """Spectate router"""
 from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import crud
-from app.database import get_db
-from app.schemas import ActivePlayer, ErrorResponse
+from app.database import get_db, get_pinned_read_db
+from app.schemas import (
+    ActivePlayer,
+    ErrorResponse,
+    PlayerStateUpdate,
+    StreamSubscriberMetrics,
+)
+from app.services import spectate_hub
+from app.utils import CurrentUser, codec
+from app.utils.cache import active_players_cache, watched_player_cache
 
 router = APIRouter(prefix="/spectate", tags=["Spectate"])
 
+BINARY_RESPONSE = {
+    "content": {codec.MEDIA_TYPE: {}},
+    "description": "JSON, or the packed encoding from app.utils.codec when requested via Accept",
+}
+
+
+PLAYER_LIST = TypeAdapter(list[ActivePlayer])
+
+
+def wants_binary(request: Request) -> bool:
+    """Whether the client asked for the packed binary encoding"""
+    return codec.MEDIA_TYPE in request.headers.get("accept", "")
+
 
 @router.get(
     "/players",
     response_model=list[ActivePlayer],
+    responses={
+        200: BINARY_RESPONSE,
+        400: {"model": ErrorResponse, "description": "Invalid cursor"},
+    },
 )
 async def get_active_players(
+    request: Request,
     mode: Literal["walls", "pass-through"] | None = Query(None, description="Filter by game mode"),
-    db: AsyncSession = Depends(get_db),
+    sort: Literal["score", "started_at"] = Query("score", description="Highest score or newest game first"),
+    limit: int | None = Query(None, ge=1, le=1000, description="Maximum players to return (all by default)"),
+    cursor: str | None = Query(None, description="X-Next-Cursor value from the previous page"),
+    pinned: AsyncSession | None = Depends(get_pinned_read_db, scope="function"),
 ):
-    """Get all currently active players"""
-    players = await crud.active_players.get_active_players(db, mode=mode)
+    """Get currently active players.
     
-    return [
-        ActivePlayer(
-            id=p.id,
-            username=p.username,
-            score=p.score,
-            mode=p.mode,
-            snake=p.snake,
-            food=p.food,
-            is_game_over=p.is_game_over,
-            direction=p.direction,
-            started_at=p.started_at
+    When more players follow the returned page, the ``X-Next-Cursor``
+    response header holds the cursor for the next one.
+    """
+    async def load(db: AsyncSession) -> tuple[list[ActivePlayer], str | None]:
+        return await crud.active_players.list_active_players(
+            db, mode=mode, sort=sort, limit=limit, cursor=cursor
         )
-        for p in players
-    ]
+
+    try:
+        players, next_cursor = await active_players_cache.get((mode, sort, limit, cursor), load, pinned)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+    
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    if wants_binary(request):
+        return Response(codec.encode_players(players), media_type=codec.MEDIA_TYPE, headers=headers)
+    return Response(PLAYER_LIST.dump_json(players), media_type="application/json", headers=headers)
 
 
 @router.get(
     "/players/{player_id}",
     response_model=ActivePlayer,
     responses={
+        200: BINARY_RESPONSE,
         404: {"model": ErrorResponse, "description": "Player not found or not currently playing"},
     }
 )
-async def watch_player(player_id: str, db: AsyncSession = Depends(get_db)):
+async def watch_player(
+    player_id: str,
+    request: Request,
+    pinned: AsyncSession | None = Depends(get_pinned_read_db, scope="function"),
+):
     """Get detailed game state for a specific active player"""
-    player = await crud.active_players.get_active_player(db, player_id)
+    async def load(db: AsyncSession) -> ActivePlayer:
+        player = await crud.active_players.get_active_player(db, player_id)
+
+        if not player:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Player not found or not currently playing",
+            )
+        return player
+
+    player = await watched_player_cache.get(player_id, load, pinned)
+    if wants_binary(request):
+        return Response(codec.encode_player(player), media_type=codec.MEDIA_TYPE)
+    return player
+
+
+@router.put(
+    "/players/{player_id}/state",
+    status_code=status.HTTP_204_NO_CONTENT,
+    responses={
+        401: {"model": ErrorResponse, "description": "Not authenticated"},
+        403: {"model": ErrorResponse, "description": "Player belongs to another user"},
+        404: {"model": ErrorResponse, "description": "Game no longer tracked"},
+        409: {"model": ErrorResponse, "description": "Game is already over"},
+    }
+)
+async def report_player_state(
+    player_id: str,
+    state: PlayerStateUpdate,
+    current_user: CurrentUser,
+    db: AsyncSession = Depends(get_db, scope="function"),
+):
+    """Report the current user's game state, at up to game tick rate.
     
-    if not player:
+    Updates are applied in memory (the latest one wins) and written to the
+    database in batched snapshots. Only a new player's first report touches
+    the database, to insert its row.
+    """
+    player = await crud.active_players.get_player(db, player_id)
+    if player is None:
+        # Two first reports may race here; the loser gets the winner's game
+        player = await crud.active_players.create_active_player(
+            db,
+            player_id=player_id,
+            username=current_user.username,
+            mode=state.mode,
+            snake=state.snake,
+            food=state.food,
+            direction=state.direction,
+        )
+    
+    if player is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Player not found or not currently playing",
+            detail="Game no longer tracked",
+        )
+
+    if player.username != current_user.username:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Player belongs to another user",
+        )
+
+    if player.is_game_over:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Game is already over",
         )
     
-    return ActivePlayer(
-        id=player.id,
-        username=player.username,
-        score=player.score,
-        mode=player.mode,
-        snake=player.snake,
-        food=player.food,
-        is_game_over=player.is_game_over,
-        direction=player.direction,
-        started_at=player.started_at
+    updated = await crud.active_players.update_player_state(
+        db,
+        player_id,
+        score=state.score,
+        snake=state.snake,
+        food=state.food,
+        direction=state.direction,
+        mode=state.mode,
+        is_game_over=state.is_game_over,
     )
+    if updated is None:
+        # Expired and removed since it was looked up
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Game no longer tracked",
+        )
+
+
+@router.get(
+    "/stream/metrics",
+    response_model=list[StreamSubscriberMetrics],
+)
+async def get_stream_metrics():
+    """Get queue depth, lag and dropped frames for each stream connection"""
+    return spectate_hub.metrics()
+
+
+@router.websocket("/stream")
+async def stream_players(
+    websocket: WebSocket,
+    mode: Literal["walls", "pass-through"] | None = Query(None, description="Filter by game mode"),
+    player_id: str | None = Query(None, description="Watch a single player"),
+    encoding: Literal["json", "binary"] = Query(
+        "json", description="Frame encoding: UTF-8 JSON or app.utils.codec"
+    ),
+):
+    """Stream active player state at tick rate.
+    
+    Keyframes carry the full state: ``{"type": "players", "seq": n,
+    "players": [...]}`` for a mode listing, or ``{"type": "player", "seq": n,
+    "player": {...} | null}`` when ``player_id`` is given. Between keyframes,
+    ``{"type": "delta", "seq": n, ...}`` frames carry only what changed since
+    frame ``n - 1``: removed ids, added players, and per-player new heads,
+    popped tail cells, score, food and direction. The first frame, and the
+    first after the client fell behind, is always a keyframe; any other gap
+    in ``seq`` means the client should reconnect. Frames are UTF-8 JSON in
+    binary messages, or with ``encoding=binary`` the packed frames of
+    ``app.utils.codec``, and are only sent when the state changes or, as a
+    keyframe heartbeat, after ``SPECTATE_HEARTBEAT_INTERVAL`` seconds without one.
+    """
+    await websocket.accept()
+    async with spectate_hub.subscribe(
+        websocket, mode=mode, player_id=player_id, encoding=encoding
+    ):
+        try:
+            # Spectators never send anything; this just waits for disconnect
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
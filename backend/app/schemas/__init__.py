@@ -2,7 +2,16 @@
 from .auth import LoginRequest, SignupRequest, TokenResponse
 from .user import User, UserProfile, UserStats
 from .leaderboard import LeaderboardEntry, LeaderboardResponse, SubmitScoreRequest
-from .spectate import Position, ActivePlayer
+from .spectate import (
+    Position,
+    ActivePlayer,
+    DeltaFrame,
+    PlayerDelta,
+    PlayerFrame,
+    PlayersFrame,
+    PlayerStateUpdate,
+    StreamSubscriberMetrics,
+)
 from .common import ErrorResponse, ValidationErrorResponse
 
 __all__ = [
@@ -17,6 +26,12 @@ __all__ = [
     "SubmitScoreRequest",
     "Position",
     "ActivePlayer",
+    "DeltaFrame",
+    "PlayerDelta",
+    "PlayerFrame",
+    "PlayersFrame",
+    "PlayerStateUpdate",
+    "StreamSubscriberMetrics",
     "ErrorResponse",
     "ValidationErrorResponse",
 ]
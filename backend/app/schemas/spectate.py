@@ -24,3 +24,65 @@ class ActivePlayer(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class PlayerStateUpdate(BaseModel):
+    """Current game state reported by a player's client"""
+    mode: Literal["walls", "pass-through"]
+    score: int = Field(..., ge=0)
+    snake: list[Position] = Field(..., min_length=1)
+    food: Position
+    direction: Literal["UP", "DOWN", "LEFT", "RIGHT"]
+    is_game_over: bool = False
+
+
+class PlayersFrame(BaseModel):
+    """Spectate stream keyframe for a mode listing"""
+    type: Literal["players"] = "players"
+    seq: int = 0
+    players: list[ActivePlayer]
+
+
+class PlayerFrame(BaseModel):
+    """Spectate stream keyframe for a single watched player"""
+    type: Literal["player"] = "player"
+    seq: int = 0
+    player: ActivePlayer | None
+
+
+class PlayerDelta(BaseModel):
+    """Changes to one player since the previous frame; unset fields are unchanged"""
+    id: str
+    heads: list[Position] | None = Field(
+        None, description="New head cells, newest first, to prepend to the snake"
+    )
+    pop: int | None = Field(None, ge=0, description="Tail cells to remove")
+    snake: list[Position] | None = Field(
+        None, description="Whole snake, when it can't be expressed as head/tail moves"
+    )
+    score: int | None = Field(None, ge=0)
+    food: Position | None = None
+    direction: Literal["UP", "DOWN", "LEFT", "RIGHT"] | None = None
+
+
+class DeltaFrame(BaseModel):
+    """Spectate stream frame relative to the frame numbered ``seq - 1``"""
+    type: Literal["delta"] = "delta"
+    seq: int
+    players: list[PlayerDelta] = []
+    added: list[ActivePlayer] = []
+    removed: list[str] = []
+
+
+class StreamSubscriberMetrics(BaseModel):
+    """Delivery health of one spectate stream connection"""
+    id: int
+    mode: Literal["walls", "pass-through"] | None = None
+    player_id: str | None = None
+    encoding: Literal["json", "binary"] = "json"
+    queued: int = Field(..., description="Frames waiting to be written")
+    lag_frames: int = Field(..., description="Frames published but not yet written")
+    lag_seconds: float = Field(..., description="Age of the oldest queued frame")
+    sent: int
+    dropped: int = Field(..., description="Frames coalesced away because the client fell behind")
+    resyncs: int = Field(..., description="Keyframes sent to (re)establish state")
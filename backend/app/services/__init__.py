@@ -0,0 +1,16 @@
+"""Long-running application services"""
+from .maintenance import JobStats, MaintenanceJob, MaintenanceScheduler, default_jobs
+from .player_registry import ActivePlayerRegistry, PlayerRecord, active_player_registry
+from .spectate_hub import SpectateHub, spectate_hub
+
+__all__ = [
+    "JobStats",
+    "MaintenanceJob",
+    "MaintenanceScheduler",
+    "default_jobs",
+    "ActivePlayerRegistry",
+    "PlayerRecord",
+    "active_player_registry",
+    "SpectateHub",
+    "spectate_hub",
+]
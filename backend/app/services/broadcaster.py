@@ -0,0 +1,166 @@
+"""Fan-out of pre-encoded frames to many subscribers"""
+import asyncio
+import itertools
+import logging
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable, Hashable
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
+
+# Writes one already-encoded frame to a connection
+SendBytes = Callable[[bytes], Awaitable[None]]
+
+
+class Frame(NamedTuple):
+    """One tick of a channel, shared by every subscriber"""
+    seq: int
+    data: bytes  # What an up-to-date subscriber receives
+    keyframe: bytes  # Full state, sent instead of ``data`` after a drop
+    published_at: float
+
+
+class Subscriber:
+    """One connection's bounded outbound queue and its writer task.
+
+    ``offer`` never blocks the producer. When the queue is full the backlog
+    is discarded and only the newest frame is kept (latest state wins); the
+    next write is then that frame's keyframe, so a slow client resyncs
+    instead of replaying stale ticks. Memory per subscriber is bounded by
+    ``max_queue`` references to shared frame buffers.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, send: SendBytes, max_queue: int):
+        self.id = next(self._ids)
+        self.max_queue = max(1, max_queue)
+        self._send = send
+        self._queue: deque[Frame] = deque()
+        self._ready = asyncio.Event()
+        # A new subscriber has no prior state, so it starts with a keyframe
+        self._resync = True
+        self.closed = False
+        self.latest_seq = 0
+        self.sent_seq = 0
+        self.sent = 0
+        self.dropped = 0
+        self.resyncs = 0
+        self._task = asyncio.create_task(self._run(), name=f"subscriber:{self.id}")
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    @property
+    def lag_frames(self) -> int:
+        """Ticks published but not yet written to this connection"""
+        return self.latest_seq - self.sent_seq
+
+    @property
+    def lag_seconds(self) -> float:
+        """Age of the oldest frame still waiting to be written"""
+        if not self._queue:
+            return 0.0
+        return time.monotonic() - self._queue[0].published_at
+
+    def offer(self, frame: Frame) -> None:
+        """Queue a frame without waiting; coalesce if the client is behind"""
+        if self.closed:
+            return
+        if len(self._queue) >= self.max_queue:
+            self.dropped += len(self._queue)
+            self._queue.clear()
+            self._resync = True
+        self._queue.append(frame)
+        self.latest_seq = frame.seq
+        self._ready.set()
+
+    async def _run(self) -> None:
+        try:
+            while True:
+                while not self._queue:
+                    self._ready.clear()
+                    await self._ready.wait()
+                frame = self._queue.popleft()
+                if self._resync:
+                    self._resync = False
+                    self.resyncs += 1
+                    payload = frame.keyframe
+                else:
+                    payload = frame.data
+                await self._send(payload)
+                self.sent += 1
+                self.sent_seq = frame.seq
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.debug("Subscriber %d send failed: %r", self.id, exc)
+        finally:
+            self.closed = True
+            self._queue.clear()
+
+    async def close(self) -> None:
+        """Stop the writer task"""
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+
+class Broadcaster:
+    """Delivers the same immutable frame buffers to every subscriber of a channel.
+
+    Producers encode a frame once per channel and publish it here; each
+    subscriber receives that very buffer, so encoding cost per tick is
+    proportional to the number of channels, not the number of viewers.
+    Publishing only enqueues, so a slow connection never delays the producer
+    or other subscribers. Subscribers whose send fails are dropped.
+    """
+
+    def __init__(self, max_queue: int = 4):
+        self.max_queue = max_queue
+        self._channels: dict[Hashable, dict[int, Subscriber]] = {}
+
+    def subscriber_count(self, key: Hashable) -> int:
+        return len(self._channels.get(key, ()))
+
+    def subscribers(self) -> list[tuple[Hashable, Subscriber]]:
+        """Every (channel, subscriber) pair, for metrics"""
+        return [
+            (key, subscriber)
+            for key, subscribers in self._channels.items()
+            for subscriber in subscribers.values()
+        ]
+
+    def subscribe(self, key: Hashable, send: SendBytes) -> Subscriber:
+        """Register ``send`` on channel ``key``"""
+        subscriber = Subscriber(send, self.max_queue)
+        self._channels.setdefault(key, {})[subscriber.id] = subscriber
+        return subscriber
+
+    async def unsubscribe(self, key: Hashable, subscriber: Subscriber) -> bool:
+        """Remove a subscription; returns True if the channel is now empty"""
+        await subscriber.close()
+        subscribers = self._channels.get(key)
+        if subscribers is None:
+            return True
+        subscribers.pop(subscriber.id, None)
+        if not subscribers:
+            del self._channels[key]
+            return True
+        return False
+
+    def publish(self, key: Hashable, frame: Frame) -> int:
+        """Queue ``frame`` for every live subscriber of ``key``; returns count"""
+        subscribers = self._channels.get(key)
+        if not subscribers:
+            return 0
+
+        delivered = 0
+        for subscriber_id, subscriber in list(subscribers.items()):
+            if subscriber.closed:
+                del subscribers[subscriber_id]
+                continue
+            subscriber.offer(frame)
+            delivered += 1
+        return delivered
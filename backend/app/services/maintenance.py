@@ -0,0 +1,178 @@
+"""Background maintenance scheduler"""
+import asyncio
+import logging
+import os
+import random
+import socket
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app import crud
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Deletes at most ``limit`` rows and returns how many it removed
+ChunkFunc = Callable[[AsyncSession, int], Awaitable[int]]
+
+
+@dataclass
+class MaintenanceJob:
+    """A periodic cleanup job run in bounded chunks"""
+    name: str
+    interval: float
+    run_chunk: ChunkFunc
+
+
+@dataclass
+class JobStats:
+    """Outcome of a job's runs on this worker"""
+    runs: int = 0
+    skipped: int = 0  # Another worker held the lease
+    failures: int = 0
+    last_run_at: datetime | None = None
+    last_duration: float = 0.0
+    last_rows: int = 0
+    total_rows: int = 0
+    last_error: str | None = None
+
+
+class MaintenanceScheduler:
+    """Runs maintenance jobs on jittered intervals from the app's event loop.
+
+    Each run first takes a lease row in ``job_leases`` so only one worker
+    executes a given job; the lease outlives the interval, so the current
+    leader keeps renewing it and a crashed leader is replaced once it lapses.
+    Work is done in chunks of ``chunk_size`` rows until a chunk comes back
+    short or ``time_budget`` seconds have passed.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        jobs: list[MaintenanceJob],
+        chunk_size: int = 1000,
+        time_budget: float = 5.0,
+        jitter: float = 0.1,
+        owner: str | None = None,
+    ):
+        self.session_factory = session_factory
+        self.jobs = jobs
+        self.chunk_size = chunk_size
+        self.time_budget = time_budget
+        self.jitter = jitter
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.stats: dict[str, JobStats] = {}
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self) -> None:
+        """Start one loop per job"""
+        for job in self.jobs:
+            self.stats.setdefault(job.name, JobStats())
+            self._tasks.append(
+                asyncio.create_task(self._loop(job), name=f"maintenance:{job.name}")
+            )
+
+    async def stop(self) -> None:
+        """Cancel job loops and wait for them to exit"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    def _lease_ttl(self, job: MaintenanceJob) -> float:
+        return job.interval * (1 + self.jitter) + self.time_budget * 2
+
+    async def _loop(self, job: MaintenanceJob) -> None:
+        while True:
+            delay = job.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+            await asyncio.sleep(delay)
+            try:
+                await self.run_job(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Maintenance job %s failed", job.name)
+
+    async def run_job(self, job: MaintenanceJob) -> int | None:
+        """Run one pass of ``job``; returns rows affected, or None if not leader"""
+        stats = self.stats.setdefault(job.name, JobStats())
+
+        async with self.session_factory() as db:
+            if not await crud.job_leases.acquire_lease(
+                db, job.name, self.owner, self._lease_ttl(job)
+            ):
+                stats.skipped += 1
+                return None
+
+            started = time.monotonic()
+            rows = 0
+            try:
+                while True:
+                    affected = await job.run_chunk(db, self.chunk_size)
+                    rows += affected
+                    if affected < self.chunk_size:
+                        break
+                    if time.monotonic() - started >= self.time_budget:
+                        logger.info(
+                            "Maintenance job %s hit its %.1fs budget after %d rows",
+                            job.name, self.time_budget, rows,
+                        )
+                        break
+                    # Let request handlers run between chunks
+                    await asyncio.sleep(0)
+            except Exception as exc:
+                stats.failures += 1
+                stats.last_error = repr(exc)
+                raise
+            finally:
+                stats.runs += 1
+                stats.last_run_at = datetime.now(timezone.utc)
+                stats.last_duration = time.monotonic() - started
+                stats.last_rows = rows
+                stats.total_rows += rows
+
+        logger.info(
+            "Maintenance job %s removed %d rows in %.3fs",
+            job.name, rows, stats.last_duration,
+        )
+        return rows
+
+
+def default_jobs() -> list[MaintenanceJob]:
+    """Cleanup jobs enabled by the current settings"""
+    jobs = [
+        MaintenanceJob(
+            name="token_blacklist_cleanup",
+            interval=settings.token_cleanup_interval,
+            run_chunk=lambda db, limit: crud.token_blacklist.cleanup_expired_tokens(
+                db, limit=limit
+            ),
+        ),
+        MaintenanceJob(
+            name="active_players_cleanup",
+            interval=settings.player_cleanup_interval,
+            run_chunk=lambda db, limit: crud.active_players.cleanup_inactive_players(
+                db, inactive_minutes=settings.player_inactive_minutes, limit=limit
+            ),
+        ),
+    ]
+    if settings.score_retention_days > 0:
+        jobs.append(
+            MaintenanceJob(
+                name="leaderboard_retention",
+                interval=settings.score_cleanup_interval,
+                run_chunk=lambda db, limit: crud.leaderboard.delete_old_scores(
+                    db,
+                    before_date=datetime.now(timezone.utc)
+                    - timedelta(days=settings.score_retention_days),
+                    limit=limit,
+                ),
+            )
+        )
+    return jobs
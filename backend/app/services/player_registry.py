@@ -0,0 +1,548 @@
+"""In-memory registry of active players"""
+import asyncio
+import bisect
+import logging
+import math
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Literal
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app import crud
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.invalidation import PLAYER_STATE, invalidation_bus
+from app.schemas import ActivePlayer
+from app.utils import codec
+from app.utils.timing_wheel import TimingWheel
+
+logger = logging.getLogger(__name__)
+
+Mode = Literal["walls", "pass-through"]
+MODES: tuple[Mode, ...] = ("walls", "pass-through")
+Sort = Literal["score", "started_at"]
+SORTS: tuple[Sort, ...] = ("score", "started_at")
+
+
+def pack_cells(cells: list) -> bytes:
+    """Interleaved x, y bytes for positions given as dicts or Position models"""
+    out = bytearray()
+    for cell in cells:
+        if isinstance(cell, dict):
+            out.append(cell["x"])
+            out.append(cell["y"])
+        else:
+            out.append(cell.x)
+            out.append(cell.y)
+    return bytes(out)
+
+
+class PlayerRecord:
+    """Compact state of one player.
+
+    The snake is held as interleaved x, y bytes, head first, and the food as
+    one x, y pair. ``view`` builds the API model on demand and caches it
+    until the next change.
+    """
+
+    __slots__ = (
+        "id",
+        "username",
+        "mode",
+        "score",
+        "snake",
+        "food",
+        "direction",
+        "is_game_over",
+        "started_at",
+        "last_seen_at",
+        "_view",
+    )
+
+    def __init__(
+        self,
+        id: str,
+        username: str,
+        mode: Mode,
+        score: int,
+        snake: bytes,
+        food: tuple[int, int],
+        direction: str,
+        is_game_over: bool,
+        started_at: datetime,
+        last_seen_at: datetime | None = None,
+    ):
+        self.id = id
+        self.username = username
+        self.mode = mode
+        self.score = score
+        self.snake = snake
+        self.food = food
+        self.direction = direction
+        self.is_game_over = is_game_over
+        self.started_at = started_at
+        self.last_seen_at = last_seen_at or started_at
+        self._view: ActivePlayer | None = None
+
+    @property
+    def score_key(self) -> tuple[int, str]:
+        """Sort key for highest score first, ties broken by id"""
+        return (-self.score, self.id)
+
+    @property
+    def started_key(self) -> tuple[float, str]:
+        """Sort key for newest game first, ties broken by id"""
+        started_at = self.started_at
+        if started_at.tzinfo is None:
+            # SQLite returns naive datetimes; they are stored as UTC
+            started_at = started_at.replace(tzinfo=timezone.utc)
+        return (-started_at.timestamp(), self.id)
+
+    def sort_key(self, sort: Sort) -> tuple:
+        return self.score_key if sort == "score" else self.started_key
+
+    @classmethod
+    def from_row(cls, row) -> "PlayerRecord":
+        """Record of a live game from its ``active_players`` row"""
+        return cls(
+            id=row.id,
+            username=row.username,
+            mode=row.mode,
+            score=row.score,
+            snake=pack_cells(row.snake or []),
+            food=(row.food["x"], row.food["y"]) if row.food else (0, 0),
+            direction=row.direction,
+            is_game_over=False,
+            started_at=row.started_at,
+            last_seen_at=row.last_seen_at,
+        )
+
+    def message(self) -> dict:
+        """Full state as JSON-ready values, for other workers' registries"""
+        started_at = self.started_at
+        if started_at.tzinfo is None:
+            started_at = started_at.replace(tzinfo=timezone.utc)
+        return {
+            "id": self.id,
+            "username": self.username,
+            "mode": self.mode,
+            "score": self.score,
+            "snake": self.snake.hex(),
+            "food": {"x": self.food[0], "y": self.food[1]},
+            "direction": self.direction,
+            "is_game_over": self.is_game_over,
+            "started_at": started_at.timestamp(),
+        }
+
+    def view(self) -> ActivePlayer:
+        """API model of this player; shared until the record changes"""
+        if self._view is None:
+            snake = self.snake
+            self._view = ActivePlayer.model_construct(
+                id=self.id,
+                username=self.username,
+                score=self.score,
+                mode=self.mode,
+                snake=[codec.cell(snake[i], snake[i + 1]) for i in range(0, len(snake), 2)],
+                food=codec.cell(*self.food),
+                is_game_over=self.is_game_over,
+                direction=self.direction,
+                started_at=self.started_at,
+            )
+        return self._view
+
+    def row(self) -> dict:
+        """Column values for persisting this record"""
+        snake = self.snake
+        return {
+            "id": self.id,
+            "mode": self.mode,
+            "score": self.score,
+            "snake": [{"x": snake[i], "y": snake[i + 1]} for i in range(0, len(snake), 2)],
+            "food": {"x": self.food[0], "y": self.food[1]},
+            "direction": self.direction,
+            "is_game_over": self.is_game_over,
+            "last_seen_at": self.last_seen_at,
+        }
+
+
+class ActivePlayerRegistry:
+    """Authoritative, in-process state of every live game.
+
+    Records are kept in a dict by id, with each mode's live players indexed
+    by id, by score and by start time (sorted lists of ``(-score, id)`` and
+    ``(-started_at, id)`` keys, kept in order with ``bisect``), so a page of
+    ``k`` players costs one binary search plus ``k`` views, with no sorting
+    and no SQL. The
+    ``active_players`` table is only a snapshot: it is read once to recover
+    games after a restart, new players are inserted as they start, and
+    changed players are written in one batched UPDATE every
+    ``snapshot_interval`` seconds. Finished games stay in memory until
+    that write, then are dropped.
+
+    Every state report pushes the player's deadline on a timing wheel out
+    to ``player_timeout`` seconds. Players whose deadline passes are
+    dropped from memory and their rows, unless written within the last
+    ``player_timeout`` seconds, removed with one ``DELETE`` on the next
+    snapshot, so expiry costs only the players that actually went
+    silent rather than a scan of the table. Games recovered from the table
+    (including seeded ones) have had no chance to report to this process
+    yet, so until they do they expire ``recovered_timeout`` seconds after
+    their ``last_seen_at``, the horizon of the maintenance sweep, instead
+    of ``player_timeout`` seconds after the restart.
+
+    With several workers, each keeps a full registry: every state report
+    is applied by the worker that receives it, which persists it, and sent
+    over the invalidation bus for the others to ``apply`` in memory. A
+    report for a game this worker has not heard of yet is ``adopt``-ed
+    from its row.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        snapshot_interval: float,
+        player_timeout: float = 15.0,
+        recovered_timeout: float = 1800.0,
+    ):
+        self.session_factory = session_factory
+        self.snapshot_interval = snapshot_interval
+        self.player_timeout = player_timeout
+        self.recovered_timeout = recovered_timeout
+        self.loaded = False
+        self._records: dict[str, PlayerRecord] = {}
+        self._by_mode: dict[Mode, dict[str, PlayerRecord]] = {mode: {} for mode in MODES}
+        self._sorted: dict[Sort, dict[Mode | None, list[tuple]]] = {
+            sort: {mode: [] for mode in (None, *MODES)} for sort in SORTS
+        }
+        self._dirty: set[str] = set()
+        self._expired: set[str] = set()
+        self._wheel = TimingWheel(resolution=1.0, slots=max(8, math.ceil(player_timeout) * 2))
+        self._load_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self.snapshots = 0
+        self.rows_written = 0
+        self.rows_expired = 0
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    @property
+    def dirty_count(self) -> int:
+        return len(self._dirty)
+
+    def _index(self, record: PlayerRecord) -> None:
+        if record.is_game_over:
+            return
+        self._by_mode[record.mode][record.id] = record
+        for sort, lists in self._sorted.items():
+            key = record.sort_key(sort)
+            bisect.insort(lists[None], key)
+            bisect.insort(lists[record.mode], key)
+
+    def _unindex(self, record: PlayerRecord) -> None:
+        if self._by_mode[record.mode].pop(record.id, None) is None:
+            return
+        for sort, lists in self._sorted.items():
+            key = record.sort_key(sort)
+            for keys in (lists[None], lists[record.mode]):
+                i = bisect.bisect_left(keys, key)
+                if i < len(keys) and keys[i] == key:
+                    del keys[i]
+
+    def _add(self, record: PlayerRecord, timeout: float | None = None) -> None:
+        old = self._records.get(record.id)
+        if old is not None:
+            self._unindex(old)
+        self._records[record.id] = record
+        self._index(record)
+        if not record.is_game_over:
+            timeout = self.player_timeout if timeout is None else timeout
+            self._wheel.schedule(record.id, time.monotonic() + timeout)
+
+    def get(self, player_id: str) -> PlayerRecord | None:
+        """A player's record, including finished games not yet persisted"""
+        return self._records.get(player_id)
+
+    def get_active(self, player_id: str) -> ActivePlayer | None:
+        """A live player"""
+        record = self._records.get(player_id)
+        if record is None or record.is_game_over:
+            return None
+        return record.view()
+
+    def active_players(self, mode: Mode | None = None) -> list[ActivePlayer]:
+        """Live players, highest score first"""
+        records = self._records
+        return [records[player_id].view() for _, player_id in self._sorted["score"][mode]]
+
+    def page(
+        self,
+        mode: Mode | None = None,
+        sort: Sort = "score",
+        limit: int | None = None,
+        after: tuple | None = None,
+    ) -> tuple[list[ActivePlayer], tuple | None]:
+        """Up to ``limit`` live players following the sort key ``after``.
+
+        Returns the players and the key to resume from, or None on the
+        last page.
+        """
+        keys = self._sorted[sort][mode]
+        start = bisect.bisect_right(keys, after) if after is not None else 0
+        end = len(keys) if limit is None else min(start + limit, len(keys))
+        records = self._records
+        players = [records[keys[i][1]].view() for i in range(start, end)]
+        return players, (keys[end - 1] if end < len(keys) else None)
+
+    def create(
+        self,
+        player_id: str,
+        username: str,
+        mode: Mode,
+        snake: list,
+        food: dict,
+        direction: str = "RIGHT",
+        score: int = 0,
+        started_at: datetime | None = None,
+    ) -> PlayerRecord:
+        """Register a new game; the caller persists the initial row"""
+        record = PlayerRecord(
+            id=player_id,
+            username=username,
+            mode=mode,
+            score=score,
+            snake=pack_cells(snake),
+            food=(food["x"], food["y"]) if isinstance(food, dict) else (food.x, food.y),
+            direction=direction,
+            is_game_over=False,
+            started_at=started_at or datetime.now(timezone.utc),
+        )
+        self._add(record)
+        return record
+
+    def update(
+        self,
+        player_id: str,
+        score: int | None = None,
+        snake: list | None = None,
+        food=None,
+        direction: str | None = None,
+        mode: Mode | None = None,
+        is_game_over: bool | None = None,
+        persist: bool = True,
+    ) -> PlayerRecord | None:
+        """Apply a state change in memory; it is persisted by the next snapshot
+        unless ``persist`` is false"""
+        record = self._records.get(player_id)
+        if record is None:
+            return None
+
+        reindex = (
+            (score is not None and score != record.score)
+            or (mode is not None and mode != record.mode)
+            or (is_game_over is not None and is_game_over != record.is_game_over)
+        )
+        if reindex:
+            self._unindex(record)
+        if score is not None:
+            record.score = score
+        if snake is not None:
+            record.snake = snake if isinstance(snake, bytes) else pack_cells(snake)
+        if food is not None:
+            record.food = (food["x"], food["y"]) if isinstance(food, dict) else (food.x, food.y)
+        if direction is not None:
+            record.direction = direction
+        if mode is not None:
+            record.mode = mode
+        if is_game_over is not None:
+            record.is_game_over = is_game_over
+        if reindex:
+            self._index(record)
+
+        record.last_seen_at = datetime.now(timezone.utc)
+        if record.is_game_over:
+            self._wheel.cancel(player_id)
+        else:
+            self._wheel.schedule(player_id, time.monotonic() + self.player_timeout)
+        record._view = None
+        if persist:
+            self._dirty.add(player_id)
+        return record
+
+    def adopt(self, row) -> PlayerRecord:
+        """Track a live game from its row, e.g. one started on another worker"""
+        record = PlayerRecord.from_row(row)
+        self._expired.discard(record.id)
+        self._add(record)
+        return record
+
+    def apply(self, message: dict) -> None:
+        """Apply a state report another worker received and persists"""
+        if not self.loaded:
+            return  # The load will read the game from its row
+        player_id = message["id"]
+        record = self._records.get(player_id)
+        if message["is_game_over"]:
+            if record is not None:
+                self.discard(player_id)
+            return
+        snake = bytes.fromhex(message["snake"])
+        if record is None:
+            self._expired.discard(player_id)
+            self._add(
+                PlayerRecord(
+                    id=player_id,
+                    username=message["username"],
+                    mode=message["mode"],
+                    score=message["score"],
+                    snake=snake,
+                    food=(message["food"]["x"], message["food"]["y"]),
+                    direction=message["direction"],
+                    is_game_over=False,
+                    started_at=datetime.fromtimestamp(message["started_at"], timezone.utc),
+                )
+            )
+            return
+        self.update(
+            player_id,
+            score=message["score"],
+            snake=snake,
+            food=message["food"],
+            direction=message["direction"],
+            mode=message["mode"],
+            persist=False,
+        )
+
+    def discard(self, player_id: str) -> None:
+        """Forget one player without persisting pending changes"""
+        record = self._records.pop(player_id, None)
+        if record is not None:
+            self._unindex(record)
+        self._dirty.discard(player_id)
+        self._wheel.cancel(player_id)
+
+    def expire(self, now: float | None = None) -> list[str]:
+        """Drop live players not heard from within ``player_timeout``.
+
+        Their rows are deleted by the next snapshot. Returns the ids.
+        """
+        expired = self._wheel.advance(time.monotonic() if now is None else now)
+        for player_id in expired:
+            record = self._records.pop(player_id, None)
+            if record is not None:
+                self._unindex(record)
+            self._dirty.discard(player_id)
+            self._expired.add(player_id)
+        return expired
+
+    def clear(self) -> None:
+        """Forget every record; the next access reloads from the database"""
+        self._records.clear()
+        for players in self._by_mode.values():
+            players.clear()
+        for lists in self._sorted.values():
+            for keys in lists.values():
+                keys.clear()
+        self._dirty.clear()
+        self._expired.clear()
+        self._wheel.clear()
+        self.loaded = False
+
+    async def load(self, db: AsyncSession) -> int:
+        """Recover live games from the last snapshot; returns the count"""
+        async with self._load_lock:
+            if self.loaded:
+                return 0
+            count = 0
+            now = datetime.now(timezone.utc)
+            for row in await crud.active_players.load_live_players(db):
+                if row.id in self._records:
+                    continue
+                last_seen = row.last_seen_at
+                if last_seen.tzinfo is None:
+                    last_seen = last_seen.replace(tzinfo=timezone.utc)
+                silent = (now - last_seen).total_seconds()
+                self._add(
+                    PlayerRecord.from_row(row),
+                    timeout=max(0.0, self.recovered_timeout - silent),
+                )
+                count += 1
+            self.loaded = True
+            return count
+
+    def start(self) -> None:
+        """Start the periodic snapshot loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop(), name="active-player-snapshot")
+
+    async def stop(self) -> None:
+        """Stop the snapshot loop and write whatever is still dirty"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.snapshot()
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.snapshot_interval)
+            try:
+                self.expire()
+                await self.snapshot()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Active player snapshot failed")
+
+    async def snapshot(self, db: AsyncSession | None = None) -> int:
+        """Write every changed player in one batched UPDATE and delete expired
+        players in one DELETE; returns the number of rows updated"""
+        if not self._dirty and not self._expired:
+            return 0
+        dirty, self._dirty = self._dirty, set()
+        expired, self._expired = self._expired, set()
+        records = [self._records[player_id] for player_id in dirty if player_id in self._records]
+        rows = [record.row() for record in records]
+
+        try:
+            if db is None:
+                async with self.session_factory() as session:
+                    await self._write(session, rows, expired)
+            else:
+                await self._write(db, rows, expired)
+        except BaseException:
+            # Retry on the next snapshot
+            self._dirty |= {record.id for record in records}
+            self._expired |= expired - self._records.keys()
+            raise
+
+        for record in records:
+            # Finished games are never read back once persisted
+            if record.is_game_over and record.id not in self._dirty:
+                self._records.pop(record.id, None)
+        self.snapshots += 1
+        self.rows_written += len(rows)
+        self.rows_expired += len(expired)
+        return len(rows)
+
+    async def _write(self, db: AsyncSession, rows: list[dict], expired: set[str]) -> None:
+        if expired:
+            # A game this worker stopped hearing about may still be reporting
+            # to another one; its row is only deleted once nobody has written it
+            seen_before = datetime.now(timezone.utc) - timedelta(seconds=self.player_timeout)
+            await crud.active_players.delete_players(
+                db, expired, commit=not rows, seen_before=seen_before
+            )
+        if rows:
+            await crud.active_players.bulk_update_player_states(db, rows)
+
+
+active_player_registry = ActivePlayerRegistry(
+    session_factory=AsyncSessionLocal,
+    snapshot_interval=settings.player_state_flush_interval,
+    player_timeout=settings.player_timeout,
+    recovered_timeout=settings.player_inactive_minutes * 60,
+)
+invalidation_bus.subscribe(PLAYER_STATE, active_player_registry.apply)
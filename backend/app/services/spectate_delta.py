@@ -0,0 +1,76 @@
+"""Diffs between consecutive spectate states"""
+from app.schemas import ActivePlayer, DeltaFrame, PlayerDelta, Position
+
+# Most head moves to look for between two frames before sending the whole snake
+MAX_HEAD_STEPS = 3
+
+
+def snake_delta(
+    old: list[Position],
+    new: list[Position],
+    max_steps: int = MAX_HEAD_STEPS,
+) -> tuple[list[Position], int] | None:
+    """Express ``new`` as heads prepended to ``old`` with tail cells popped.
+
+    Snakes are stored head first, so a normal tick is one new head plus one
+    popped tail cell (or none after eating). Returns ``(heads, pop)``, or None
+    when the snakes aren't related by up to ``max_steps`` moves.
+    """
+    # At least one cell must carry over, otherwise it's a different snake
+    for steps in range(min(len(new) - 1, max_steps) + 1):
+        kept = len(new) - steps
+        if kept <= len(old) and new[steps:] == old[:kept]:
+            return new[:steps], len(old) - kept
+    return None
+
+
+def player_delta(old: ActivePlayer, new: ActivePlayer) -> PlayerDelta | None:
+    """Changes from ``old`` to ``new``, or None if the player must be resent"""
+    if (old.username, old.mode, old.started_at) != (new.username, new.mode, new.started_at):
+        return None
+
+    delta = PlayerDelta(id=new.id)
+    if new.snake != old.snake:
+        moves = snake_delta(old.snake, new.snake)
+        if moves is None:
+            delta.snake = new.snake
+        else:
+            heads, pop = moves
+            if heads:
+                delta.heads = heads
+            if pop:
+                delta.pop = pop
+    if new.score != old.score:
+        delta.score = new.score
+    if new.food != old.food:
+        delta.food = new.food
+    if new.direction != old.direction:
+        delta.direction = new.direction
+    return delta
+
+
+def diff_players(
+    previous: dict[str, ActivePlayer],
+    current: dict[str, ActivePlayer],
+    seq: int,
+) -> DeltaFrame:
+    """Delta frame turning ``previous`` into ``current``.
+
+    Clients apply ``removed``, then ``added`` (which also replaces players
+    that can't be diffed), then the per-player deltas.
+    """
+    frame = DeltaFrame(
+        seq=seq,
+        removed=[player_id for player_id in previous if player_id not in current],
+    )
+    for player_id, player in current.items():
+        old = previous.get(player_id)
+        if old is None:
+            frame.added.append(player)
+        elif old != player:
+            delta = player_delta(old, player)
+            if delta is None:
+                frame.added.append(player)
+            else:
+                frame.players.append(delta)
+    return frame
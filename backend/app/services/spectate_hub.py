@@ -0,0 +1,208 @@
+"""Push delivery of spectate state over WebSockets"""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Literal
+
+from fastapi import WebSocket
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app import crud
+from app.config import settings
+from app.database import ReadSessionLocal
+from app.schemas import (
+    ActivePlayer,
+    PlayerFrame,
+    PlayersFrame,
+    StreamSubscriberMetrics,
+)
+from app.services.broadcaster import Broadcaster, Frame
+from app.services.spectate_delta import diff_players
+from app.utils import codec
+
+logger = logging.getLogger(__name__)
+
+# (mode, player_id, encoding): a mode listing or a single watched player,
+# as JSON or binary frames
+ChannelKey = tuple[str | None, str | None, str]
+
+
+class SpectateChannel:
+    """Producer state for one channel"""
+
+    def __init__(self, key: ChannelKey):
+        self.key = key
+        self.seq = 0
+        self.keyframe_seq = 0
+        self.state: dict[str, ActivePlayer] | None = None
+        self.last_frame: Frame | None = None
+        self.sent_at = 0.0
+        self.task: asyncio.Task | None = None
+
+
+class SpectateHub:
+    """One producer per channel reads state at tick rate and fans it out.
+
+    However many spectators watch a channel, the database is read once per
+    tick for it and each frame is encoded once, as UTF-8 JSON or with
+    ``app.utils.codec``, and the broadcaster hands those bytes to every
+    subscriber as a binary message. Producers
+    start with the first subscriber and stop when the last one leaves.
+    Frames are only sent when the state changed since the previous tick,
+    or as a keyframe heartbeat after ``heartbeat_interval`` seconds without
+    one so that proxies do not close a quiet stream as idle.
+
+    Frames are numbered. Every ``keyframe_interval`` frames the full state
+    is sent; in between only deltas (new heads, popped tail cells, score,
+    food and direction changes). Each connection has a bounded send queue,
+    and a spectator that joins or falls behind gets the full state of the
+    latest frame instead of the deltas it missed.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        tick_interval: float,
+        max_queue: int = 4,
+        keyframe_interval: int = 50,
+        heartbeat_interval: float = 20.0,
+    ):
+        self.session_factory = session_factory
+        self.tick_interval = tick_interval
+        self.keyframe_interval = keyframe_interval
+        self.heartbeat_interval = heartbeat_interval
+        self._channels: dict[ChannelKey, SpectateChannel] = {}
+        self.broadcaster = Broadcaster(max_queue=max_queue)
+
+    @property
+    def channel_count(self) -> int:
+        return len(self._channels)
+
+    @asynccontextmanager
+    async def subscribe(
+        self,
+        websocket: WebSocket,
+        mode: Literal["walls", "pass-through"] | None = None,
+        player_id: str | None = None,
+        encoding: Literal["json", "binary"] = "json",
+    ):
+        """Attach an accepted WebSocket to its channel for the block's duration"""
+        key: ChannelKey = (None, player_id, encoding) if player_id else (mode, None, encoding)
+        channel = self._channels.get(key)
+        if channel is None:
+            channel = SpectateChannel(key)
+            self._channels[key] = channel
+            channel.task = asyncio.create_task(
+                self._produce(channel), name=f"spectate:{key}"
+            )
+        subscriber = self.broadcaster.subscribe(key, websocket.send_bytes)
+        if channel.last_frame is not None:
+            # Late joiners get the current state right away
+            subscriber.offer(channel.last_frame)
+
+        try:
+            yield subscriber
+        finally:
+            empty = await self.broadcaster.unsubscribe(key, subscriber)
+            if empty and self._channels.get(key) is channel:
+                del self._channels[key]
+                if channel.task is not None:
+                    channel.task.cancel()
+
+    def metrics(self) -> list[StreamSubscriberMetrics]:
+        """Per-connection queue depth, lag and drop counters"""
+        return [
+            StreamSubscriberMetrics(
+                id=subscriber.id,
+                mode=mode,
+                player_id=player_id,
+                encoding=encoding,
+                queued=subscriber.queued,
+                lag_frames=subscriber.lag_frames,
+                lag_seconds=subscriber.lag_seconds,
+                sent=subscriber.sent,
+                dropped=subscriber.dropped,
+                resyncs=subscriber.resyncs,
+            )
+            for (mode, player_id, encoding), subscriber in self.broadcaster.subscribers()
+        ]
+
+    async def close(self) -> None:
+        """Stop every producer"""
+        tasks = [c.task for c in self._channels.values() if c.task is not None]
+        self._channels.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _produce(self, channel: SpectateChannel) -> None:
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            try:
+                state = await self._read_state(channel.key)
+            except Exception:
+                logger.exception("Spectate producer %s failed to read state", channel.key)
+            else:
+                idle = loop.time() - channel.sent_at >= self.heartbeat_interval
+                if state != channel.state or idle:
+                    channel.last_frame = self._encode(channel, state, keyframe=idle)
+                    channel.state = state
+                    channel.sent_at = loop.time()
+                    self.broadcaster.publish(channel.key, channel.last_frame)
+
+            next_tick += self.tick_interval
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+
+    async def _read_state(self, key: ChannelKey) -> dict[str, ActivePlayer]:
+        mode, player_id, _ = key
+        async with self.session_factory() as db:
+            if player_id is not None:
+                player = await crud.active_players.get_active_player(db, player_id)
+                players = [player] if player else []
+            else:
+                players = await crud.active_players.get_active_players(db, mode=mode)
+        return {p.id: p for p in players}
+
+    def _encode(
+        self,
+        channel: SpectateChannel,
+        state: dict[str, ActivePlayer],
+        keyframe: bool = False,
+    ) -> Frame:
+        """Number the next frame and encode it both in full and as a delta"""
+        channel.seq += 1
+        _, player_id, encoding = channel.key
+        if player_id is not None:
+            full = PlayerFrame(seq=channel.seq, player=next(iter(state.values()), None))
+        else:
+            full = PlayersFrame(seq=channel.seq, players=list(state.values()))
+        if encoding == "binary":
+            full_data = codec.encode_frame(full)
+        else:
+            full_data = full.__pydantic_serializer__.to_json(full)
+
+        if (
+            keyframe
+            or channel.state is None
+            or channel.seq - channel.keyframe_seq >= self.keyframe_interval
+        ):
+            channel.keyframe_seq = channel.seq
+            return Frame(channel.seq, full_data, full_data, time.monotonic())
+
+        delta = diff_players(channel.state, state, channel.seq)
+        if encoding == "binary":
+            data = codec.encode_frame(delta)
+        else:
+            data = delta.__pydantic_serializer__.to_json(delta, exclude_none=True)
+        return Frame(channel.seq, data, full_data, time.monotonic())
+
+
+spectate_hub = SpectateHub(
+    session_factory=ReadSessionLocal,
+    tick_interval=settings.spectate_tick_interval,
+    max_queue=settings.spectate_send_queue,
+    keyframe_interval=settings.spectate_keyframe_interval,
+    heartbeat_interval=settings.spectate_heartbeat_interval,
+)
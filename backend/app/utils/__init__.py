@@ -1,20 +1,41 @@
 """Utility functions"""
 from .auth import (
     CurrentUser,
+    CurrentUserFromClaims,
+    authenticate_token,
     create_access_token,
     decode_access_token,
     decode_token,
     get_current_user,
+    get_current_user_from_claims,
     get_password_hash,
+    get_password_hash_async,
+    is_token_revoked,
+    revoke_token,
     verify_password,
+    user_token_claims,
+    verify_password_async,
 )
+from .cache import SingleFlightCache, TTLCache, clear_response_caches, user_cache
 
 __all__ = [
     "verify_password",
     "get_password_hash",
+    "verify_password_async",
+    "get_password_hash_async",
     "create_access_token",
     "decode_access_token",
     "decode_token",
+    "authenticate_token",
     "get_current_user",
+    "get_current_user_from_claims",
+    "is_token_revoked",
+    "revoke_token",
+    "user_token_claims",
     "CurrentUser",
+    "CurrentUserFromClaims",
+    "TTLCache",
+    "SingleFlightCache",
+    "clear_response_caches",
+    "user_cache",
 ]
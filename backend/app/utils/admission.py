@@ -0,0 +1,189 @@
+"""Admission control: bounded, latency-adaptive concurrency per route group"""
+import asyncio
+import json
+import math
+import time
+from collections import deque
+
+from app.config import settings
+
+# Writes that spend most of their time in bcrypt
+HASHING_ROUTES = ("/auth/login", "/auth/signup")
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class ConcurrencyLimiter:
+    """Admits at most ``limit`` requests at once; a few more wait briefly.
+
+    A request over the limit waits up to ``queue_timeout`` seconds for a
+    slot, and is refused at once if ``limit`` requests are already
+    waiting. The limit adapts to the time admitted requests take (AIMD):
+    a request slower than ``target_latency`` cuts it by ``backoff`` (at
+    most once per ``target_latency``, so one slow burst counts once), and
+    fast requests while the limit is fully used raise it by about one per
+    limit's worth of requests, up to ``max_limit``. When the database
+    slows down, fewer requests are let in and those that are stay fast.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_limit: int,
+        target_latency: float,
+        queue_timeout: float,
+        min_limit: int = 1,
+        backoff: float = 0.9,
+    ):
+        self.name = name
+        self.max_limit = max_limit
+        self.min_limit = min(min_limit, max_limit)
+        self.target_latency = target_latency
+        self.queue_timeout = queue_timeout
+        self.backoff = backoff
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> bool:
+        """Take a slot, waiting briefly if needed; False if refused"""
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return True
+        if self.queue_timeout <= 0 or len(self._waiters) >= int(self.limit):
+            self.rejected += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            if self._granted(waiter):
+                # The client went away just as it was handed a slot
+                self.in_flight -= 1
+                self._wake()
+            else:
+                self._remove(waiter)
+            raise
+        # A slot may be handed over at the same moment the wait times out
+        if self._granted(waiter):
+            self.admitted += 1
+            return True
+        self._remove(waiter)
+        self.rejected += 1
+        return False
+
+    def release(self, latency: float) -> None:
+        """Return a slot, feeding how long its request took into the limit"""
+        self._adapt(latency)
+        self.in_flight -= 1
+        self._wake()
+
+    def _adapt(self, latency: float) -> None:
+        if latency > self.target_latency:
+            now = time.monotonic()
+            if now - self._last_decrease >= self.target_latency:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self._last_decrease = now
+        elif self.in_flight >= int(self.limit):
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def _wake(self) -> None:
+        # The slot passes straight to a waiter, so no newcomer can take it first
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self.in_flight += 1
+
+    @staticmethod
+    def _granted(waiter: asyncio.Future) -> bool:
+        return waiter.done() and not waiter.cancelled()
+
+    def _remove(self, waiter: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+
+def route_group(method: str, path: str, prefix: str) -> str | None:
+    """Which limiter a request goes through; None for unlimited routes"""
+    if not path.startswith(prefix):
+        return None  # Health checks, docs
+    if method in SAFE_METHODS:
+        return None if method == "OPTIONS" else "reads"
+    if path[len(prefix):] in HASHING_ROUTES:
+        return "auth"
+    return "writes"
+
+
+class AdmissionControl:
+    """ASGI middleware that sheds load per route group.
+
+    HTTP requests under ``prefix`` pass through the limiter of their group
+    (``reads``, ``writes`` or ``auth``). A request that cannot get a slot
+    gets a 503 with ``Retry-After`` instead of waiting on a saturated
+    database pool. WebSockets and routes outside ``prefix`` are not limited.
+    """
+
+    def __init__(self, app, limiters: dict[str, ConcurrencyLimiter], prefix: str):
+        self.app = app
+        self.limiters = limiters
+        self.prefix = prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        limiter = self.limiters.get(route_group(scope["method"], scope["path"], self.prefix))
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await limiter.acquire():
+            await self._reject(send, limiter)
+            return
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(time.perf_counter() - started)
+
+    @staticmethod
+    async def _reject(send, limiter: ConcurrencyLimiter) -> None:
+        body = json.dumps({"detail": "Server is busy, please retry"}).encode()
+        retry_after = max(1, math.ceil(limiter.target_latency * 2))
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def create_limiters() -> dict[str, ConcurrencyLimiter]:
+    """One limiter per group configured in settings"""
+    return {
+        group: ConcurrencyLimiter(
+            group,
+            max_limit=limit,
+            target_latency=settings.admission_target_latency.get(group, 1.0),
+            queue_timeout=settings.admission_queue_timeout,
+        )
+        for group, limit in settings.admission_max_concurrency.items()
+    }
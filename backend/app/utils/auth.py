@@ -1,4 +1,5 @@
 """Authentication utilities"""
+import uuid
 from datetime import datetime, timedelta, timezone
 from typing import Annotated
 
@@ -10,8 +11,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import crud
 from app.config import settings
-from app.database import get_db
+from app.database import get_read_db
 from app.schemas import User
+from app.utils.cache import user_cache
+from app.invalidation import TOKEN_REVOKED, invalidation_bus
+from app.utils.hashing import password_hash_pool
+from app.utils.revocation import revocation_filter, token_fingerprint
 
 # Security scheme
 security = HTTPBearer()
@@ -35,6 +40,16 @@ def get_password_hash(password: str) -> str:
     return hashed.decode('utf-8')
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the hashing pool without blocking the event loop"""
+    return await password_hash_pool.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the hashing pool without blocking the event loop"""
+    return await password_hash_pool.run(get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -46,7 +61,7 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
             minutes=settings.access_token_expire_minutes
         )
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     
     return encoded_jwt
@@ -74,33 +89,70 @@ def decode_token(token: str) -> dict:
         )
 
 
-async def get_current_user(
-    credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
-    db: AsyncSession = Depends(get_db),
-) -> User:
-    """Get the current authenticated user"""
-    token = credentials.credentials
+async def is_token_revoked(db: AsyncSession, token: str, payload: dict) -> bool:
+    """Check the revocation filter, falling back to the blacklist table"""
+    token_hash = token_fingerprint(token, payload)
+    if not settings.token_revocation_filter:
+        return await crud.token_blacklist.is_token_blacklisted(db, token_hash)
     
-    # Check if token is blacklisted
-    is_blacklisted = await crud.token_blacklist.is_token_blacklisted(db, token)
-    if is_blacklisted:
+    if not revocation_filter.loaded:
+        await revocation_filter.load(db)
+    
+    revoked = revocation_filter.check(token_hash)
+    if revoked is None:
+        # Bloom false positive: only the database can tell
+        return await crud.token_blacklist.is_token_blacklisted(db, token_hash)
+    return revoked
+
+
+async def revoke_token(
+    db: AsyncSession,
+    token: str,
+    payload: dict,
+    expires_at: datetime,
+) -> None:
+    """Blacklist a token and record it in every worker's revocation filter"""
+    token_hash = token_fingerprint(token, payload)
+    await crud.token_blacklist.blacklist_token(db, token_hash, expires_at)
+    invalidation_bus.publish(
+        TOKEN_REVOKED, fingerprint=token_hash.hex(), expires_at=expires_at.timestamp()
+    )
+
+
+async def authenticate_token(db: AsyncSession, token: str) -> dict:
+    """Decode a bearer token and reject it if malformed or revoked"""
+    payload = decode_token(token)
+    
+    if payload.get("sub") is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token has been revoked",
+            detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Decode token
-    payload = decode_token(token)
-    user_id: str | None = payload.get("sub")
-    
-    if user_id is None:
+    # Check if token is blacklisted
+    if await is_token_revoked(db, token, payload):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
+            detail="Token has been revoked",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    return payload
+
+
+async def get_current_user(
+    credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
+    db: AsyncSession = Depends(get_read_db, scope="function"),
+) -> User:
+    """Get the current authenticated user"""
+    payload = await authenticate_token(db, credentials.credentials)
+    user_id: str = payload["sub"]
+    
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return cached
+    
     # Get user from database
     user_in_db = await crud.users.get_user_by_id(db, user_id)
     
@@ -111,13 +163,50 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    return User(
+    user = User(
         id=user_in_db.id,
         username=user_in_db.username,
         email=user_in_db.email,
         created_at=user_in_db.created_at
     )
+    user_cache.set(user.id, user)
+    return user
+
+
+async def get_current_user_from_claims(
+    credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
+    db: AsyncSession = Depends(get_read_db, scope="function"),
+) -> User:
+    """Get the current user from signed token claims when trusted.
+    
+    With ``trust_token_claims`` enabled, the username and email embedded in
+    the token are used as-is, so no users query is needed. ``created_at`` is
+    only filled in when the user is cached. Tokens without those claims fall
+    back to ``get_current_user``.
+    """
+    if not settings.trust_token_claims:
+        return await get_current_user(credentials, db)
+    
+    payload = await authenticate_token(db, credentials.credentials)
+    cached = user_cache.get(payload["sub"])
+    if cached is not None:
+        return cached
+    
+    username = payload.get("username")
+    email = payload.get("email")
+    if username is None or email is None:
+        return await get_current_user(credentials, db)
+    
+    return User(id=payload["sub"], username=username, email=email)
+
+
+def user_token_claims(user: User) -> dict:
+    """Claims to embed in an access token issued for ``user``"""
+    return {"sub": user.id, "username": user.username, "email": user.email}
 
 
 # Dependency for getting current user
 CurrentUser = Annotated[User, Depends(get_current_user)]
+
+# Dependency for getting current user, trusting token claims if configured
+CurrentUserFromClaims = Annotated[User, Depends(get_current_user_from_claims)]
@@ -0,0 +1,227 @@
+"""In-process caches"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Generic, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.schemas import User
+from app.invalidation import SCORE_ADDED, USER_CHANGED, invalidation_bus
+
+logger = logging.getLogger(__name__)
+
+V = TypeVar("V")
+
+
+class TTLCache(Generic[V]):
+    """Bounded LRU cache whose entries also expire after ``ttl`` seconds"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, V]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> V | None:
+        """Return a live entry and mark it recently used"""
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires, value = item
+        if expires < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: V) -> None:
+        """Insert or replace an entry, evicting the least recently used"""
+        if self.maxsize <= 0:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop an entry if present"""
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry"""
+        self._data.clear()
+
+
+class SingleFlightCache(Generic[V]):
+    """Read-through cache for an endpoint, with one load per key at a time.
+
+    Concurrent requests that miss the same key share one in-flight load
+    instead of each running the same queries. A loaded value is fresh for
+    ``fresh`` seconds; for ``stale`` seconds after that it is still served
+    at once while a single background load replaces it. Failed loads are
+    not cached: everyone waiting on one gets its exception, and a failed
+    background load leaves the stale value until it expires.
+
+    Every load runs on a read session of its own, from a replica when any
+    are healthy, so a load shared by many requests outlives whichever of
+    them started it. Clients pinned to the primary after a write pass
+    their primary session instead and skip the cache.
+    """
+
+    def __init__(self, name: str, maxsize: int, fresh: float, stale: float = 0.0):
+        self.name = name
+        self.maxsize = maxsize
+        self.fresh = fresh
+        self.stale = stale
+        self._data: OrderedDict[Hashable, tuple[float, V]] = OrderedDict()
+        self._flights: dict[Hashable, asyncio.Task] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.coalesced = 0
+        self.loads = 0
+        self.bypassed = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    async def get(
+        self,
+        key: Hashable,
+        load: Callable[[AsyncSession], Awaitable[V]],
+        pinned: AsyncSession | None = None,
+    ) -> V:
+        """Return the value for ``key``, loading it with ``load(db)`` if needed.
+
+        With a ``pinned`` session the value is loaded on it, bypassing the
+        cache, so a client that just wrote reads its own write.
+        """
+        if pinned is not None:
+            self.bypassed += 1
+            return await load(pinned)
+        item = self._data.get(key)
+        if item is not None:
+            stored_at, value = item
+            age = time.monotonic() - stored_at
+            if age < self.fresh:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            if age < self.fresh + self.stale:
+                self.stale_hits += 1
+                if key not in self._flights:
+                    self._fly(key, self._refresh(load))
+                return value
+            del self._data[key]
+
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._fly(key, self._load(load))
+        else:
+            self.coalesced += 1
+        # A waiter giving up does not cancel the load the others wait for
+        return await asyncio.shield(flight)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop an entry; a load already running for it is not stored"""
+        self._data.pop(key, None)
+        self._flights.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry and forget running loads"""
+        self._data.clear()
+        self._flights.clear()
+
+    def _fly(self, key: Hashable, work: Awaitable[V]) -> asyncio.Task:
+        self.loads += 1
+        flight = asyncio.ensure_future(work)
+        self._flights[key] = flight
+        flight.add_done_callback(lambda done: self._land(key, done))
+        return flight
+
+    def _land(self, key: Hashable, flight: asyncio.Task) -> None:
+        if self._flights.get(key) is not flight:
+            return  # Invalidated while loading
+        del self._flights[key]
+        if flight.cancelled() or flight.exception() is not None:
+            return
+        if self.maxsize <= 0 or self.fresh + self.stale <= 0:
+            return
+        self._data[key] = (time.monotonic(), flight.result())
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    async def _load(self, load: Callable[[AsyncSession], Awaitable[V]]) -> V:
+        # Not the session of the request that started the load: that one is
+        # closed when its request finishes or is cancelled, while others wait
+        from app.database import read_replicas
+
+        async with read_replicas.session_factory()() as db:
+            return await load(db)
+
+    async def _refresh(self, load: Callable[[AsyncSession], Awaitable[V]]) -> V:
+        try:
+            return await self._load(load)
+        except Exception as e:
+            logger.warning("Refreshing %s failed: %s", self.name, e)
+            raise
+
+
+# Authenticated users by id, so protected routes skip the users table
+user_cache: TTLCache[User] = TTLCache(
+    maxsize=settings.user_cache_size,
+    ttl=settings.user_cache_ttl,
+)
+invalidation_bus.subscribe(USER_CHANGED, lambda message: user_cache.invalidate(message["user_id"]))
+
+
+def _response_cache(route: str) -> SingleFlightCache:
+    return SingleFlightCache(
+        route,
+        maxsize=settings.response_cache_size,
+        fresh=settings.response_cache_fresh.get(route, 0.0),
+        stale=settings.response_cache_stale.get(route, 0.0),
+    )
+
+
+# Hot read endpoints, named as in settings.response_cache_fresh
+leaderboard_cache = _response_cache("leaderboard")
+top_scores_cache = _response_cache("leaderboard_top")
+user_scores_cache = _response_cache("user_scores")
+user_profile_cache = _response_cache("user_profile")
+user_stats_cache = _response_cache("user_stats")
+active_players_cache = _response_cache("spectate_players")
+watched_player_cache = _response_cache("spectate_player")
+RESPONSE_CACHES = (
+    leaderboard_cache,
+    top_scores_cache,
+    user_scores_cache,
+    user_profile_cache,
+    user_stats_cache,
+    active_players_cache,
+    watched_player_cache,
+)
+
+
+def clear_response_caches() -> None:
+    for cache in RESPONSE_CACHES:
+        cache.clear()
+
+
+def _on_score_added(message: dict) -> None:
+    # Any score can move any rank; only the scorer's own history changes
+    leaderboard_cache.clear()
+    top_scores_cache.clear()
+    user_stats_cache.clear()
+    user_profile_cache.invalidate(message["user_id"])
+    for mode in (None, "walls", "pass-through"):
+        user_scores_cache.invalidate((message["user_id"], mode))
+
+
+invalidation_bus.subscribe(SCORE_ADDED, _on_score_added)
@@ -0,0 +1,401 @@
+"""Compact binary encoding of spectate game state.
+
+The arena is a ``GRID_SIZE`` x ``GRID_SIZE`` grid, so a coordinate fits in
+one byte and a cell in two. All integers are big-endian.
+
+Player record::
+
+    u8 len, id (UTF-8) | u8 len, username (UTF-8) | u32 score
+    u8 flags: bit 0 pass-through, bit 1 game over, bit 2 has started_at,
+              bits 4-6 direction (0 none, 1 UP, 2 DOWN, 3 LEFT, 4 RIGHT)
+    [i64 started_at, microseconds since the epoch] | food cell | snake
+
+Snake, head first, as one of::
+
+    u8 0 (cells) | u16 n | n cells
+    u8 1 (chain) | u16 n | head cell | 2-bit step directions, 4 per byte
+    u8 2 (runs)  | u16 n | head cell | bytes of (direction << 6 | run - 1)
+
+Each step is the direction from one segment to the next, modulo the grid
+so pass-through wraps count as adjacent. The encoder picks the smallest
+form that applies; cells are the fallback for non-contiguous snakes.
+Decoded positions are shared instances, one per cell, and must be treated
+as read-only.
+
+Stream frames start with ``u8 type | u32 seq``, then for players (1) a
+u16 count and records, for player (2) a u8 presence flag and an optional
+record, and for delta (3) u16-counted lists of removed ids, added records
+and player deltas. A player delta is its id, a u8 mask of present fields
+(1 heads, 2 pop, 4 snake, 8 score, 16 food, 32 direction) and, in that
+order: u8-counted head cells, u16 pop, snake, u32 score, food cell, u8
+direction.
+"""
+import itertools
+import operator
+import struct
+from datetime import datetime, timedelta, timezone
+
+from app.schemas import (
+    ActivePlayer,
+    DeltaFrame,
+    PlayerDelta,
+    PlayerFrame,
+    PlayersFrame,
+    Position,
+)
+
+GRID_SIZE = 20
+MEDIA_TYPE = "application/octet-stream"
+
+SNAKE_CELLS = 0
+SNAKE_CHAIN = 1
+SNAKE_RUNS = 2
+
+FRAME_PLAYERS = 1
+FRAME_PLAYER = 2
+FRAME_DELTA = 3
+
+_FLAG_PASS_THROUGH = 0x01
+_FLAG_GAME_OVER = 0x02
+_FLAG_STARTED_AT = 0x04
+
+_DELTA_HEADS = 0x01
+_DELTA_POP = 0x02
+_DELTA_SNAKE = 0x04
+_DELTA_SCORE = 0x08
+_DELTA_FOOD = 0x10
+_DELTA_DIRECTION = 0x20
+
+_DIRECTIONS = (None, "UP", "DOWN", "LEFT", "RIGHT")
+_DIRECTION_CODES = {name: code for code, name in enumerate(_DIRECTIONS)}
+
+# Step codes: (dx, dy) between consecutive segments, modulo the grid
+_STEPS = ((0, GRID_SIZE - 1), (0, 1), (GRID_SIZE - 1, 0), (1, 0))
+_MAX_RUN = 64
+
+# Lookup tables so the hot loops avoid per-cell arithmetic and allocation.
+# Cells are indexed as x * GRID_SIZE + y.
+_STEP_TABLE = [-1] * (GRID_SIZE * GRID_SIZE)
+for _code, (_dx, _dy) in enumerate(_STEPS):
+    _STEP_TABLE[_dx * GRID_SIZE + _dy] = _code
+_CELLS = [
+    Position.model_construct(x=x, y=y) for x in range(GRID_SIZE) for y in range(GRID_SIZE)
+]
+_NEXT_CELL = [
+    tuple(
+        (x + dx) % GRID_SIZE * GRID_SIZE + (y + dy) % GRID_SIZE for dx, dy in _STEPS
+    )
+    for x in range(GRID_SIZE)
+    for y in range(GRID_SIZE)
+]
+_CHAIN_BYTES = [(b >> 6, b >> 4 & 3, b >> 2 & 3, b & 3) for b in range(256)]
+
+_U16 = struct.Struct("!H")
+_U32 = struct.Struct("!I")
+_I64 = struct.Struct("!q")
+_HEADER = struct.Struct("!BI")
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def cell(x: int, y: int) -> Position:
+    """Shared, read-only Position for a grid cell"""
+    return _CELLS[x * GRID_SIZE + y]
+
+
+class _Reader:
+    """Cursor over an encoded buffer"""
+
+    def __init__(self, data: bytes):
+        self.data = memoryview(data)
+        self.offset = 0
+
+    def u8(self) -> int:
+        value = self.data[self.offset]
+        self.offset += 1
+        return value
+
+    def unpack(self, fmt: struct.Struct) -> int:
+        (value,) = fmt.unpack_from(self.data, self.offset)
+        self.offset += fmt.size
+        return value
+
+    def text(self) -> str:
+        length = self.u8()
+        value = str(self.data[self.offset:self.offset + length], "utf-8")
+        self.offset += length
+        return value
+
+    def cell_index(self) -> int:
+        x, y = self.data[self.offset], self.data[self.offset + 1]
+        self.offset += 2
+        if x >= GRID_SIZE or y >= GRID_SIZE:
+            raise ValueError(f"Cell ({x}, {y}) is outside the grid")
+        return x * GRID_SIZE + y
+
+    def cell(self) -> Position:
+        return _CELLS[self.cell_index()]
+
+
+def _write_text(out: bytearray, value: str) -> None:
+    encoded = value.encode("utf-8")
+    if len(encoded) > 255:
+        raise ValueError("Identifiers longer than 255 bytes can't be encoded")
+    out.append(len(encoded))
+    out += encoded
+
+
+def _steps(snake: list[Position]) -> list[int] | None:
+    """Step codes between consecutive segments, or None if not contiguous"""
+    xs = [cell.x for cell in snake]
+    ys = [cell.y for cell in snake]
+    codes = [
+        _STEP_TABLE[(bx - ax) % GRID_SIZE * GRID_SIZE + (by - ay) % GRID_SIZE]
+        for ax, bx, ay, by in zip(xs, xs[1:], ys, ys[1:])
+    ]
+    return None if -1 in codes else codes
+
+
+def _runs(steps: list[int]) -> list[tuple[int, int]]:
+    runs: list[tuple[int, int]] = []
+    for code, group in itertools.groupby(steps):
+        length = len(list(group))
+        while length > _MAX_RUN:
+            runs.append((code, _MAX_RUN))
+            length -= _MAX_RUN
+        runs.append((code, length))
+    return runs
+
+
+def encode_snake(snake: list[Position], out: bytearray | None = None) -> bytearray:
+    """Append the smallest encoding of ``snake`` to ``out``"""
+    out = bytearray() if out is None else out
+    steps = _steps(snake) if snake else None
+    if not steps:
+        out.append(SNAKE_CELLS)
+        out += _U16.pack(len(snake))
+        for cell in snake:
+            out.append(cell.x)
+            out.append(cell.y)
+        return out
+
+    # Runs are counted without building them; very long runs split later
+    run_count = 1 + sum(map(operator.ne, steps, steps[1:]))
+    kind = SNAKE_RUNS if run_count < (len(steps) + 3) // 4 else SNAKE_CHAIN
+    out.append(kind)
+    out += _U16.pack(len(snake))
+    out.append(snake[0].x)
+    out.append(snake[0].y)
+    if kind == SNAKE_RUNS:
+        out += bytes([code << 6 | (length - 1) for code, length in _runs(steps)])
+    else:
+        padded = steps + [0] * (-len(steps) % 4)
+        quads = zip(*[iter(padded)] * 4)
+        out += bytes([a << 6 | b << 4 | c << 2 | d for a, b, c, d in quads])
+    return out
+
+
+def _read_snake(reader: _Reader) -> list[Position]:
+    kind = reader.u8()
+    length = reader.unpack(_U16)
+    if kind == SNAKE_CELLS:
+        return [reader.cell() for _ in range(length)]
+    if length == 0:
+        return []
+
+    index = reader.cell_index()
+    if kind == SNAKE_CHAIN:
+        end = reader.offset + (length + 2) // 4
+        codes = [
+            code for byte in reader.data[reader.offset:end] for code in _CHAIN_BYTES[byte]
+        ][:length - 1]
+        reader.offset = end
+    elif kind == SNAKE_RUNS:
+        codes = []
+        while len(codes) < length - 1:
+            byte = reader.u8()
+            codes += [byte >> 6] * ((byte & 0x3F) + 1)
+    else:
+        raise ValueError(f"Unknown snake encoding {kind}")
+
+    snake = [_CELLS[index]]
+    for code in codes:
+        index = _NEXT_CELL[index][code]
+        snake.append(_CELLS[index])
+    return snake
+
+
+def decode_snake(data: bytes) -> list[Position]:
+    """Inverse of ``encode_snake``"""
+    return _read_snake(_Reader(data))
+
+
+def _write_player(out: bytearray, player: ActivePlayer) -> None:
+    _write_text(out, player.id)
+    _write_text(out, player.username)
+    out += _U32.pack(player.score)
+
+    flags = _DIRECTION_CODES[player.direction] << 4
+    if player.mode == "pass-through":
+        flags |= _FLAG_PASS_THROUGH
+    if player.is_game_over:
+        flags |= _FLAG_GAME_OVER
+    started_at = player.started_at
+    if started_at is not None:
+        flags |= _FLAG_STARTED_AT
+    out.append(flags)
+    if started_at is not None:
+        if started_at.tzinfo is None:
+            started_at = started_at.replace(tzinfo=timezone.utc)
+        out += _I64.pack((started_at - _EPOCH) // _MICROSECOND)
+
+    out.append(player.food.x)
+    out.append(player.food.y)
+    encode_snake(player.snake, out)
+
+
+def _read_player(reader: _Reader) -> ActivePlayer:
+    player_id = reader.text()
+    username = reader.text()
+    score = reader.unpack(_U32)
+    flags = reader.u8()
+    started_at = None
+    if flags & _FLAG_STARTED_AT:
+        started_at = _EPOCH + reader.unpack(_I64) * _MICROSECOND
+    food = reader.cell()
+    return ActivePlayer.model_construct(
+        id=player_id,
+        username=username,
+        score=score,
+        mode="pass-through" if flags & _FLAG_PASS_THROUGH else "walls",
+        snake=_read_snake(reader),
+        food=food,
+        is_game_over=bool(flags & _FLAG_GAME_OVER),
+        direction=_DIRECTIONS[flags >> 4 & 7],
+        started_at=started_at,
+    )
+
+
+def encode_player(player: ActivePlayer) -> bytes:
+    """Binary record for one player"""
+    out = bytearray()
+    _write_player(out, player)
+    return bytes(out)
+
+
+def decode_player(data: bytes) -> ActivePlayer:
+    """Inverse of ``encode_player``"""
+    return _read_player(_Reader(data))
+
+
+def encode_players(players: list[ActivePlayer]) -> bytes:
+    """u16 count followed by player records"""
+    out = bytearray(_U16.pack(len(players)))
+    for player in players:
+        _write_player(out, player)
+    return bytes(out)
+
+
+def decode_players(data: bytes) -> list[ActivePlayer]:
+    """Inverse of ``encode_players``"""
+    reader = _Reader(data)
+    return [_read_player(reader) for _ in range(reader.unpack(_U16))]
+
+
+def _write_delta(out: bytearray, delta: PlayerDelta) -> None:
+    _write_text(out, delta.id)
+    mask = 0
+    for bit, value in (
+        (_DELTA_HEADS, delta.heads),
+        (_DELTA_POP, delta.pop),
+        (_DELTA_SNAKE, delta.snake),
+        (_DELTA_SCORE, delta.score),
+        (_DELTA_FOOD, delta.food),
+        (_DELTA_DIRECTION, delta.direction),
+    ):
+        if value is not None:
+            mask |= bit
+    out.append(mask)
+
+    if delta.heads is not None:
+        out.append(len(delta.heads))
+        for cell in delta.heads:
+            out.append(cell.x)
+            out.append(cell.y)
+    if delta.pop is not None:
+        out += _U16.pack(delta.pop)
+    if delta.snake is not None:
+        encode_snake(delta.snake, out)
+    if delta.score is not None:
+        out += _U32.pack(delta.score)
+    if delta.food is not None:
+        out.append(delta.food.x)
+        out.append(delta.food.y)
+    if delta.direction is not None:
+        out.append(_DIRECTION_CODES[delta.direction])
+
+
+def _read_delta(reader: _Reader) -> PlayerDelta:
+    player_id = reader.text()
+    mask = reader.u8()
+    fields = {}
+    if mask & _DELTA_HEADS:
+        fields["heads"] = [reader.cell() for _ in range(reader.u8())]
+    if mask & _DELTA_POP:
+        fields["pop"] = reader.unpack(_U16)
+    if mask & _DELTA_SNAKE:
+        fields["snake"] = _read_snake(reader)
+    if mask & _DELTA_SCORE:
+        fields["score"] = reader.unpack(_U32)
+    if mask & _DELTA_FOOD:
+        fields["food"] = reader.cell()
+    if mask & _DELTA_DIRECTION:
+        fields["direction"] = _DIRECTIONS[reader.u8()]
+    return PlayerDelta.model_construct(id=player_id, **fields)
+
+
+def encode_frame(frame: PlayersFrame | PlayerFrame | DeltaFrame) -> bytes:
+    """Binary form of a spectate stream frame"""
+    if isinstance(frame, PlayersFrame):
+        out = bytearray(_HEADER.pack(FRAME_PLAYERS, frame.seq))
+        out += _U16.pack(len(frame.players))
+        for player in frame.players:
+            _write_player(out, player)
+    elif isinstance(frame, PlayerFrame):
+        out = bytearray(_HEADER.pack(FRAME_PLAYER, frame.seq))
+        out.append(frame.player is not None)
+        if frame.player is not None:
+            _write_player(out, frame.player)
+    else:
+        out = bytearray(_HEADER.pack(FRAME_DELTA, frame.seq))
+        out += _U16.pack(len(frame.removed))
+        for player_id in frame.removed:
+            _write_text(out, player_id)
+        out += _U16.pack(len(frame.added))
+        for player in frame.added:
+            _write_player(out, player)
+        out += _U16.pack(len(frame.players))
+        for delta in frame.players:
+            _write_delta(out, delta)
+    return bytes(out)
+
+
+def decode_frame(data: bytes) -> PlayersFrame | PlayerFrame | DeltaFrame:
+    """Inverse of ``encode_frame``"""
+    reader = _Reader(data)
+    kind, seq = _HEADER.unpack_from(reader.data)
+    reader.offset = _HEADER.size
+    if kind == FRAME_PLAYERS:
+        players = [_read_player(reader) for _ in range(reader.unpack(_U16))]
+        return PlayersFrame.model_construct(type="players", seq=seq, players=players)
+    if kind == FRAME_PLAYER:
+        player = _read_player(reader) if reader.u8() else None
+        return PlayerFrame.model_construct(type="player", seq=seq, player=player)
+    if kind == FRAME_DELTA:
+        removed = [reader.text() for _ in range(reader.unpack(_U16))]
+        added = [_read_player(reader) for _ in range(reader.unpack(_U16))]
+        deltas = [_read_delta(reader) for _ in range(reader.unpack(_U16))]
+        return DeltaFrame.model_construct(
+            type="delta", seq=seq, players=deltas, added=added, removed=removed
+        )
+    raise ValueError(f"Unknown frame type {kind}")
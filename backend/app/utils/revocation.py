@@ -0,0 +1,210 @@
+"""In-process token revocation filter"""
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app import crud
+from app.config import settings
+from app.invalidation import BUS_RESET, TOKEN_REVOKED, invalidation_bus
+from app.utils.timing_wheel import TimingWheel
+
+logger = logging.getLogger(__name__)
+
+
+def token_fingerprint(token: str, payload: dict | None = None) -> bytes:
+    """Fixed-size key for a revoked token.
+
+    Tokens carry a ``jti`` claim; legacy tokens issued without one are keyed
+    by a digest of the whole token instead.
+    """
+    jti = payload.get("jti") if payload else None
+    return hashlib.sha256((jti or token).encode("utf-8")).digest()
+
+
+class BloomFilter:
+    """Bit-array Bloom filter over 32-byte fingerprints"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = max(capacity, 1)
+        self.error_rate = error_rate
+        self.num_bits = max(
+            64, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2))
+        )
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, fingerprint: bytes):
+        # Double hashing over two 64-bit halves of the (already uniform) digest
+        h1 = int.from_bytes(fingerprint[:8], "little")
+        h2 = int.from_bytes(fingerprint[8:16], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, fingerprint: bytes) -> None:
+        for pos in self._positions(fingerprint):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, fingerprint: bytes) -> bool:
+        return all(
+            self._bits[pos >> 3] & (1 << (pos & 7))
+            for pos in self._positions(fingerprint)
+        )
+
+
+class RevocationFilter:
+    """Bloom filter plus exact set of revoked fingerprints, expired by a timing wheel.
+
+    A Bloom miss proves a token was never revoked in this process, so callers
+    can skip the database entirely. A hit is confirmed against the exact set;
+    only a hit that the exact set cannot explain (a false positive) needs the
+    database. Entries leave the exact set when their token expires and the
+    Bloom filter is rebuilt from what remains.
+
+    With several workers, tokens revoked elsewhere arrive over the
+    invalidation bus, which may drop messages. ``run_sync`` therefore
+    re-reads recently blacklisted tokens every ``interval`` seconds, and
+    at once after a ``BUS_RESET``; until that sync has caught up the
+    filter is ``stale`` and answers None instead of False, so callers ask
+    the database.
+    """
+
+    def __init__(self, capacity: int, error_rate: float, wheel_resolution: float = 60.0):
+        self.error_rate = error_rate
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._revoked: dict[bytes, float] = {}
+        self._wheel = TimingWheel(resolution=wheel_resolution, slots=1440)
+        self.loaded = False
+        self.stale = False
+        self.synced_at: datetime | None = None
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    def add(self, fingerprint: bytes, expires_at: datetime) -> None:
+        """Record a revoked token until it expires"""
+        if expires_at.tzinfo is None:
+            # SQLite hands back naive datetimes; they are stored as UTC
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        deadline = expires_at.timestamp()
+        self._revoked[fingerprint] = deadline
+        self._wheel.schedule(fingerprint, deadline)
+        if len(self._revoked) > self._bloom.capacity:
+            self._rebuild(capacity=self._bloom.capacity * 2)
+        else:
+            self._bloom.add(fingerprint)
+
+    def check(self, fingerprint: bytes) -> bool | None:
+        """Return False if definitely not revoked, True if revoked, None if unsure"""
+        self.expire()
+        if fingerprint not in self._bloom:
+            return None if self.stale else False
+        if fingerprint in self._revoked:
+            return True
+        return None
+
+    def expire(self, now: float | None = None) -> int:
+        """Drop expired entries; returns how many were removed"""
+        expired = self._wheel.advance(time.time() if now is None else now)
+        for fingerprint in expired:
+            self._revoked.pop(fingerprint, None)
+        if expired:
+            self._rebuild(capacity=self._bloom.capacity)
+        return len(expired)
+
+    def _rebuild(self, capacity: int) -> None:
+        self._bloom = BloomFilter(capacity, self.error_rate)
+        for fingerprint in self._revoked:
+            self._bloom.add(fingerprint)
+
+    def clear(self) -> None:
+        """Forget every entry (the next check reloads from the database)"""
+        self._revoked.clear()
+        self._wheel.clear()
+        self._rebuild(capacity=self._bloom.capacity)
+        self.loaded = False
+
+    async def load(self, db: AsyncSession) -> None:
+        """Populate the filter from unexpired blacklist rows"""
+        started = datetime.now(timezone.utc)
+        for token_hash, expires_at in await crud.token_blacklist.get_unexpired_tokens(db):
+            self.add(token_hash, expires_at)
+        self.synced_at = started
+        self.loaded = True
+
+    async def sync(self, db: AsyncSession, overlap: float = 5.0) -> int:
+        """Add tokens blacklisted since the last load or sync; returns how many.
+
+        Reads back ``overlap`` seconds before the last sync, for revocations
+        committed late or stamped by a worker whose clock runs behind.
+        """
+        if self.synced_at is None:
+            await self.load(db)
+            return len(self)
+        # Only a sync started while the bus was up can vouch for what follows
+        healthy = invalidation_bus.healthy
+        started = datetime.now(timezone.utc)
+        since = self.synced_at - timedelta(seconds=overlap)
+        rows = await crud.token_blacklist.get_tokens_revoked_since(db, since)
+        for token_hash, expires_at in rows:
+            self.add(token_hash, expires_at)
+        self.synced_at = started
+        if healthy and not self._wake.is_set():
+            # A reset during this read is covered by the next sync, not this one
+            self.stale = False
+        return len(rows)
+
+    def request_sync(self) -> None:
+        """Distrust misses until the next sync, and run it now"""
+        self.stale = True
+        self._wake.set()
+
+    def start(self, session_factory: async_sessionmaker[AsyncSession], interval: float) -> None:
+        """Start the periodic sync loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop(session_factory, interval), name="revocation-sync")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self, session_factory: async_sessionmaker[AsyncSession], interval: float) -> None:
+        while True:
+            try:
+                async with asyncio.timeout(interval):
+                    await self._wake.wait()
+            except TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                async with session_factory() as db:
+                    await self.sync(db, overlap=interval)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Revocation filter sync failed")
+
+
+revocation_filter = RevocationFilter(
+    capacity=settings.token_revocation_filter_capacity,
+    error_rate=settings.token_revocation_filter_error_rate,
+)
+
+
+def _on_token_revoked(message: dict) -> None:
+    revocation_filter.add(
+        bytes.fromhex(message["fingerprint"]),
+        datetime.fromtimestamp(message["expires_at"], timezone.utc),
+    )
+
+
+invalidation_bus.subscribe(TOKEN_REVOKED, _on_token_revoked)
+invalidation_bus.subscribe(BUS_RESET, lambda message: revocation_filter.request_sync())
@@ -0,0 +1,79 @@
+"""Hashed timing wheel for cheap bulk expiry"""
+import math
+from collections.abc import Hashable
+
+
+class TimingWheel:
+    """Buckets keys by deadline so expiry only touches due buckets.
+
+    Deadlines are plain floats (epoch seconds or a monotonic clock, as long as
+    callers are consistent). Each bucket covers ``resolution`` seconds and the
+    wheel wraps after ``slots`` buckets; keys further out simply stay in their
+    bucket until a later lap reaches their deadline. Advancing costs one
+    bucket visit per elapsed tick plus the keys found there, independent of
+    how many keys are scheduled overall.
+    """
+
+    def __init__(self, resolution: float, slots: int):
+        self.resolution = resolution
+        self.slots = slots
+        self._buckets: list[dict[Hashable, float]] = [{} for _ in range(slots)]
+        self._slot_of: dict[Hashable, int] = {}
+        self._current_tick: int | None = None
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._slot_of
+
+    def _tick(self, when: float) -> int:
+        return math.floor(when / self.resolution)
+
+    def schedule(self, key: Hashable, deadline: float) -> None:
+        """Schedule (or reschedule) ``key`` to expire at ``deadline``"""
+        self.cancel(key)
+        tick = self._tick(deadline)
+        if self._current_tick is not None and tick < self._current_tick:
+            # Already overdue: park it where the next advance will look
+            tick = self._current_tick
+        slot = tick % self.slots
+        self._buckets[slot][key] = deadline
+        self._slot_of[key] = slot
+
+    def cancel(self, key: Hashable) -> bool:
+        """Remove ``key`` from the wheel; returns whether it was scheduled"""
+        slot = self._slot_of.pop(key, None)
+        if slot is None:
+            return False
+        del self._buckets[slot][key]
+        return True
+
+    def advance(self, now: float) -> list[Hashable]:
+        """Expire and return every key whose deadline is at or before ``now``"""
+        target = self._tick(now)
+        if self._current_tick is None:
+            # First call: sweep every bucket once
+            self._current_tick = target - self.slots
+        # The current bucket is revisited: it may hold keys due later this tick
+        start = max(self._current_tick, target - self.slots + 1)
+        self._current_tick = target
+
+        expired: list[Hashable] = []
+        for tick in range(start, target + 1):
+            bucket = self._buckets[tick % self.slots]
+            if not bucket:
+                continue
+            due = [key for key, deadline in bucket.items() if deadline <= now]
+            for key in due:
+                del bucket[key]
+                del self._slot_of[key]
+            expired.extend(due)
+        return expired
+
+    def clear(self) -> None:
+        """Drop every scheduled key"""
+        for bucket in self._buckets:
+            bucket.clear()
+        self._slot_of.clear()
+        self._current_tick = None
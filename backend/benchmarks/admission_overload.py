@@ -0,0 +1,92 @@
+"""Benchmark: request latency under overload, with and without admission control
+
+Runs ``--clients`` concurrent clients in closed loops for ``--seconds``
+against an app whose handler holds one of ``--pool`` database connections
+for ``--query-ms``, i.e. more load than the pool can serve; a refused
+client pauses ``--backoff-ms`` before its next request. Reports the
+p50/p99 latency of successful responses, their throughput and how many
+requests were refused, once with every request let through and once
+behind ``AdmissionControl``.
+
+Usage:
+    uv run python -m benchmarks.admission_overload [--clients 200] [--pool 10]
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+
+from app.utils.admission import AdmissionControl, ConcurrencyLimiter  # noqa: E402
+
+
+def slow_db_app(pool: int, query_seconds: float):
+    """An ASGI app whose requests each hold a pooled connection"""
+    connections = asyncio.Semaphore(pool)
+
+    async def app(scope, receive, send):
+        async with connections:
+            await asyncio.sleep(query_seconds)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"[]"})
+
+    return app
+
+
+async def run(app, clients: int, seconds: float, backoff: float) -> tuple[list[float], int]:
+    latencies: list[float] = []
+    refused = 0
+    deadline = time.perf_counter() + seconds
+
+    async def client_loop(client: AsyncClient) -> None:
+        nonlocal refused
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            response = await client.get("/api/v1/leaderboard")
+            if response.status_code == 200:
+                latencies.append(time.perf_counter() - started)
+            else:
+                refused += 1
+                await asyncio.sleep(backoff)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        await asyncio.gather(*(client_loop(client) for _ in range(clients)))
+    return latencies, refused
+
+
+def report(label: str, latencies: list[float], refused: int, seconds: float) -> None:
+    p50 = statistics.median(latencies) * 1000
+    p99 = statistics.quantiles(latencies, n=100)[98] * 1000
+    print(f"{label:<18} p50 {p50:7.1f} ms   p99 {p99:7.1f} ms   "
+          f"{len(latencies) / seconds:6.0f} ok/s   {refused} refused")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--pool", type=int, default=10)
+    parser.add_argument("--query-ms", type=float, default=20.0)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--limit", type=int, default=64, help="Admission limit for reads")
+    parser.add_argument("--target-ms", type=float, default=100.0)
+    parser.add_argument("--backoff-ms", type=float, default=250.0, help="Client pause after a 503")
+    args = parser.parse_args()
+
+    query, backoff = args.query_ms / 1000, args.backoff_ms / 1000
+    latencies, refused = await run(slow_db_app(args.pool, query), args.clients, args.seconds, backoff)
+    report("no admission", latencies, refused, args.seconds)
+
+    limiter = ConcurrencyLimiter("reads", max_limit=args.limit, target_latency=args.target_ms / 1000, queue_timeout=0.25)
+    app = AdmissionControl(slow_db_app(args.pool, query), {"reads": limiter}, prefix="/api/v1")
+    latencies, refused = await run(app, args.clients, args.seconds, backoff)
+    report("admission control", latencies, refused, args.seconds)
+    print(f"{'':<18} limit settled at {limiter.limit:.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
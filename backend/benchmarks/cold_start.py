@@ -0,0 +1,84 @@
+"""Benchmark: time from process start to the first successful responses
+
+Starts ``uvicorn main:app`` as a fresh process ``--runs`` times with the
+default startup and with ``LAZY_STARTUP=true``. Reports the median time
+from spawning the process until the server first answers at all (lazy
+startup answers a 503 "starting" at once), until ``/health`` answers 200
+and until the leaderboard answers 200, plus the startup breakdown the app
+logged. ``--no-bytecode`` starts every run without compiled bytecode, as
+a fresh container does when its image ships none.
+
+Usage:
+    uv run python -m benchmarks.cold_start [--runs 5] [--port 8765] [--no-bytecode]
+"""
+import argparse
+import http.client
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+
+def wait_for(port: int, path: str, deadline: float, any_status: bool = False) -> float:
+    """Poll until ``path`` answers 200, or anything with ``any_status``;
+    returns the time it did"""
+    while time.perf_counter() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", path)
+            status = conn.getresponse().status
+            if any_status or status == 200:
+                return time.perf_counter()
+        except OSError:
+            pass
+        time.sleep(0.002)
+    raise TimeoutError(f"{path} did not answer in time")
+
+
+def cold_start(port: int, lazy: bool, bytecode: bool) -> tuple[float, float, float, str]:
+    env = {**os.environ, "LAZY_STARTUP": str(lazy).lower(), "MAINTENANCE_ENABLED": "false"}
+    if not bytecode:
+        # Read .pyc files from, and write them to, an empty directory only
+        env |= {"PYTHONPYCACHEPREFIX": tempfile.mkdtemp(prefix="no-pyc-"), "PYTHONDONTWRITEBYTECODE": "1"}
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "info"],
+        cwd=BACKEND,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        bound = wait_for(port, "/health", started + 30, any_status=True) - started
+        health = wait_for(port, "/health", started + 30) - started
+        ready = wait_for(port, "/api/v1/leaderboard?limit=1", started + 30) - started
+    finally:
+        server.terminate()
+        _, log = server.communicate(timeout=10)
+    breakdown = next((line.split("Startup: ", 1)[1] for line in log.splitlines() if "Startup: " in line), "")
+    return bound, health, ready, breakdown
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--no-bytecode", action="store_true", help="Start without compiled bytecode")
+    args = parser.parse_args()
+
+    for lazy in (False, True):
+        results = [cold_start(args.port, lazy, not args.no_bytecode) for _ in range(args.runs)]
+        bound, health, ready = (statistics.median(r[i] for r in results) for i in range(3))
+        print(f"{'lazy' if lazy else 'default':<8} first answer {bound * 1000:6.0f} ms   "
+              f"/health 200 {health * 1000:6.0f} ms   leaderboard {ready * 1000:6.0f} ms")
+        print(f"         {results[-1][3]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Benchmark: game ticks per second per core for the server-side engine
+
+Runs ``--games`` concurrent games in one ``GameBatch`` on a single thread,
+turning a random tenth of the snakes each tick and restarting games as
+they end so the population stays constant. Reports game-ticks per second,
+the time one tick of the whole batch takes, and how many games fit in a
+tick at ``--tick-rate``. ``rules.update_game`` on the same workload is
+shown for comparison.
+
+Usage:
+    uv run python -m benchmarks.engine_ticks [--games 10000] [--seconds 3.0] [--tick-rate 10]
+"""
+import argparse
+import random
+import sys
+import time
+from dataclasses import replace
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.engine import GameBatch, change_direction, create_initial_state, update_game  # noqa: E402
+
+DIRECTIONS = ["UP", "DOWN", "LEFT", "RIGHT"]
+
+
+def run_batch(games: int, seconds: float, rng: random.Random) -> tuple[int, int]:
+    """Game-ticks and whole-batch ticks completed in ``seconds``"""
+    batch = GameBatch(capacity=games, rng=random.Random(1))
+    modes = ["walls", "pass-through"]
+    for i in range(games):
+        batch.add_game(modes[i % 2])
+
+    game_ticks = ticks = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for slot in rng.sample(range(games), games // 10):
+            if not batch.game_over[slot]:
+                batch.change_direction(slot, rng.choice(DIRECTIONS))
+        game_ticks += batch.live_count
+        for slot in batch.step():
+            batch.remove_game(slot)
+            batch.add_game(modes[slot % 2])
+        ticks += 1
+    return game_ticks, ticks
+
+
+def run_rules(games: int, seconds: float, rng: random.Random) -> int:
+    """Game-ticks of ``update_game`` completed in ``seconds``"""
+    modes = ["walls", "pass-through"]
+    states = [create_initial_state(modes[i % 2], rng) for i in range(games)]
+
+    game_ticks = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for i in rng.sample(range(games), games // 10):
+            state = states[i]
+            states[i] = replace(state, direction=change_direction(state.direction, rng.choice(DIRECTIONS)))
+        for i, state in enumerate(states):
+            state = update_game(state, rng)
+            states[i] = create_initial_state(state.mode, rng) if state.is_game_over else state
+        game_ticks += games
+    return game_ticks
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--games", type=int, default=10_000)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--tick-rate", type=float, default=10.0, help="Ticks per second per game")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    game_ticks, ticks = run_batch(args.games, args.seconds, rng)
+    rate = game_ticks / args.seconds
+    print(f"{args.games:,} games, one core, {args.seconds:.1f} s")
+    print(f"  GameBatch     {rate:>12,.0f} game-ticks/s  "
+          f"({args.seconds / ticks * 1000:.2f} ms per batch tick)")
+    print(f"                {rate / args.tick_rate:>12,.0f} games at {args.tick_rate:g} ticks/s")
+
+    rules_rate = run_rules(args.games, args.seconds, rng) / args.seconds
+    print(f"  update_game   {rules_rate:>12,.0f} game-ticks/s  (batch is {rate / rules_rate:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
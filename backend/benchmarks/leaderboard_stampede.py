@@ -0,0 +1,109 @@
+"""Benchmark: a burst of identical /leaderboard/top requests
+
+Runs the app in-process against a throwaway SQLite database holding
+``--scores`` scores and fires ``--clients`` concurrent
+``GET /api/v1/leaderboard/top?mode=walls`` requests in ``--bursts`` waves,
+as at the start of a tournament. Reports the p50/p99 latency and how many
+SELECTs reached the database, once with every request running its own
+queries and once through the single-flight response cache.
+
+Usage:
+    uv run python -m benchmarks.leaderboard_stampede [--clients 300] [--bursts 5]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+_db_dir = tempfile.mkdtemp(prefix="bench-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_db_dir}/bench.db"
+# Measure the cache, not requests shed by admission control
+os.environ["ADMISSION_CONTROL"] = "false"
+
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app import crud  # noqa: E402
+from app.database import AsyncSessionLocal, ReadSessionLocal, close_db, engine, init_db, read_engine  # noqa: E402
+from app.utils import clear_response_caches  # noqa: E402
+from app.utils.cache import top_scores_cache  # noqa: E402
+from main import app  # noqa: E402
+
+selects = 0
+
+
+def count_selects(conn, cursor, statement, parameters, context, executemany):
+    global selects
+    if statement.lstrip().upper().startswith("SELECT"):
+        selects += 1
+
+
+async def seed(scores: int) -> None:
+    await init_db()
+    async with AsyncSessionLocal() as db:
+        await crud.users.create_user(
+            db, user_id="bench-user", username="BenchUser", email="bench@example.com", hashed_password="x"
+        )
+        for score in range(scores):
+            await crud.leaderboard.add_score(db, "bench-user", "BenchUser", score, "walls")
+
+
+async def uncached_get(key, load, pinned=None):
+    """Every request runs its own queries on its own session"""
+    async with ReadSessionLocal() as db:
+        return await load(db)
+
+
+async def stampede(client: AsyncClient, clients: int, bursts: int) -> list[float]:
+    latencies: list[float] = []
+
+    async def request() -> None:
+        started = time.perf_counter()
+        response = await client.get("/api/v1/leaderboard/top", params={"mode": "walls"})
+        latencies.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200
+
+    for _ in range(bursts):
+        await asyncio.gather(*(request() for _ in range(clients)))
+    return latencies
+
+
+def report(label: str, latencies: list[float], queries: int) -> None:
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{label:<10} p50={statistics.median(latencies):7.1f} ms  p99={p99:7.1f} ms  selects={queries}")
+
+
+async def main() -> None:
+    global selects
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=300)
+    parser.add_argument("--bursts", type=int, default=5)
+    parser.add_argument("--scores", type=int, default=5000)
+    args = parser.parse_args()
+
+    await seed(args.scores)
+    for target in {engine.sync_engine, read_engine.sync_engine}:
+        event.listen(target, "before_cursor_execute", count_selects)
+
+    cached_get = top_scores_cache.get
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        for label, get in (("uncached", uncached_get), ("cached", cached_get)):
+            clear_response_caches()
+            top_scores_cache.get = get
+            selects = 0
+            latencies = await stampede(client, args.clients, args.bursts)
+            report(label, latencies, selects)
+
+    top_scores_cache.get = cached_get
+    await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
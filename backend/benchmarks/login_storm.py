@@ -0,0 +1,102 @@
+"""Benchmark: /leaderboard/top latency during a login storm
+
+Runs the app in-process against a throwaway SQLite database and measures
+p50/p99 latency of ``GET /api/v1/leaderboard/top`` while a burst of logins is
+in flight, once with bcrypt inline on the event loop and once on the
+hashing pool.
+
+Usage:
+    uv run python -m benchmarks.login_storm [--logins 40] [--workers 4]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+_db_dir = tempfile.mkdtemp(prefix="bench-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_db_dir}/bench.db"
+# Measure the hashing pool itself, not requests shed before reaching it
+os.environ["ADMISSION_CONTROL"] = "false"
+
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+
+from app import crud  # noqa: E402
+from app.database import AsyncSessionLocal, close_db, init_db  # noqa: E402
+from app.utils import get_password_hash  # noqa: E402
+from app.utils.hashing import password_hash_pool  # noqa: E402
+from main import app  # noqa: E402
+
+EMAIL = "bench@example.com"
+PASSWORD = "password123"
+
+
+async def seed() -> None:
+    """Create the benchmark user and a few scores"""
+    await init_db()
+    async with AsyncSessionLocal() as db:
+        await crud.users.create_user(
+            db,
+            user_id="bench-user",
+            username="BenchUser",
+            email=EMAIL,
+            hashed_password=get_password_hash(PASSWORD),
+        )
+        for score in range(50):
+            await crud.leaderboard.add_score(db, "bench-user", "BenchUser", score, "walls")
+
+
+async def run_storm(client: AsyncClient, logins: int) -> list[float]:
+    """Fire ``logins`` concurrent logins and sample reads until they finish"""
+    latencies: list[float] = []
+
+    async def login() -> None:
+        await client.post("/api/v1/auth/login", json={"email": EMAIL, "password": PASSWORD})
+
+    storm = asyncio.gather(*(login() for _ in range(logins)))
+    while not storm.done():
+        start = time.perf_counter()
+        response = await client.get("/api/v1/leaderboard/top?limit=10")
+        latencies.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200
+    await storm
+    return latencies
+
+
+def report(label: str, latencies: list[float]) -> None:
+    """Print latency percentiles"""
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f"{label:<10} samples={len(latencies):<5} "
+        f"p50={statistics.median(latencies):7.1f} ms  p99={p99:7.1f} ms  "
+        f"max={latencies[-1]:7.1f} ms"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    await seed()
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        for label, workers in (("inline", 0), ("pool", args.workers)):
+            password_hash_pool.shutdown()
+            password_hash_pool.max_workers = workers
+            # Generous queue timeout so the storm is measured, not shed
+            password_hash_pool.queue_timeout = 60.0
+            report(label, await run_storm(client, args.logins))
+
+    password_hash_pool.shutdown()
+    await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
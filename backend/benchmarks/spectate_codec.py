@@ -0,0 +1,118 @@
+"""Benchmark: JSON vs packed binary encoding of spectate state
+
+Encodes and decodes the same active player lists and stream frames with
+the JSON path used by the API (pydantic serializer / validator) and with
+``app.utils.codec``, and reports bytes per payload and operations per
+second for each.
+
+Usage:
+    uv run python -m benchmarks.spectate_codec [--players 12] [--seconds 1.0]
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pydantic import TypeAdapter  # noqa: E402
+
+from app.schemas import ActivePlayer, PlayersFrame, Position  # noqa: E402
+from app.services.spectate_delta import diff_players  # noqa: E402
+from app.utils import codec  # noqa: E402
+
+PLAYERS = TypeAdapter(list[ActivePlayer])
+
+
+def random_snake(length: int, rng: random.Random) -> list[Position]:
+    """A contiguous snake built by a random walk that turns now and then"""
+    x, y = rng.randint(0, 19), rng.randint(0, 19)
+    dx, dy = 1, 0
+    snake = [Position(x=x, y=y)]
+    for _ in range(length - 1):
+        if rng.random() < 0.2:
+            dx, dy = rng.choice([(dy, dx), (-dy, -dx)])
+        x, y = (x + dx) % 20, (y + dy) % 20
+        snake.append(Position(x=x, y=y))
+    return snake
+
+
+def make_players(count: int, rng: random.Random) -> list[ActivePlayer]:
+    return [
+        ActivePlayer(
+            id=f"p{i}",
+            username=f"Player{i}",
+            score=rng.randint(0, 500),
+            mode=rng.choice(["walls", "pass-through"]),
+            snake=random_snake(rng.randint(3, 60), rng),
+            food={"x": rng.randint(0, 19), "y": rng.randint(0, 19)},
+            direction="RIGHT",
+            started_at=datetime.now(timezone.utc),
+        )
+        for i in range(count)
+    ]
+
+
+def rate(func, seconds: float) -> float:
+    """Calls per second of ``func`` over roughly ``seconds``"""
+    calls = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            func()
+        calls += 100
+    return calls / (time.perf_counter() - start)
+
+
+def report(name: str, json_bytes: bytes, binary_bytes: bytes, rates: dict[str, float]) -> None:
+    print(
+        f"{name:<14} {len(json_bytes):>7,} B json  {len(binary_bytes):>6,} B binary "
+        f"({len(json_bytes) / len(binary_bytes):4.1f}x smaller)"
+    )
+    for label, value in rates.items():
+        print(f"    {label:<16} {value:>10,.0f} ops/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--players", type=int, default=12)
+    parser.add_argument("--seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    players = make_players(args.players, rng)
+
+    json_list = PLAYERS.dump_json(players)
+    binary_list = codec.encode_players(players)
+    report("player list", json_list, binary_list, {
+        "json encode": rate(lambda: PLAYERS.dump_json(players), args.seconds),
+        "binary encode": rate(lambda: codec.encode_players(players), args.seconds),
+        "json decode": rate(lambda: PLAYERS.validate_json(json_list), args.seconds),
+        "binary decode": rate(lambda: codec.decode_players(binary_list), args.seconds),
+    })
+
+    keyframe = PlayersFrame(seq=1, players=players)
+    moved = {
+        p.id: p.model_copy(update={"snake": [Position(x=(p.snake[0].x + 1) % 20, y=p.snake[0].y)] + p.snake[:-1]})
+        for p in players
+    }
+    delta = diff_players({p.id: p for p in players}, moved, seq=2)
+    for name, frame, exclude_none in (("keyframe", keyframe, False), ("delta frame", delta, True)):
+        json_frame = frame.__pydantic_serializer__.to_json(frame, exclude_none=exclude_none)
+        binary_frame = codec.encode_frame(frame)
+        report(name, json_frame, binary_frame, {
+            "json encode": rate(
+                lambda: frame.__pydantic_serializer__.to_json(frame, exclude_none=exclude_none),
+                args.seconds,
+            ),
+            "binary encode": rate(lambda: codec.encode_frame(frame), args.seconds),
+            "json decode": rate(lambda: type(frame).model_validate_json(json_frame), args.seconds),
+            "binary decode": rate(lambda: codec.decode_frame(binary_frame), args.seconds),
+        })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Benchmark: spectate frame fan-out to many subscribers on one core
+
+Compares encoding the frame separately for every viewer against encoding it
+once per channel and publishing the same bytes through the Broadcaster.
+Subscribers are simulated connections whose send appends the buffer to an
+in-memory transport, so the numbers isolate server-side CPU cost. A second
+run stalls a share of the transports to show that their queues stay bounded
+while healthy subscribers keep up.
+
+Usage:
+    uv run python -m benchmarks.spectate_fanout [--subscribers 10000] [--ticks 50] [--stalled 0.1]
+"""
+import argparse
+import asyncio
+import random
+import resource
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.schemas import ActivePlayer, PlayersFrame  # noqa: E402
+from app.services.broadcaster import Broadcaster, Frame  # noqa: E402
+
+
+class FakeTransport:
+    """Stands in for a socket: keeps a reference to what was written"""
+
+    def __init__(self):
+        self.frames = 0
+        self.bytes = 0
+
+    async def send(self, data: bytes) -> None:
+        self.frames += 1
+        self.bytes += len(data)
+
+
+class StalledTransport(FakeTransport):
+    """A client that stopped reading: the first write never completes"""
+
+    async def send(self, data: bytes) -> None:
+        await asyncio.Event().wait()
+
+
+def make_players(count: int, rng: random.Random) -> list[ActivePlayer]:
+    """Active players with snakes of varying length"""
+    players = []
+    for i in range(count):
+        length = rng.randint(3, 40)
+        y = rng.randint(0, 19)
+        snake = [{"x": (10 + j) % 20, "y": (y + (10 + j) // 20) % 20} for j in range(length)]
+        players.append(
+            ActivePlayer(
+                id=f"p{i}",
+                username=f"Player{i}",
+                score=length * 10,
+                mode="walls",
+                snake=snake,
+                food={"x": rng.randint(0, 19), "y": rng.randint(0, 19)},
+                direction="RIGHT",
+                started_at=datetime.now(timezone.utc),
+            )
+        )
+    return players
+
+
+def encode(players: list[ActivePlayer]) -> bytes:
+    frame = PlayersFrame(players=players)
+    return frame.__pydantic_serializer__.to_json(frame)
+
+
+async def per_viewer(players, transports, ticks) -> float:
+    """Baseline: every viewer gets its own encoding; returns ms per tick"""
+    start = time.perf_counter()
+    for _ in range(ticks):
+        await asyncio.gather(*(t.send(encode(players)) for t in transports))
+    return (time.perf_counter() - start) / ticks * 1000
+
+
+async def drain() -> None:
+    """Let every subscriber writer task run until it blocks again"""
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+async def broadcast(players, transports, ticks) -> tuple[Broadcaster, float, float]:
+    """Encode once per tick and publish; returns (broadcaster, encode ms, fan-out ms)"""
+    broadcaster = Broadcaster(max_queue=4)
+    for t in transports:
+        broadcaster.subscribe("walls", t.send)
+    await drain()
+
+    encode_time = fanout_time = 0.0
+    for seq in range(1, ticks + 1):
+        t0 = time.perf_counter()
+        data = encode(players)
+        t1 = time.perf_counter()
+        broadcaster.publish("walls", Frame(seq, data, data, time.monotonic()))
+        await drain()
+        t2 = time.perf_counter()
+        encode_time += t1 - t0
+        fanout_time += t2 - t1
+    return broadcaster, encode_time / ticks * 1000, fanout_time / ticks * 1000
+
+
+def max_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--subscribers", type=int, default=10_000)
+    parser.add_argument("--players", type=int, default=12)
+    parser.add_argument("--ticks", type=int, default=50)
+    parser.add_argument("--baseline-ticks", type=int, default=3)
+    parser.add_argument("--stalled", type=float, default=0.1, help="Share of stalled clients")
+    args = parser.parse_args()
+
+    players = make_players(args.players, random.Random(7))
+    frame_size = len(encode(players))
+    print(f"{args.subscribers:,} subscribers, {args.players} players, {frame_size:,} B/frame")
+
+    transports = [FakeTransport() for _ in range(args.subscribers)]
+    baseline_ms = await per_viewer(players, transports, args.baseline_ticks)
+    print(f"per-viewer encode    {baseline_ms:9.1f} ms/tick  (max {1000 / baseline_ms:6.1f} ticks/s)")
+
+    transports = [FakeTransport() for _ in range(args.subscribers)]
+    _, encode_ms, fanout_ms = await broadcast(players, transports, args.ticks)
+    total = encode_ms + fanout_ms
+    print(
+        f"encode once + fanout {total:9.1f} ms/tick  (max {1000 / total:6.1f} ticks/s; "
+        f"encode {encode_ms:.3f} ms, fan-out {fanout_ms:.1f} ms = "
+        f"{fanout_ms * 1000 / args.subscribers:.2f} us/subscriber)"
+    )
+    assert all(t.frames == args.ticks for t in transports)
+
+    stalled = int(args.subscribers * args.stalled)
+    transports = [StalledTransport() for _ in range(stalled)]
+    transports += [FakeTransport() for _ in range(args.subscribers - stalled)]
+    rss_before = max_rss_mb()
+    broadcaster, _, fanout_ms = await broadcast(players, transports, args.ticks * 4)
+    subs = [s for _, s in broadcaster.subscribers()]
+    print(
+        f"{stalled:,} stalled clients  {fanout_ms:9.1f} ms/tick  "
+        f"max queue {max(s.queued for s in subs)}, "
+        f"dropped {sum(s.dropped for s in subs):,} frames, "
+        f"max lag {max(s.lag_frames for s in subs)} frames, "
+        f"peak RSS +{max_rss_mb() - rss_before:.1f} MB"
+    )
+    assert all(s.queued <= broadcaster.max_queue for s in subs)
+    assert all(t.frames == args.ticks * 4 for t in transports[stalled:])
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,115 @@
+"""Benchmark: mixed read/write throughput on SQLite, default engine vs profile
+
+Runs ``--clients`` concurrent clients against a throwaway database file for
+``--seconds``. Each operation is a score submission with probability
+``--write-ratio`` and otherwise a leaderboard page plus one user's scores.
+The default setup is one engine with stock settings shared by reads and
+writes; the profile is ``app.database.create_sqlite_engines`` (WAL, tuned
+pragmas, one serialized writer connection and a read-only pool). Reports
+operations per second, p50/p99 latency per kind and failed operations.
+
+Usage:
+    uv run python -m benchmarks.sqlite_profile [--clients 32] [--seconds 5] [--write-ratio 0.2]
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine  # noqa: E402
+
+from app import crud  # noqa: E402
+from app.database import create_sqlite_engines  # noqa: E402
+from app.models.db_models import Base  # noqa: E402
+
+USERS = [f"user-{i}" for i in range(100)]
+
+
+async def prepare(writer: AsyncEngine, rows: int) -> None:
+    async with writer.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session = async_sessionmaker(writer, expire_on_commit=False)
+    rng = random.Random(1)
+    async with session() as db:
+        for _ in range(rows):
+            user = rng.choice(USERS)
+            await crud.leaderboard.add_score(db, user, user, rng.randint(0, 5000), "walls")
+
+
+async def run(writer: AsyncEngine, reader: AsyncEngine, args) -> dict:
+    write_session = async_sessionmaker(writer, expire_on_commit=False)
+    read_session = async_sessionmaker(reader, expire_on_commit=False)
+    latencies: dict[str, list[float]] = {"read": [], "write": []}
+    errors: dict[str, int] = {}
+    deadline = time.perf_counter() + args.seconds
+
+    async def client(seed: int) -> None:
+        rng = random.Random(seed)
+        while time.perf_counter() < deadline:
+            kind = "write" if rng.random() < args.write_ratio else "read"
+            user = rng.choice(USERS)
+            started = time.perf_counter()
+            try:
+                if kind == "write":
+                    async with write_session() as db:
+                        await crud.leaderboard.add_score(db, user, user, rng.randint(0, 5000), "walls")
+                else:
+                    async with read_session() as db:
+                        await crud.leaderboard.get_leaderboard(db, limit=10)
+                        await crud.leaderboard.get_user_scores(db, user)
+            except Exception as e:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+                continue
+            latencies[kind].append(time.perf_counter() - started)
+
+    await asyncio.gather(*(client(i) for i in range(args.clients)))
+    return {"latencies": latencies, "errors": errors}
+
+
+def report(name: str, result: dict, seconds: float) -> None:
+    latencies = result["latencies"]
+    total = sum(len(samples) for samples in latencies.values())
+    print(f"{name:<9} {total / seconds:>8,.0f} ops/s", end="")
+    for kind, samples in latencies.items():
+        if samples:
+            p99 = statistics.quantiles(samples, n=100)[98] if len(samples) > 1 else samples[0]
+            print(f"  {kind} p50 {statistics.median(samples) * 1000:6.1f} ms "
+                  f"p99 {p99 * 1000:7.1f} ms", end="")
+    failed = ", ".join(f"{count} {name}" for name, count in result["errors"].items()) or "none"
+    print(f"  failed: {failed}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--rows", type=int, default=5000, help="Scores seeded before the run")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-") as tmp:
+        url = f"sqlite+aiosqlite:///{tmp}/default.db"
+        engine = create_async_engine(url)
+        await prepare(engine, args.rows)
+        default = await run(engine, engine, args)
+        await engine.dispose()
+
+        writer, reader = create_sqlite_engines(f"sqlite+aiosqlite:///{tmp}/profile.db", read_pool_size=4)
+        await prepare(writer, args.rows)
+        profile = await run(writer, reader, args)
+        await writer.dispose()
+        await reader.dispose()
+
+    print(f"{args.clients} clients, {args.write_ratio:.0%} writes, {args.seconds:g} s")
+    report("default", default, args.seconds)
+    report("profile", profile, args.seconds)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
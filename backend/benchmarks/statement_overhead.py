@@ -0,0 +1,105 @@
+"""Benchmark: Python-side cost per query, statements built per call vs pre-built
+
+Compares building each hot query's ``select`` on every call, as the CRUD
+functions used to, with executing the constants in ``app.crud.statements``.
+Reports two numbers per query: the time to produce a statement and its
+cache key (what the engine needs before it can look up the compiled SQL),
+and the round trip of ``session.execute`` against a small SQLite file,
+where the remaining difference is Python overhead since the database work
+is identical.
+
+Usage:
+    uv run python -m benchmarks.statement_overhead [--iterations 20000]
+"""
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import desc, select  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+
+from app import crud  # noqa: E402
+from app.crud import statements  # noqa: E402
+from app.models.db_models import Base, LeaderboardEntry, User  # noqa: E402
+
+PARAMS = {"user_id": "user-1", "mode": "walls", "limit": 20, "offset": 0}
+
+
+def inline_user_by_id():
+    return select(User).where(User.id == PARAMS["user_id"])
+
+
+def inline_leaderboard_page():
+    return (
+        select(LeaderboardEntry)
+        .where(LeaderboardEntry.mode == PARAMS["mode"])
+        .order_by(desc(LeaderboardEntry.score), LeaderboardEntry.timestamp)
+        .limit(PARAMS["limit"])
+        .offset(PARAMS["offset"])
+    )
+
+
+def inline_user_scores():
+    return (
+        select(LeaderboardEntry)
+        .where(LeaderboardEntry.user_id == PARAMS["user_id"])
+        .where(LeaderboardEntry.mode == PARAMS["mode"])
+        .order_by(desc(LeaderboardEntry.score), LeaderboardEntry.timestamp)
+    )
+
+
+QUERIES = [
+    ("user by id", inline_user_by_id, statements.USER_BY_ID),
+    ("leaderboard page", inline_leaderboard_page, statements.LEADERBOARD_MODE_PAGE),
+    ("user scores", inline_user_scores, statements.USER_MODE_SCORES),
+]
+
+
+def time_per_call(fn, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations
+
+
+async def time_execute(db, make, params, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        result = await db.execute(make(), params)
+        result.scalars().all()
+    return (time.perf_counter() - started) / iterations
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20_000)
+    args = parser.parse_args()
+    n = args.iterations
+
+    print(f"{'':<18}{'build + cache key':>28}{'session.execute':>28}")
+    print(f"{'':<18}{'per call':>14}{'pre-built':>14}{'per call':>14}{'pre-built':>14}")
+    with tempfile.TemporaryDirectory(prefix="bench-") as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp}/statements.db")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+            for i in range(20):
+                await crud.leaderboard.add_score(db, "user-1", "user", i * 10, "walls")
+
+            for name, inline, prebuilt in QUERIES:
+                build = time_per_call(lambda: inline()._generate_cache_key(), n)
+                cached = time_per_call(lambda: prebuilt._generate_cache_key(), n)
+                run = await time_execute(db, inline, None, n // 10)
+                run_cached = await time_execute(db, lambda: prebuilt, PARAMS, n // 10)
+                print(f"{name:<18}{build * 1e6:>11.1f} us{cached * 1e6:>11.1f} us"
+                      f"{run * 1e6:>11.1f} us{run_cached * 1e6:>11.1f} us")
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,127 @@
+"""Benchmark: token_blacklist keyed by full JWT text vs. 32-byte digest
+
+Builds two SQLite databases with the same revoked tokens, one with the
+legacy schema (``token`` Text with a unique constraint and ``idx_token``)
+and one with the digest-keyed schema, then reports on-disk size per table
+and index plus point-lookup latency for hits and misses.
+
+Usage:
+    uv run python -m benchmarks.token_blacklist [--rows 10000000]
+"""
+import argparse
+import base64
+import hashlib
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+LEGACY_SCHEMA = """
+CREATE TABLE token_blacklist (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    token TEXT NOT NULL UNIQUE,
+    blacklisted_at DATETIME NOT NULL,
+    expires_at DATETIME NOT NULL
+);
+CREATE INDEX idx_token ON token_blacklist (token);
+CREATE INDEX idx_expires ON token_blacklist (expires_at);
+"""
+
+DIGEST_SCHEMA = """
+CREATE TABLE token_blacklist (
+    token_hash BLOB NOT NULL PRIMARY KEY,
+    blacklisted_at DATETIME NOT NULL,
+    expires_at DATETIME NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX idx_expires ON token_blacklist (expires_at);
+"""
+
+BATCH_SIZE = 50_000
+TIMESTAMP = "2026-01-01 00:00:00.000000"
+
+
+def fake_jwt(rng: random.Random) -> str:
+    """A token of realistic length (header.payload.signature, ~200 chars)"""
+    parts = (rng.randbytes(27), rng.randbytes(100), rng.randbytes(32))
+    return ".".join(base64.urlsafe_b64encode(p).rstrip(b"=").decode() for p in parts)
+
+
+def build(path: str, schema: str, rows: int, digest: bool, seed: int) -> float:
+    """Create and fill one database; returns seconds spent"""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.executescript("PRAGMA journal_mode=OFF; PRAGMA synchronous=OFF;" + schema)
+    start = time.perf_counter()
+    for offset in range(0, rows, BATCH_SIZE):
+        batch = [fake_jwt(rng) for _ in range(min(BATCH_SIZE, rows - offset))]
+        if digest:
+            conn.executemany(
+                "INSERT INTO token_blacklist VALUES (?, ?, ?)",
+                ((hashlib.sha256(t.encode()).digest(), TIMESTAMP, TIMESTAMP) for t in batch),
+            )
+        else:
+            conn.executemany(
+                "INSERT INTO token_blacklist (token, blacklisted_at, expires_at) VALUES (?, ?, ?)",
+                ((t, TIMESTAMP, TIMESTAMP) for t in batch),
+            )
+        conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+    return time.perf_counter() - start
+
+
+def sizes(path: str) -> dict[str, int]:
+    """Bytes used per table/index (dbstat), or the whole file if unavailable"""
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name").fetchall()
+    except sqlite3.OperationalError:
+        rows = [("<file>", os.path.getsize(path))]
+    conn.close()
+    return dict(rows)
+
+
+def lookups(path: str, digest: bool, samples: int, rows: int, seed: int) -> tuple[float, float]:
+    """Mean microseconds per lookup for (hits, misses)"""
+    rng = random.Random(seed)
+    hits = [fake_jwt(rng) for _ in range(min(samples, rows))]
+    misses = [fake_jwt(random.Random(seed + 1)) for _ in range(samples)]
+    conn = sqlite3.connect(path)
+    if digest:
+        sql = "SELECT 1 FROM token_blacklist WHERE token_hash = ?"
+        key = lambda t: hashlib.sha256(t.encode()).digest()  # noqa: E731
+    else:
+        sql = "SELECT 1 FROM token_blacklist WHERE token = ?"
+        key = lambda t: t  # noqa: E731
+
+    results = []
+    for tokens in (hits, misses):
+        start = time.perf_counter()
+        for token in tokens:
+            conn.execute(sql, (key(token),)).fetchone()
+        results.append((time.perf_counter() - start) / len(tokens) * 1e6)
+    conn.close()
+    return results[0], results[1]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--samples", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-blacklist-")
+    for label, schema, digest in (("text", LEGACY_SCHEMA, False), ("digest", DIGEST_SCHEMA, True)):
+        path = os.path.join(workdir, f"{label}.db")
+        elapsed = build(path, schema, args.rows, digest, args.seed)
+        hit_us, miss_us = lookups(path, digest, args.samples, args.rows, args.seed)
+        print(f"[{label}] {args.rows:,} rows built in {elapsed:.1f}s")
+        for name, size in sorted(sizes(path).items()):
+            print(f"    {name:<40} {size / 2**20:10.1f} MiB")
+        print(f"    lookup hit {hit_us:6.2f} us   miss {miss_us:6.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,69 +1,31 @@
-"""Neon Snake Arena - FastAPI Backend"""
-from contextlib import asynccontextmanager
+"""Neon Snake Arena - FastAPI Backend
 
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
+``app`` is the FastAPI application. With ``LAZY_STARTUP`` it is instead a
+small ASGI app that answers ``/health`` as soon as the server is bound and
+hands everything else to the FastAPI application once that is imported
+and started in the background.
+"""
+import time
 
-from app.config import settings
-from app.database import close_db, init_db
-from app.routers import (
-    auth_router,
-    leaderboard_router,
-    spectate_router,
-    users_router,
-)
+# Taken before the imports below so that they count toward startup time
+_started = time.perf_counter()
 
+from app.config import settings  # noqa: E402
+from app.startup import LazyApp, Startup  # noqa: E402
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """Lifespan context manager for startup and shutdown events"""
-    # Startup
-    await init_db()
-    yield
-    # Shutdown
-    await close_db()
+startup = Startup(started=_started)
 
+if settings.lazy_startup:
+    app = LazyApp(startup)
+else:
+    from app.application import create_app
 
-# Create FastAPI app
-app = FastAPI(
-    title=settings.project_name,
-    version=settings.version,
-    description="Backend API for Neon Snake Arena Online game",
-    lifespan=lifespan,
-)
+    app = create_app(startup)
 
-# Configure CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.cors_origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Include routers
-app.include_router(auth_router, prefix=settings.api_v1_prefix)
-app.include_router(leaderboard_router, prefix=settings.api_v1_prefix)
-app.include_router(spectate_router, prefix=settings.api_v1_prefix)
-app.include_router(users_router, prefix=settings.api_v1_prefix)
-
-
-@app.get("/")
-async def root():
-    """Root endpoint"""
-    return {
-        "message": "Neon Snake Arena API",
-        "version": settings.version,
-        "docs": "/docs",
-    }
-
-
-@app.get("/health")
-async def health():
-    """Health check endpoint"""
-    return {"status": "healthy"}
+startup.mark("imports")
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # More than one worker needs the import string; each worker imports the app
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, workers=settings.web_concurrency)
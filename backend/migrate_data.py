@@ -128,6 +128,7 @@ async def populate_database():
                 player_id=player_id,
                 score=score,
             )
+        await active_players.save_player_states(db)
         print(f"Created {len(mock_active)} active players")
 
     print("Database populated successfully!")
@@ -0,0 +1,130 @@
+"""Tests for admission control"""
+import asyncio
+
+import httpx
+import pytest
+
+from app.utils.admission import AdmissionControl, ConcurrencyLimiter, route_group
+
+
+class TestConcurrencyLimiter:
+    """Test admitting, queueing and adapting the limit"""
+
+    @pytest.mark.asyncio
+    async def test_admits_up_to_limit(self):
+        """Requests beyond the limit wait, then are refused after the queue timeout"""
+        limiter = ConcurrencyLimiter("reads", max_limit=2, target_latency=1.0, queue_timeout=0.02)
+
+        assert await limiter.acquire()
+        assert await limiter.acquire()
+        assert not await limiter.acquire()
+        assert (limiter.in_flight, limiter.queued, limiter.rejected) == (2, 0, 1)
+
+    @pytest.mark.asyncio
+    async def test_released_slot_goes_to_waiter(self):
+        """A waiting request takes the slot before any newcomer"""
+        limiter = ConcurrencyLimiter("writes", max_limit=1, target_latency=1.0, queue_timeout=1.0)
+        await limiter.acquire()
+        waiting = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.queued == 1
+
+        limiter.release(0.01)
+
+        assert await waiting
+        assert limiter.in_flight == 1
+        assert limiter.queued == 0
+
+    @pytest.mark.asyncio
+    async def test_full_queue_refuses_at_once(self):
+        """With ``limit`` requests already waiting, the next is refused without waiting"""
+        limiter = ConcurrencyLimiter("auth", max_limit=1, target_latency=1.0, queue_timeout=1.0)
+        await limiter.acquire()
+        waiting = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+
+        assert not await limiter.acquire()
+
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        assert limiter.queued == 0
+        assert limiter.in_flight == 1
+
+    def test_slow_requests_shrink_limit(self):
+        """A slow request cuts the limit once per target latency, never below the minimum"""
+        limiter = ConcurrencyLimiter("reads", max_limit=10, target_latency=0.25, queue_timeout=0.1)
+        limiter.in_flight = 3
+
+        limiter.release(1.0)
+        limiter.release(1.0)
+        assert limiter.limit == pytest.approx(9.0)
+
+        limiter._last_decrease = 0.0
+        limiter.limit = 1.0
+        limiter.release(1.0)
+        assert limiter.limit == 1.0
+
+    def test_fast_saturated_requests_grow_limit(self):
+        """Fast requests raise the limit only while it is fully used, up to the maximum"""
+        limiter = ConcurrencyLimiter("reads", max_limit=10, target_latency=0.25, queue_timeout=0.1)
+        limiter.limit = 4.0
+
+        limiter.in_flight = 2
+        limiter.release(0.01)
+        assert limiter.limit == 4.0
+
+        limiter.in_flight = 4
+        limiter.release(0.01)
+        assert limiter.limit == pytest.approx(4.25)
+
+        limiter.limit = 10.0
+        limiter.in_flight = 10
+        limiter.release(0.01)
+        assert limiter.limit == 10.0
+
+
+class TestRouteGroup:
+    """Test which limiter a request goes through"""
+
+    @pytest.mark.parametrize("method,path,group", [
+        ("GET", "/api/v1/leaderboard", "reads"),
+        ("HEAD", "/api/v1/users/me", "reads"),
+        ("POST", "/api/v1/auth/login", "auth"),
+        ("POST", "/api/v1/auth/signup", "auth"),
+        ("POST", "/api/v1/auth/logout", "writes"),
+        ("POST", "/api/v1/leaderboard", "writes"),
+        ("OPTIONS", "/api/v1/leaderboard", None),
+        ("GET", "/health", None),
+    ])
+    def test_groups(self, method, path, group):
+        assert route_group(method, path, "/api/v1") == group
+
+
+class TestAdmissionControl:
+    """Test the middleware under load"""
+
+    @pytest.mark.asyncio
+    async def test_overload_is_refused_with_retry_after(self):
+        """Requests beyond limit and queue get a 503; unlimited routes still pass"""
+        release = asyncio.Event()
+
+        async def slow_app(scope, receive, send):
+            await release.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"ok"})
+
+        limiter = ConcurrencyLimiter("reads", max_limit=1, target_latency=1.0, queue_timeout=0.05)
+        app = AdmissionControl(slow_app, {"reads": limiter}, prefix="/api/v1")
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            first = asyncio.create_task(client.get("/api/v1/leaderboard"))
+            await asyncio.sleep(0.01)
+            refused = await client.get("/api/v1/leaderboard")
+            release.set()
+            assert (await first).status_code == 200
+            assert (await client.get("/health")).status_code == 200
+
+        assert refused.status_code == 503
+        assert refused.headers["retry-after"] == "2"
+        assert refused.json() == {"detail": "Server is busy, please retry"}
+        assert limiter.in_flight == 0
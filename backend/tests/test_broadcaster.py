@@ -0,0 +1,84 @@
+"""Tests for bounded spectate fan-out"""
+import asyncio
+
+import pytest
+
+from app.services.broadcaster import Broadcaster, Frame
+
+
+def make_frame(seq: int) -> Frame:
+    return Frame(seq, f"delta-{seq}".encode(), f"key-{seq}".encode(), 0.0)
+
+
+async def settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class TestBroadcaster:
+    """Test per-subscriber queues, coalescing and resync"""
+
+    @pytest.mark.asyncio
+    async def test_fast_subscriber_gets_every_frame(self):
+        """A subscriber that keeps up gets a keyframe, then every frame"""
+        received = []
+
+        async def send(data: bytes) -> None:
+            received.append(data)
+
+        broadcaster = Broadcaster(max_queue=2)
+        subscriber = broadcaster.subscribe("walls", send)
+        for seq in range(1, 4):
+            broadcaster.publish("walls", make_frame(seq))
+            await settle()
+
+        assert received == [b"key-1", b"delta-2", b"delta-3"]
+        assert subscriber.dropped == 0
+        assert subscriber.lag_frames == 0
+        assert await broadcaster.unsubscribe("walls", subscriber)
+
+    @pytest.mark.asyncio
+    async def test_slow_subscriber_is_bounded_and_resyncs(self):
+        """A stalled client never queues more than max_queue frames"""
+        received = []
+        unblock = asyncio.Event()
+
+        async def send(data: bytes) -> None:
+            await unblock.wait()
+            received.append(data)
+
+        broadcaster = Broadcaster(max_queue=3)
+        slow = broadcaster.subscribe("walls", send)
+        broadcaster.publish("walls", make_frame(1))
+        await settle()  # frame 1 is now stuck in send
+
+        for seq in range(2, 21):
+            broadcaster.publish("walls", make_frame(seq))
+            assert slow.queued <= 3
+
+        assert slow.dropped > 0
+        assert slow.lag_frames == 20
+
+        unblock.set()
+        await settle()
+
+        # After the stuck write it skips to the newest state via a keyframe
+        assert received == [b"key-1", b"key-20"]
+        assert slow.resyncs == 2
+        assert slow.lag_frames == 0
+        await broadcaster.unsubscribe("walls", slow)
+
+    @pytest.mark.asyncio
+    async def test_failed_subscriber_is_removed(self):
+        """A subscriber whose send raises is dropped from the channel"""
+        async def send(data: bytes) -> None:
+            raise ConnectionError
+
+        broadcaster = Broadcaster()
+        subscriber = broadcaster.subscribe("walls", send)
+        broadcaster.publish("walls", make_frame(1))
+        await settle()
+
+        assert subscriber.closed
+        assert broadcaster.publish("walls", make_frame(2)) == 0
+        assert broadcaster.subscriber_count("walls") == 0
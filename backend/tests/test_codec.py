@@ -0,0 +1,99 @@
+"""Tests for the binary game-state codec"""
+from datetime import datetime, timezone
+
+import pytest
+
+from app.schemas import ActivePlayer, DeltaFrame, PlayerDelta, PlayerFrame, PlayersFrame, Position
+from app.utils import codec
+
+
+def cells(*coords: tuple[int, int]) -> list[Position]:
+    return [Position(x=x, y=y) for x, y in coords]
+
+
+def make_player(**fields) -> ActivePlayer:
+    values = {
+        "id": "p1",
+        "username": "SnakeMaster",
+        "score": 120,
+        "mode": "walls",
+        "snake": cells((5, 5), (4, 5), (3, 5)),
+        "food": Position(x=9, y=2),
+        "direction": "RIGHT",
+        "started_at": datetime(2025, 6, 1, 12, 30, 15, 250000, tzinfo=timezone.utc),
+    } | fields
+    return ActivePlayer(**values)
+
+
+class TestCodec:
+    """Test snake encodings, player records and stream frames"""
+
+    @pytest.mark.parametrize(
+        "snake, kind",
+        [
+            ([(x, 3) for x in range(19, 4, -1)], codec.SNAKE_RUNS),
+            ([(1, 1), (1, 2), (2, 2), (2, 3), (3, 3), (3, 4)], codec.SNAKE_CHAIN),
+            ([(2, 0), (1, 0), (0, 0), (19, 0), (18, 0), (17, 0)], codec.SNAKE_RUNS),  # pass-through wrap
+            ([(1, 1), (5, 5), (9, 9)], codec.SNAKE_CELLS),
+            ([(7, 7)], codec.SNAKE_CELLS),
+            ([], codec.SNAKE_CELLS),
+        ],
+    )
+    def test_snake_round_trip(self, snake, kind):
+        """Every snake decodes to itself using the expected encoding"""
+        encoded = bytes(codec.encode_snake(cells(*snake)))
+
+        assert encoded[0] == kind
+        assert codec.decode_snake(encoded) == cells(*snake)
+
+    def test_long_snake_is_compact(self):
+        """A straight snake costs a handful of bytes regardless of length"""
+        snake = cells(*[(x, 10) for x in range(19, -1, -1)])
+
+        assert len(codec.encode_snake(snake)) <= 6
+
+    def test_player_round_trip(self):
+        """Player records keep every field"""
+        for player in (
+            make_player(),
+            make_player(mode="pass-through", is_game_over=True, direction=None, started_at=None),
+        ):
+            assert codec.decode_player(codec.encode_player(player)) == player
+
+        players = [make_player(id=f"p{i}", score=i * 10) for i in range(3)]
+        assert codec.decode_players(codec.encode_players(players)) == players
+
+    def test_naive_started_at_is_utc(self):
+        """Naive timestamps, as read back from SQLite, are taken as UTC"""
+        naive = make_player(started_at=datetime(2025, 6, 1, 12, 0))
+        decoded = codec.decode_player(codec.encode_player(naive))
+
+        assert decoded.started_at == datetime(2025, 6, 1, 12, 0, tzinfo=timezone.utc)
+
+    def test_frame_round_trip(self):
+        """Keyframes and delta frames decode to equal frames"""
+        frames = [
+            PlayersFrame(seq=1, players=[make_player(), make_player(id="p2")]),
+            PlayerFrame(seq=2, player=make_player()),
+            PlayerFrame(seq=3, player=None),
+            DeltaFrame(
+                seq=4,
+                players=[
+                    PlayerDelta(id="p1", heads=cells((6, 5)), pop=1),
+                    PlayerDelta(id="p2", snake=cells((1, 1), (9, 9)), score=30,
+                                food=Position(x=0, y=19), direction="UP"),
+                ],
+                added=[make_player(id="p3")],
+                removed=["p4"],
+            ),
+        ]
+        for frame in frames:
+            assert codec.decode_frame(codec.encode_frame(frame)) == frame
+
+    def test_rejects_cells_outside_grid(self):
+        """Corrupt coordinates are not silently accepted"""
+        encoded = bytearray(codec.encode_snake(cells((1, 1), (5, 5))))
+        encoded[-1] = 20
+
+        with pytest.raises(ValueError):
+            codec.decode_snake(bytes(encoded))
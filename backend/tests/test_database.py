@@ -0,0 +1,235 @@
+"""Tests for the SQLite engine profile"""
+import asyncio
+import time
+import uuid
+
+import pytest
+import pytest_asyncio
+from fastapi import Request
+from sqlalchemy import event, text
+from sqlalchemy.engine.default import CACHE_HIT
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app import crud, database
+from app.database import (
+    LazySession,
+    ReadReplicas,
+    create_sqlite_engines,
+    engine_options,
+    is_sqlite_memory,
+)
+from app.models.db_models import Base
+
+
+@pytest_asyncio.fixture
+async def engines(tmp_path):
+    writer, reader = create_sqlite_engines(f"sqlite+aiosqlite:///{tmp_path / 'profile.db'}", read_pool_size=3)
+    async with writer.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield writer, reader
+    await writer.dispose()
+    await reader.dispose()
+
+
+class TestSqliteProfile:
+    """Test pragmas and the writer / reader split"""
+
+    def test_memory_databases_are_detected(self):
+        """In-memory URLs keep the plain single engine"""
+        assert is_sqlite_memory("sqlite+aiosqlite:///:memory:")
+        assert is_sqlite_memory("sqlite+aiosqlite://")
+        assert not is_sqlite_memory("sqlite+aiosqlite:///./snake_arena.db")
+        assert not is_sqlite_memory("postgresql+asyncpg://localhost/snake")
+
+    @pytest.mark.asyncio
+    async def test_pragmas_applied_on_connect(self, engines):
+        """Every connection gets WAL, NORMAL sync and a busy timeout"""
+        writer, reader = engines
+        for engine in (writer, reader):
+            async with engine.connect() as conn:
+                assert (await conn.exec_driver_sql("PRAGMA journal_mode")).scalar() == "wal"
+                assert (await conn.exec_driver_sql("PRAGMA synchronous")).scalar() == 1
+                assert (await conn.exec_driver_sql("PRAGMA busy_timeout")).scalar() == 5000
+
+        assert writer.pool.size() == 1
+
+    @pytest.mark.asyncio
+    async def test_reader_refuses_writes(self, engines):
+        """Read-only connections cannot modify the database"""
+        _, reader = engines
+        async with reader.connect() as conn:
+            with pytest.raises(OperationalError, match="readonly"):
+                await conn.execute(text("DELETE FROM users"))
+
+    @pytest.mark.asyncio
+    async def test_concurrent_reads_and_writes(self, engines):
+        """Mixed traffic completes without "database is locked" errors"""
+        writer, reader = engines
+        write_session = async_sessionmaker(writer, expire_on_commit=False)
+        read_session = async_sessionmaker(reader, expire_on_commit=False)
+
+        async def write(i: int):
+            async with write_session() as db:
+                await crud.leaderboard.add_score(db, str(uuid.uuid4()), f"user{i}", i, "walls")
+
+        async def read():
+            async with read_session() as db:
+                await crud.leaderboard.get_leaderboard(db, limit=10)
+
+        await asyncio.gather(*(write(i) if i % 3 == 0 else read() for i in range(150)))
+
+        async with read_session() as db:
+            _, total = await crud.leaderboard.get_leaderboard(db)
+        assert total == 50
+
+
+class TestStatementCache:
+    """Test compiled and prepared statement caching"""
+
+    def test_asyncpg_prepared_statement_cache(self):
+        """Only asyncpg engines get prepared statement cache sizes"""
+        options = engine_options("postgresql+asyncpg://localhost/snake")
+        assert options["connect_args"]["prepared_statement_cache_size"] > 0
+        assert options["query_cache_size"] > 0
+        assert "connect_args" not in engine_options("sqlite+aiosqlite:///./snake_arena.db")
+
+    @pytest.mark.asyncio
+    async def test_hot_queries_reuse_compiled_sql(self, engines):
+        """After the first call, new arguments are served from the compiled cache"""
+        writer, _ = engines
+        hits = []
+
+        def listener(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("SELECT"):
+                hits.append(context.cache_hit is CACHE_HIT)
+
+        event.listen(writer.sync_engine, "before_cursor_execute", listener)
+        async with async_sessionmaker(writer, expire_on_commit=False)() as db:
+            await crud.leaderboard.get_leaderboard(db, mode="walls", limit=10)
+            await crud.leaderboard.get_user_scores(db, "user-1")
+            hits.clear()
+            await crud.leaderboard.get_leaderboard(db, mode="pass-through", limit=20, offset=5)
+            await crud.leaderboard.get_user_scores(db, "user-2")
+
+        assert hits == [True, True, True]
+
+
+class TestWriteRoundTrips:
+    """Test that single-row writes take one statement"""
+
+    @pytest.mark.asyncio
+    async def test_inserts_return_their_rows(self, engines):
+        """Inserts read back generated values with RETURNING, not a SELECT"""
+        writer, _ = engines
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement.split()[0])
+        event.listen(writer.sync_engine, "before_cursor_execute", listener)
+        async with async_sessionmaker(writer, expire_on_commit=False)() as db:
+            user = await crud.users.create_user(db, "user-1", "neon", "neon@example.com", "hash")
+            entry = await crud.leaderboard.add_score(db, user.id, user.username, 120, "walls")
+            token = await crud.token_blacklist.blacklist_token(db, b"\0" * 32, user.created_at)
+
+        assert [s for s in statements if s != "BEGIN"] == ["INSERT"] * 3
+        assert user.created_at is not None
+        assert entry.id is not None and entry.score == 120
+        assert token.expires_at == user.created_at
+
+
+class TestReadReplicas:
+    """Test replica load balancing, health checks and read-your-writes pins"""
+
+    @pytest_asyncio.fixture
+    async def replicas(self, tmp_path):
+        engines = [
+            create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}"),
+            create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'replica.db'}"),
+        ]
+        primary = async_sessionmaker(create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}"))
+        yield ReadReplicas(engines, primary=primary)
+        for engine in (*engines, primary.kw["bind"]):
+            await engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_round_robin_over_healthy_replicas(self, replicas):
+        """Failed replicas are skipped until they pass a check again"""
+        assert {id(replicas.session_factory()) for _ in range(4)} == {id(s) for s in replicas.sessions}
+
+        await replicas.check()
+        assert replicas.healthy == [True, False]
+        assert all(replicas.session_factory() is replicas.sessions[0] for _ in range(4))
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_primary(self, replicas):
+        """With no healthy replica, reads go to the primary"""
+        replicas.healthy = [False, False]
+
+        assert replicas.session_factory() is replicas.primary
+
+    def test_pinned_clients_read_from_primary(self, replicas, monkeypatch):
+        """A pinned client reads from the primary until the pin expires"""
+        clock = [100.0]
+        monkeypatch.setattr(time, "monotonic", lambda: clock[0])
+        replicas.pin("Bearer a", seconds=5)
+
+        assert replicas.session_factory("Bearer a") is replicas.primary
+        assert replicas.session_factory("Bearer b") is not replicas.primary
+        clock[0] += 6
+        assert replicas.session_factory("Bearer a") is not replicas.primary
+
+    @pytest.mark.asyncio
+    async def test_only_pinned_clients_get_a_primary_session(self, replicas, monkeypatch):
+        """Cached routes get a session to bypass the cache only for pinned clients"""
+        monkeypatch.setattr(database, "read_replicas", replicas)
+
+        def request(authorization: bytes) -> Request:
+            return Request({"type": "http", "headers": [(b"authorization", authorization)]})
+
+        replicas.pin(database.client_key(request(b"Bearer a")), seconds=5)
+        sessions = [
+            [session async for session in database.get_pinned_read_db(request(authorization))]
+            for authorization in (b"Bearer a", b"Bearer b")
+        ]
+
+        assert isinstance(sessions[0][0], LazySession)
+        assert sessions[1] == [None]
+
+
+class TestLazySession:
+    """Test that sessions and connections are only taken when used"""
+
+    @pytest.mark.asyncio
+    async def test_session_created_on_first_use(self, engines):
+        """Nothing is created until the handler touches the session"""
+        writer, _ = engines
+        created = []
+        factory = async_sessionmaker(writer, expire_on_commit=False)
+        session = LazySession(lambda: created.append(1) or factory())
+
+        await session.close()
+        assert created == []
+
+        session = LazySession(lambda: created.append(1) or factory())
+        _, total = await crud.leaderboard.get_leaderboard(session)
+        assert total == 0
+        assert session.opened and created == [1]
+        await session.close()
+        assert not session.opened
+
+    def test_cached_requests_skip_the_pool(self, client, auth_headers):
+        """A request answered from caches checks out no connection"""
+        # Warm the revocation filter; the user was cached by the login
+        client.get("/api/v1/auth/me", headers=auth_headers)
+        checkouts = []
+        listener = lambda *args: checkouts.append(1)
+        engines = {database.engine.sync_engine, database.read_engine.sync_engine}
+        for engine in engines:
+            event.listen(engine, "checkout", listener)
+        try:
+            response = client.get("/api/v1/auth/me", headers=auth_headers)
+        finally:
+            for engine in engines:
+                event.remove(engine, "checkout", listener)
+
+        assert response.status_code == 200
+        assert checkouts == []
@@ -0,0 +1,184 @@
+"""Tests for the server-side game engine"""
+import asyncio
+import random
+from dataclasses import replace
+
+import pytest
+
+from app.engine import (
+    GameBatch,
+    GameState,
+    TickScheduler,
+    change_direction,
+    check_collision,
+    create_initial_state,
+    generate_food,
+    get_next_head_position,
+    update_game,
+)
+
+
+def make_state(**fields) -> GameState:
+    values = {
+        "snake": [(10, 10), (9, 10)],
+        "food": (15, 15),
+        "direction": "RIGHT",
+        "score": 0,
+        "is_game_over": False,
+        "mode": "walls",
+    } | fields
+    return GameState(**values)
+
+
+def steer(state: GameState, rng: random.Random) -> str:
+    """Head for the food, with the odd random turn"""
+    (head_x, head_y), (food_x, food_y) = state.snake[0], state.food
+    if rng.random() < 0.1:
+        return rng.choice(["UP", "DOWN", "LEFT", "RIGHT"])
+    if food_x != head_x:
+        return "RIGHT" if food_x > head_x else "LEFT"
+    return "DOWN" if food_y > head_y else "UP"
+
+
+class TestRules:
+    """Test the port of the frontend game rules"""
+
+    def test_initial_state(self):
+        """New games start with a three-cell snake heading right"""
+        state = create_initial_state("pass-through")
+
+        assert len(state.snake) == 3
+        assert state.direction == "RIGHT"
+        assert state.score == 0
+        assert not state.is_game_over
+        assert state.mode == "pass-through"
+
+    def test_food_is_not_on_snake(self):
+        """Food is never placed on the snake"""
+        snake = [(x, y) for x in range(20) for y in range(20) if (x, y) != (3, 4)]
+
+        assert generate_food(snake) == (3, 4)
+
+    @pytest.mark.parametrize(
+        "head, direction, mode, expected",
+        [
+            ((10, 10), "UP", "walls", (10, 9)),
+            ((10, 10), "DOWN", "walls", (10, 11)),
+            ((10, 10), "LEFT", "walls", (9, 10)),
+            ((10, 10), "RIGHT", "walls", (11, 10)),
+            ((0, 10), "LEFT", "walls", (-1, 10)),
+            ((0, 10), "LEFT", "pass-through", (19, 10)),
+            ((5, 19), "DOWN", "pass-through", (5, 0)),
+        ],
+    )
+    def test_next_head_position(self, head, direction, mode, expected):
+        """Heads move one cell and wrap only in pass-through mode"""
+        assert get_next_head_position(head, direction, mode) == expected
+
+    def test_collisions(self):
+        """Walls only count in walls mode; the body always counts"""
+        snake = [(19, 10), (18, 10)]
+        body = [(5, 5), (6, 5), (6, 6), (5, 6)]
+
+        assert check_collision((20, 10), snake, "walls")
+        assert not check_collision((0, 10), snake, "pass-through")
+        assert check_collision((5, 6), body, "walls")
+        assert not check_collision((11, 10), [(10, 10), (9, 10)], "walls")
+
+    def test_update_game(self):
+        """Snakes move, grow on food and stop at walls"""
+        moved = update_game(make_state())
+        assert moved.snake == [(11, 10), (10, 10)]
+
+        fed = update_game(make_state(food=(11, 10)))
+        assert len(fed.snake) == 3
+        assert fed.score == 10
+        assert fed.food != (11, 10)
+
+        crashed = update_game(make_state(snake=[(19, 10), (18, 10)]))
+        assert crashed.is_game_over
+        assert update_game(crashed) is crashed
+
+    def test_change_direction(self):
+        """Reversing onto the snake is ignored"""
+        assert change_direction("RIGHT", "UP") == "UP"
+        assert change_direction("UP", "LEFT") == "LEFT"
+        for current, reverse in (("RIGHT", "LEFT"), ("UP", "DOWN"), ("LEFT", "RIGHT"), ("DOWN", "UP")):
+            assert change_direction(current, reverse) == current
+
+
+class TestGameBatch:
+    """Test many games stepped in flat arrays"""
+
+    @pytest.mark.parametrize("mode", ["walls", "pass-through"])
+    @pytest.mark.parametrize("seed", range(10))
+    def test_matches_rules(self, mode, seed):
+        """A batched game goes through the same states as update_game"""
+        turns = random.Random(seed)
+        rules_rng = random.Random(seed)
+        expected = create_initial_state(mode, rules_rng)
+        batch = GameBatch(capacity=4, rng=random.Random(seed))
+        # Burn the draws create_initial_state used for its food
+        generate_food([(10, 10)], batch.rng)
+        slot = batch.add_game(mode, snake=expected.snake, food=expected.food)
+
+        while not expected.is_game_over:
+            direction = steer(expected, turns)
+            expected = replace(expected, direction=change_direction(expected.direction, direction))
+            batch.change_direction(slot, direction)
+            expected = update_game(expected, rules_rng)
+            ended = batch.step()
+            assert batch.state(slot) == expected
+            assert ended == ([slot] if expected.is_game_over else [])
+
+    def test_ring_buffer_wraps(self):
+        """Snakes keep their shape as the head goes round the ring many times"""
+        batch = GameBatch(capacity=1)
+        slot = batch.add_game("pass-through", food=(0, 0))
+        batch.food[slot] = -1  # Never eaten
+
+        for _ in range(1000):
+            batch.step()
+        state = batch.state(slot)
+
+        assert not state.is_game_over
+        assert len(state.snake) == 3
+        assert [x for x, _ in state.snake] == [(10 + 1000 - i) % 20 for i in range(3)]
+
+    def test_slots_are_reused(self):
+        """Finished games leave the tick; removed slots are handed out again"""
+        batch = GameBatch(capacity=2)
+        a = batch.add_game("walls", snake=[(19, 0), (18, 0)])
+        b = batch.add_game("walls")
+
+        assert batch.step() == [a]
+        assert batch.live_count == 1
+        batch.remove_game(a)
+        assert batch.add_game("walls") == a
+        with pytest.raises(IndexError):
+            batch.add_game("walls")
+        batch.remove_game(b)
+        assert batch.live_count == 1
+
+
+class TestTickScheduler:
+    """Test the fixed-rate tick loop"""
+
+    @pytest.mark.asyncio
+    async def test_steps_all_games_each_tick(self):
+        """Every live game advances once per tick and endings are reported"""
+        batch = GameBatch(capacity=10)
+        for _ in range(10):
+            batch.add_game("pass-through")
+        ended: list[int] = []
+        scheduler = TickScheduler(batch, tick_interval=0.01, on_tick=ended.extend)
+
+        scheduler.start()
+        await asyncio.sleep(0.1)
+        await scheduler.stop()
+
+        # Heading right on an open row, nobody can crash this soon
+        assert scheduler.ticks >= 3
+        assert scheduler.game_ticks == 10 * scheduler.ticks
+        assert ended == []
+        assert all(batch.state(slot).snake[0][0] == (10 + scheduler.ticks) % 20 for slot in range(10))
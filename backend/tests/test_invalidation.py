@@ -0,0 +1,184 @@
+"""Tests for the cross-worker invalidation bus"""
+import asyncio
+import json
+import socket
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+
+from app.invalidation import (
+    BUS_RESET,
+    TOKEN_REVOKED,
+    USER_CHANGED,
+    InvalidationBus,
+    UnixDatagramBus,
+    create_invalidation_bus,
+    invalidation_bus,
+)
+from app.config import settings
+from app.schemas import User
+from app.utils.cache import user_cache
+from app.utils.revocation import revocation_filter
+
+
+async def wait_for(condition, timeout: float = 1.0) -> None:
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.005)
+
+
+def from_peer(topic: str, **data) -> bytes:
+    return json.dumps({"topic": topic, "origin": "peer", **data}).encode()
+
+
+class TestInvalidationBus:
+    """Test local delivery"""
+
+    def test_publish_runs_local_handlers(self):
+        """Handlers run before publish returns; a failing one does not stop the rest"""
+        bus = InvalidationBus()
+        seen = []
+        bus.subscribe("scores", lambda message: 1 / 0)
+        bus.subscribe("scores", seen.append)
+
+        bus.publish("scores", mode="walls")
+
+        assert seen == [{"topic": "scores", "mode": "walls"}]
+
+    def test_own_messages_are_ignored(self):
+        """A message echoed back to its sender is not applied twice"""
+        bus = InvalidationBus()
+        seen = []
+        bus.subscribe("scores", seen.append)
+
+        bus._receive(json.dumps({"topic": "scores", "origin": bus.origin}))
+        bus._receive(from_peer("scores"))
+
+        assert seen == [{"topic": "scores"}]
+        assert bus.received == 1
+
+    def test_gap_in_sequence_resets(self):
+        """A message missing from a worker's numbering dispatches BUS_RESET"""
+        bus = InvalidationBus()
+        resets = []
+        bus.subscribe(BUS_RESET, resets.append)
+
+        for seq in (1, 2, 4):
+            bus._receive(json.dumps({"topic": "scores", "origin": "peer", "seq": seq}))
+
+        assert resets == [{"topic": BUS_RESET}]
+
+    def test_local_bus_refused_for_several_workers(self, monkeypatch):
+        """Workers that cannot hear each other would disagree on revocations and live games"""
+        monkeypatch.setattr(settings, "invalidation_bus", "local")
+        monkeypatch.setattr(settings, "web_concurrency", 2)
+
+        with pytest.raises(ValueError, match="WEB_CONCURRENCY"):
+            create_invalidation_bus()
+
+    def test_send_skips_local_handlers(self):
+        """send only tells other workers; a bus nobody shares sends nothing"""
+        bus = InvalidationBus()
+        seen = []
+        bus.subscribe("scores", seen.append)
+
+        bus.send("scores")
+
+        assert seen == []
+        assert bus.sent == 0
+
+
+class TestUnixDatagramBus:
+    """Test delivery between workers over UNIX sockets"""
+
+    @pytest_asyncio.fixture
+    async def workers(self, tmp_path):
+        buses = [UnixDatagramBus(tmp_path) for _ in range(3)]
+        for bus in buses:
+            await bus.start()
+        yield buses
+        for bus in buses:
+            await bus.stop()
+
+    @pytest.mark.asyncio
+    async def test_every_worker_receives(self, workers):
+        """One publish reaches every other worker exactly once"""
+        seen = [[] for _ in workers]
+        for bus, inbox in zip(workers, seen):
+            bus.subscribe(USER_CHANGED, inbox.append)
+
+        workers[0].publish(USER_CHANGED, user_id="user-1")
+        await wait_for(lambda: all(seen))
+        await asyncio.sleep(0.02)
+
+        assert seen == [[{"topic": USER_CHANGED, "user_id": "user-1"}]] * 3
+
+    @pytest.mark.asyncio
+    async def test_lost_datagram_is_noticed(self, workers):
+        """A datagram a full peer dropped shows up as a gap on the next one"""
+        resets = []
+        workers[1].subscribe(BUS_RESET, resets.append)
+        workers[0].sent += 1  # As if the previous datagram never arrived
+
+        workers[0].publish(USER_CHANGED, user_id="user-1")
+        workers[0].publish(USER_CHANGED, user_id="user-2")
+        await wait_for(lambda: workers[1].received >= 2)
+
+        assert resets == []
+        workers[0].sent += 1
+        workers[0].publish(USER_CHANGED, user_id="user-3")
+        await wait_for(lambda: resets)
+
+    @pytest.mark.asyncio
+    async def test_dead_worker_sockets_are_removed(self, workers, tmp_path):
+        """A socket nobody reads any more is deleted on the next publish"""
+        stale = tmp_path / "0-dead.sock"
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(str(stale))
+        sock.close()
+
+        workers[0].publish(USER_CHANGED, user_id="user-1")
+
+        assert not stale.exists()
+        assert workers[1].path.exists()
+
+    @pytest.mark.asyncio
+    async def test_stop_removes_socket(self, tmp_path):
+        bus = UnixDatagramBus(tmp_path)
+        await bus.start()
+        await bus.stop()
+
+        assert list(tmp_path.iterdir()) == []
+
+
+class TestCacheSubscriptions:
+    """Test that messages from other workers reach this worker's caches"""
+
+    def test_revoked_token_enters_filter(self):
+        """A token logged out on another worker is revoked here"""
+        fingerprint = bytes(range(32))
+        expires_at = datetime.now(timezone.utc) + timedelta(hours=1)
+
+        invalidation_bus._receive(
+            from_peer(TOKEN_REVOKED, fingerprint=fingerprint.hex(), expires_at=expires_at.timestamp())
+        )
+
+        assert revocation_filter.check(fingerprint) is True
+
+    def test_reset_makes_revocation_filter_stale(self):
+        """Until it re-syncs, a filter that may have missed logouts asks the database"""
+        invalidation_bus._dispatch({"topic": BUS_RESET})
+
+        assert revocation_filter.stale is True
+        assert revocation_filter.check(bytes(32)) is None
+        revocation_filter.stale = False
+
+    def test_changed_user_leaves_cache(self):
+        """A user changed on another worker is reloaded here"""
+        user = User(id="user-x", username="x", email="x@example.com", created_at=datetime.now(timezone.utc))
+        user_cache.set(user.id, user)
+
+        invalidation_bus._receive(from_peer(USER_CHANGED, user_id=user.id))
+
+        assert user_cache.get(user.id) is None
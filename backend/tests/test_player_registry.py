@@ -0,0 +1,141 @@
+"""Tests for the in-memory active player registry"""
+import time
+
+from app.services.player_registry import ActivePlayerRegistry, PlayerRecord
+
+
+def make_registry() -> ActivePlayerRegistry:
+    registry = ActivePlayerRegistry(session_factory=None, snapshot_interval=1.0)
+    registry.loaded = True
+    return registry
+
+
+def add(registry: ActivePlayerRegistry, player_id: str, mode: str, score: int) -> None:
+    registry.create(
+        player_id=player_id,
+        username=f"user-{player_id}",
+        mode=mode,
+        snake=[{"x": 2, "y": 1}, {"x": 1, "y": 1}],
+        food={"x": 7, "y": 7},
+        score=score,
+    )
+
+
+class TestPlayerRegistry:
+    """Test indexing by mode and score, updates and views"""
+
+    def test_records_are_compact(self):
+        """Records use slots and pack the snake into bytes"""
+        registry = make_registry()
+        add(registry, "p1", "walls", 0)
+        record = registry.get("p1")
+
+        assert not hasattr(record, "__dict__")
+        assert "__slots__" in vars(PlayerRecord)
+        assert record.snake == bytes([2, 1, 1, 1])
+
+    def test_listing_is_by_mode_and_score(self):
+        """Listings come out highest score first, optionally per mode"""
+        registry = make_registry()
+        add(registry, "a", "walls", 10)
+        add(registry, "b", "pass-through", 30)
+        add(registry, "c", "walls", 20)
+
+        assert [p.id for p in registry.active_players()] == ["b", "c", "a"]
+        assert [p.id for p in registry.active_players("walls")] == ["c", "a"]
+        assert [p.id for p in registry.active_players("pass-through")] == ["b"]
+
+    def test_page_resumes_after_key(self):
+        """Pages cover every player once, in order, even as scores change"""
+        registry = make_registry()
+        for i in range(7):
+            add(registry, f"p{i}", "walls", i * 10)
+
+        first, after = registry.page(limit=3)
+        assert [p.id for p in first] == ["p6", "p5", "p4"]
+        registry.update("p0", score=5)
+        second, after = registry.page(limit=3, after=after)
+        assert [p.id for p in second] == ["p3", "p2", "p1"]
+        last, after = registry.page(limit=3, after=after)
+        assert [p.id for p in last] == ["p0"]
+        assert after is None
+
+        newest, _ = registry.page(sort="started_at")
+        assert [p.id for p in newest] == sorted(
+            (p.id for p in first + second + last), key=lambda i: registry.get(i).started_key
+        )
+
+    def test_update_reindexes_and_refreshes_view(self):
+        """Score and mode changes move a player; views reflect the new state"""
+        registry = make_registry()
+        add(registry, "a", "walls", 10)
+        add(registry, "b", "walls", 20)
+        before = registry.get_active("a")
+
+        registry.update("a", score=50, snake=[{"x": 3, "y": 1}, {"x": 2, "y": 1}])
+        assert [p.id for p in registry.active_players("walls")] == ["a", "b"]
+        after = registry.get_active("a")
+        assert after is not before
+        assert after.score == 50
+        assert (after.snake[0].x, after.snake[0].y) == (3, 1)
+
+        registry.update("b", mode="pass-through")
+        assert [p.id for p in registry.active_players("walls")] == ["a"]
+        assert [p.id for p in registry.active_players("pass-through")] == ["b"]
+        assert registry.dirty_count == 2
+
+    def test_game_over_leaves_listings(self):
+        """Finished games are not listed but remain until persisted"""
+        registry = make_registry()
+        add(registry, "a", "walls", 10)
+
+        registry.update("a", is_game_over=True)
+        assert registry.active_players() == []
+        assert registry.get_active("a") is None
+        assert registry.get("a").is_game_over
+
+        registry.discard("a")
+        assert registry.get("a") is None
+        assert registry.dirty_count == 0
+
+    def test_silent_players_expire(self, monkeypatch):
+        """Players stop being listed once their timeout passes without a report"""
+        clock = [1000.0]
+        monkeypatch.setattr(time, "monotonic", lambda: clock[0])
+        registry = make_registry()
+        add(registry, "a", "walls", 10)
+        add(registry, "b", "walls", 20)
+        add(registry, "c", "walls", 30)
+        registry.update("c", is_game_over=True)
+
+        clock[0] += 10
+        assert registry.expire() == []
+        registry.update("b", score=25)
+        clock[0] += registry.player_timeout - 5
+        assert registry.expire() == ["a"]
+        assert [p.id for p in registry.active_players()] == ["b"]
+        # Finished games are left to the snapshot, not the timeout
+        assert registry.get("c") is not None
+        clock[0] += registry.player_timeout
+        assert registry.expire() == ["b"]
+
+    def test_reports_from_other_workers_are_applied_unpersisted(self):
+        """State sent over the bus is mirrored in memory; its sender writes it"""
+        sender = make_registry()
+        add(sender, "a", "walls", 10)
+        sender.update("a", score=30, direction="UP")
+        peer = make_registry()
+
+        peer.apply(sender.get("a").message())
+        assert peer.get("a").snake == sender.get("a").snake
+        assert peer.get("a").started_key == sender.get("a").started_key
+        assert [p.score for p in peer.active_players("walls")] == [30]
+
+        sender.update("a", score=40)
+        peer.apply(sender.get("a").message())
+        assert peer.get_active("a").score == 40
+        assert peer.dirty_count == 0
+
+        sender.update("a", is_game_over=True)
+        peer.apply(sender.get("a").message())
+        assert peer.get("a") is None
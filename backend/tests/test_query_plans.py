@@ -0,0 +1,154 @@
+"""Query-plan regression tests for the hot CRUD queries.
+
+Each test runs real CRUD functions against an empty SQLite schema, records
+the statements they send and checks SQLite's plan for every one: tables
+must be read through an index and results must not need a temporary
+B-tree for ORDER BY. Dropping or reordering an index in ``db_models``
+fails here rather than in production.
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app import crud
+from app.models.db_models import Base
+
+
+@pytest_asyncio.fixture
+async def planned(tmp_path):
+    """A session plus the (statement, parameters) it has executed"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'plans.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+        yield db, statements
+    await engine.dispose()
+
+
+async def plans(db, statements) -> list[tuple[str, list[str]]]:
+    """SQLite's plan for each recorded statement, as its detail lines"""
+    queries = list(statements)
+    statements.clear()
+    result = []
+    conn = await db.connection()
+    for statement, parameters in queries:
+        rows = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        result.append((statement, [row.detail for row in rows]))
+    return result
+
+
+def assert_indexed(plan: list[tuple[str, list[str]]]) -> None:
+    assert plan, "no statements were recorded"
+    for statement, details in plan:
+        for detail in details:
+            assert "TEMP B-TREE" not in detail, f"{statement!r} sorts: {details}"
+            if detail.startswith("SCAN") and "INDEX" not in detail:
+                pytest.fail(f"{statement!r} scans a table: {details}")
+
+
+class TestLeaderboardPlans:
+    """Test that leaderboard queries are served by indexes"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("mode", [None, "walls"])
+    async def test_leaderboard_page(self, planned, mode):
+        """Pages and totals read off the rank indexes without sorting"""
+        db, statements = planned
+        await crud.leaderboard.get_leaderboard(db, mode=mode, limit=10, offset=20)
+
+        plan = await plans(db, statements)
+        assert_indexed(plan)
+        page = plan[-1][1]
+        index = "idx_leaderboard_mode_rank" if mode else "idx_leaderboard_rank"
+        assert any(index in detail for detail in page)
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("mode", [None, "walls"])
+    async def test_user_scores(self, planned, mode):
+        """A user's scores are searched by index, already in rank order"""
+        db, statements = planned
+        await crud.leaderboard.get_user_scores(db, "user-1", mode=mode)
+        await crud.leaderboard.get_top_score_by_user(db, "user-1", mode=mode)
+
+        plan = await plans(db, statements)
+        assert_indexed(plan)
+        for _, details in plan:
+            assert any(detail.startswith("SEARCH") for detail in details)
+
+    @pytest.mark.asyncio
+    async def test_retention_delete(self, planned):
+        """Old scores are found through the timestamp index"""
+        db, statements = planned
+        before = datetime.now(timezone.utc) - timedelta(days=30)
+        await crud.leaderboard.delete_old_scores(db, before, limit=500)
+        await crud.leaderboard.delete_old_scores(db, before)
+
+        assert_indexed(await plans(db, statements))
+
+
+class TestUserPlans:
+    """Test that user lookups are served by indexes"""
+
+    @pytest.mark.asyncio
+    async def test_lookups(self, planned):
+        """Lookups by id, email and username each use a unique index"""
+        db, statements = planned
+        await crud.users.get_user_by_id(db, "user-1")
+        await crud.users.get_user_by_email(db, "neon@example.com")
+        await crud.users.get_user_by_username(db, "neon")
+        await crud.users.get_user_count(db)
+
+        plan = await plans(db, statements)
+        assert_indexed(plan)
+        for _, details in plan[:3]:
+            assert any(detail.startswith("SEARCH") for detail in details)
+
+
+class TestMaintenancePlans:
+    """Test that background sweeps do not scan whole tables"""
+
+    @pytest.mark.asyncio
+    async def test_token_blacklist(self, planned):
+        """Revocation checks and cleanup use the key and expiry indexes"""
+        db, statements = planned
+        await crud.token_blacklist.is_token_blacklisted(db, b"\0" * 32)
+        await crud.token_blacklist.get_unexpired_tokens(db)
+        await crud.token_blacklist.cleanup_expired_tokens(db, limit=500)
+
+        assert_indexed(await plans(db, statements))
+
+    @pytest.mark.asyncio
+    async def test_recent_revocations(self, planned):
+        """Each worker's periodic re-read finds new revocations by index"""
+        db, statements = planned
+        since = datetime.now(timezone.utc) - timedelta(seconds=10)
+        await crud.token_blacklist.get_tokens_revoked_since(db, since)
+
+        plan = await plans(db, statements)
+        assert_indexed(plan)
+        assert any("idx_blacklisted_at" in detail for detail in plan[-1][1])
+
+    @pytest.mark.asyncio
+    async def test_active_players(self, planned):
+        """Cleanup and recovery touch only finished or live rows via partial indexes"""
+        db, statements = planned
+        await crud.active_players.cleanup_inactive_players(db, inactive_minutes=30, limit=500)
+        await crud.active_players.cleanup_inactive_players(db, inactive_minutes=30)
+        await crud.active_players.load_live_players(db)
+
+        plan = await plans(db, statements)
+        assert_indexed(plan)
+        used = " ".join(detail for _, details in plan for detail in details)
+        assert "idx_active_finished" in used
+        assert "idx_live_last_seen" in used
@@ -0,0 +1,241 @@
+"""Tests for single-flight, stale-while-revalidate response caching"""
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app import database
+from app.invalidation import SCORE_ADDED, invalidation_bus
+from app.utils.cache import (
+    SingleFlightCache,
+    clear_response_caches,
+    leaderboard_cache,
+    user_profile_cache,
+    user_scores_cache,
+)
+
+
+class Loader:
+    """Counts loads; each returns the next number once ``release`` is set"""
+
+    def __init__(self):
+        self.calls = 0
+        self.sessions = []
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def __call__(self, db):
+        self.calls += 1
+        self.sessions.append(db)
+        await self.release.wait()
+        return self.calls
+
+
+@pytest.fixture(autouse=True)
+def sessions(monkeypatch):
+    """Loads get numbered markers instead of database sessions"""
+    opened = []
+
+    @asynccontextmanager
+    async def session():
+        opened.append(f"session-{len(opened) + 1}")
+        yield opened[-1]
+
+    monkeypatch.setattr(database.read_replicas, "primary", session)
+    return opened
+
+
+def age(cache: SingleFlightCache, key, seconds: float) -> None:
+    stored_at, value = cache._data[key]
+    cache._data[key] = (stored_at - seconds, value)
+
+
+class TestSingleFlight:
+    """Test that concurrent misses share one load"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_load(self):
+        cache = SingleFlightCache("test", maxsize=10, fresh=1.0)
+        load = Loader()
+        load.release.clear()
+
+        pending = [asyncio.create_task(cache.get("top", load)) for _ in range(50)]
+        await asyncio.sleep(0.01)
+        load.release.set()
+
+        assert await asyncio.gather(*pending) == [1] * 50
+        assert load.calls == 1
+        assert cache.coalesced == 49
+
+    @pytest.mark.asyncio
+    async def test_pinned_client_skips_the_cache(self, sessions):
+        """A client that just wrote loads on its primary session and sees no shared entry"""
+        cache = SingleFlightCache("test", maxsize=10, fresh=60.0)
+        load = Loader()
+        await cache.get("k", load)
+
+        assert await cache.get("k", load, "primary") == 2
+        assert load.sessions == ["session-1", "primary"]
+        assert await cache.get("k", load) == 1
+        assert cache.bypassed == 1
+
+    @pytest.mark.asyncio
+    async def test_load_runs_on_its_own_session(self, sessions):
+        """The first waiter leaving does not take the shared load's session with it"""
+        cache = SingleFlightCache("test", maxsize=10, fresh=1.0)
+        load = Loader()
+
+        await cache.get("k", load)
+
+        assert load.sessions == sessions == ["session-1"]
+
+    @pytest.mark.asyncio
+    async def test_uncached_route_still_coalesces(self):
+        """With no freshness nothing is kept, but concurrent requests still share a load"""
+        cache = SingleFlightCache("test", maxsize=10, fresh=0.0)
+        load = Loader()
+        load.release.clear()
+
+        pending = [asyncio.create_task(cache.get("top", load)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        load.release.set()
+        await asyncio.gather(*pending)
+
+        assert load.calls == 1
+        assert await cache.get("top", load) == 2
+        assert len(cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_failures_reach_every_waiter_and_are_not_cached(self):
+        cache = SingleFlightCache("test", maxsize=10, fresh=1.0)
+        calls = 0
+
+        async def failing(db):
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            raise LookupError("gone")
+
+        results = await asyncio.gather(*(cache.get("k", failing) for _ in range(3)), return_exceptions=True)
+
+        assert all(isinstance(r, LookupError) for r in results)
+        assert calls == 1
+        assert len(cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_leaves_load_running(self):
+        cache = SingleFlightCache("test", maxsize=10, fresh=1.0)
+        load = Loader()
+        load.release.clear()
+
+        first = asyncio.create_task(cache.get("k", load))
+        second = asyncio.create_task(cache.get("k", load))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        load.release.set()
+
+        assert await second == 1
+        assert first.cancelled()
+
+    @pytest.mark.asyncio
+    async def test_load_invalidated_midway_is_not_stored(self):
+        """A load that began before an invalidation may be stale, so it is not cached"""
+        cache = SingleFlightCache("test", maxsize=10, fresh=1.0)
+        load = Loader()
+        load.release.clear()
+
+        pending = asyncio.create_task(cache.get("k", load))
+        await asyncio.sleep(0.01)
+        cache.invalidate("k")
+        load.release.set()
+
+        assert await pending == 1
+        assert len(cache) == 0
+        assert await cache.get("k", load) == 2
+
+
+class TestStaleWhileRevalidate:
+    """Test serving and refreshing entries past their freshness"""
+
+    @pytest.mark.asyncio
+    async def test_fresh_entries_skip_loading(self):
+        cache = SingleFlightCache("test", maxsize=10, fresh=60.0)
+        load = Loader()
+
+        assert [await cache.get("k", load) for _ in range(3)] == [1, 1, 1]
+        assert cache.hits == 2
+
+    @pytest.mark.asyncio
+    async def test_stale_entry_served_while_one_refresh_runs(self):
+        cache = SingleFlightCache("test", maxsize=10, fresh=1.0, stale=10.0)
+        load = Loader()
+        await cache.get("k", load)
+        age(cache, "k", 2.0)
+        load.release.clear()
+
+        served = [await cache.get("k", load) for _ in range(5)]
+
+        await asyncio.sleep(0.01)
+        assert served == [1] * 5
+        assert load.calls == 2
+        assert load.sessions[-1] == "session-2"
+        load.release.set()
+        await asyncio.sleep(0.01)
+        assert await cache.get("k", load) == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_refresh_keeps_stale_value(self):
+        cache = SingleFlightCache("test", maxsize=10, fresh=1.0, stale=10.0)
+        await cache.get("k", Loader())
+        age(cache, "k", 2.0)
+
+        async def failing(db):
+            raise ConnectionError("database down")
+
+        assert await cache.get("k", failing) == 1
+        await asyncio.sleep(0.01)
+        assert await cache.get("k", failing) == 1
+
+    @pytest.mark.asyncio
+    async def test_expired_entry_is_loaded_again(self):
+        cache = SingleFlightCache("test", maxsize=10, fresh=1.0, stale=1.0)
+        load = Loader()
+        await cache.get("k", load)
+        age(cache, "k", 5.0)
+
+        assert await cache.get("k", load) == 2
+
+    @pytest.mark.asyncio
+    async def test_least_recently_used_is_evicted(self):
+        cache = SingleFlightCache("test", maxsize=2, fresh=60.0)
+        for key in ("a", "b", "c"):
+            await cache.get(key, Loader())
+
+        assert list(cache._data) == ["b", "c"]
+
+
+class TestScoreInvalidation:
+    """Test that a new score drops what it changes"""
+
+    @pytest.fixture(autouse=True)
+    def empty_caches(self):
+        clear_response_caches()
+        yield
+        clear_response_caches()
+
+    @pytest.mark.asyncio
+    async def test_score_drops_leaderboards_and_scorer_entries(self):
+        for cache, key in (
+            (leaderboard_cache, (None, 20, 0)),
+            (user_scores_cache, ("scorer", "walls")),
+            (user_scores_cache, ("other", None)),
+            (user_profile_cache, "scorer"),
+            (user_profile_cache, "other"),
+        ):
+            await cache.get(key, Loader())
+
+        invalidation_bus.publish(SCORE_ADDED, user_id="scorer", mode="walls")
+
+        assert len(leaderboard_cache) == 0
+        assert list(user_scores_cache._data) == [("other", None)]
+        assert list(user_profile_cache._data) == ["other"]
@@ -0,0 +1,74 @@
+"""Tests for the in-process token revocation filter"""
+from datetime import datetime, timedelta, timezone
+
+from app.utils.revocation import BloomFilter, RevocationFilter, token_fingerprint
+from app.utils.timing_wheel import TimingWheel
+
+
+class TestRevocationFilter:
+    """Test Bloom filter, timing wheel and revocation filter"""
+    
+    def test_bloom_filter_has_no_false_negatives(self):
+        """Every added fingerprint must be reported as present"""
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        fingerprints = [token_fingerprint(f"token-{i}") for i in range(1000)]
+        for fp in fingerprints:
+            bloom.add(fp)
+        
+        assert all(fp in bloom for fp in fingerprints)
+        
+        false_positives = sum(
+            token_fingerprint(f"other-{i}") in bloom for i in range(10000)
+        )
+        assert false_positives < 300
+    
+    def test_timing_wheel_expires_only_due_keys(self):
+        """Keys expire once their deadline has passed, including past laps"""
+        wheel = TimingWheel(resolution=1.0, slots=8)
+        wheel.advance(100.0)
+        wheel.schedule("soon", 100.5)
+        wheel.schedule("later", 103.0)
+        wheel.schedule("next-lap", 150.0)
+        
+        assert wheel.advance(100.6) == ["soon"]
+        assert wheel.advance(103.0) == ["later"]
+        assert wheel.advance(149.0) == []
+        assert wheel.advance(151.0) == ["next-lap"]
+        assert len(wheel) == 0
+    
+    def test_fingerprint_prefers_jti_claim(self):
+        """Tokens with a jti are keyed by it; legacy tokens by the whole token"""
+        assert token_fingerprint("a.b.c", {"jti": "abc"}) == token_fingerprint("x.y.z", {"jti": "abc"})
+        assert token_fingerprint("a.b.c", {}) != token_fingerprint("x.y.z", {})
+        assert len(token_fingerprint("a.b.c", {"jti": "abc"})) == 32
+    
+    def test_revoked_token_is_confirmed_without_database(self):
+        """A revoked token is answered from the exact set"""
+        revocations = RevocationFilter(capacity=100, error_rate=0.01)
+        expires_at = datetime.now(timezone.utc) + timedelta(hours=1)
+        revocations.add(token_fingerprint("revoked"), expires_at)
+        
+        assert revocations.check(token_fingerprint("revoked")) is True
+        assert revocations.check(token_fingerprint("fresh")) in (False, None)
+    
+    def test_expired_revocations_are_dropped(self):
+        """Entries leave the filter when the token itself expires"""
+        revocations = RevocationFilter(capacity=100, error_rate=0.01, wheel_resolution=1.0)
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=5)
+        revocations.add(token_fingerprint("revoked"), expires_at)
+        
+        removed = revocations.expire(now=expires_at.timestamp() + 1)
+        
+        assert removed == 1
+        assert len(revocations) == 0
+        assert revocations.check(token_fingerprint("revoked")) is False
+    
+    def test_stale_filter_defers_misses_to_database(self):
+        """After lost bus messages, a miss is no longer proof until a sync"""
+        revocation = RevocationFilter(capacity=100, error_rate=0.01)
+        revocation.loaded = True
+        unknown = token_fingerprint("never-seen")
+        
+        revocation.request_sync()
+        
+        assert revocation.check(unknown) is None
@@ -1,6 +1,12 @@
 """Tests for spectate endpoints"""
+import json
+import uuid
+
 import pytest
 
+from app.schemas import ActivePlayer, PlayerFrame
+from app.utils import codec
+
 
 class TestSpectate:
     """Test spectate endpoints"""
@@ -32,6 +38,44 @@ class TestSpectate:
         data = response.json()
         assert all(player["mode"] == "walls" for player in data)
     
+    def test_get_active_players_paginated(self, client):
+        """Test walking the listing one page at a time"""
+        everyone = client.get("/api/v1/spectate/players").json()
+        
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 3} | ({"cursor": cursor} if cursor else {})
+            response = client.get("/api/v1/spectate/players", params=params)
+            assert response.status_code == 200
+            page = response.json()
+            assert len(page) <= 3
+            seen.extend(player["id"] for player in page)
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+        
+        assert seen == [player["id"] for player in everyone]
+        scores = [player["score"] for player in everyone]
+        assert scores == sorted(scores, reverse=True)
+    
+    def test_get_active_players_by_start_time(self, client):
+        """Test listing the newest games first"""
+        response = client.get("/api/v1/spectate/players", params={"sort": "started_at", "limit": 5})
+        
+        assert response.status_code == 200
+        started = [player["started_at"] for player in response.json()]
+        assert started == sorted(started, reverse=True)
+    
+    def test_get_active_players_invalid_cursor(self, client):
+        """Test that malformed cursors and cursors from another sort are rejected"""
+        first = client.get("/api/v1/spectate/players", params={"limit": 1})
+        cursor = first.headers["X-Next-Cursor"]
+        
+        for params in ({"cursor": "not-a-cursor"}, {"cursor": cursor, "sort": "started_at"}):
+            response = client.get("/api/v1/spectate/players", params=params)
+            assert response.status_code == 400
+    
     def test_watch_player(self, client):
         """Test watching a specific player"""
         response = client.get("/api/v1/spectate/players/p1")
@@ -69,3 +113,117 @@ class TestSpectate:
         # Food should be a valid position
         assert 0 <= data["food"]["x"] <= 19
         assert 0 <= data["food"]["y"] <= 19
+    
+    def test_stream_players(self, client):
+        """Test that the stream pushes the active player list"""
+        with client.websocket_connect("/api/v1/spectate/stream?mode=walls") as ws:
+            frame = ws.receive_json(mode="binary")
+        
+        assert frame["type"] == "players"
+        assert all(player["mode"] == "walls" for player in frame["players"])
+    
+    def test_stream_single_player(self, client):
+        """Test that the stream pushes a watched player's state"""
+        with client.websocket_connect("/api/v1/spectate/stream?player_id=p1") as ws:
+            frame = ws.receive_json(mode="binary")
+        
+        assert frame["type"] == "player"
+        assert frame["player"]["id"] == "p1"
+        assert len(frame["player"]["snake"]) >= 3
+    
+    def test_get_active_players_binary(self, client):
+        """Test that the player list can be requested in packed binary form"""
+        json_players = client.get("/api/v1/spectate/players").json()
+        response = client.get(
+            "/api/v1/spectate/players",
+            headers={"Accept": "application/octet-stream"},
+        )
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/octet-stream"
+        players = codec.decode_players(response.content)
+        assert [p.id for p in players] == [p["id"] for p in json_players]
+        assert len(response.content) < len(json.dumps(json_players))
+    
+    def test_watch_player_binary(self, client):
+        """Test that a watched player can be requested in packed binary form"""
+        response = client.get(
+            "/api/v1/spectate/players/p1",
+            headers={"Accept": "application/octet-stream"},
+        )
+        
+        assert response.status_code == 200
+        player = codec.decode_player(response.content)
+        expected = ActivePlayer.model_validate(
+            client.get("/api/v1/spectate/players/p1").json()
+        )
+        assert player.id == "p1"
+        assert player.snake == expected.snake
+        assert player.food == expected.food
+        assert player.score == expected.score
+    
+    def test_stream_binary_frames(self, client):
+        """Test that the stream can send packed binary frames"""
+        with client.websocket_connect("/api/v1/spectate/stream?player_id=p1&encoding=binary") as ws:
+            frame = codec.decode_frame(ws.receive_bytes())
+        
+        assert isinstance(frame, PlayerFrame)
+        assert frame.seq == 1
+        assert frame.player.id == "p1"
+    
+    def test_report_player_state(self, client, auth_headers):
+        """Test that reported state is visible to spectators right away"""
+        player_id = f"test-{uuid.uuid4().hex[:8]}"
+        state = {
+            "mode": "walls",
+            "score": 40,
+            "snake": [{"x": 6, "y": 5}, {"x": 5, "y": 5}, {"x": 4, "y": 5}],
+            "food": {"x": 1, "y": 1},
+            "direction": "RIGHT",
+        }
+        response = client.put(
+            f"/api/v1/spectate/players/{player_id}/state", json=state, headers=auth_headers
+        )
+        assert response.status_code == 204
+        
+        state["score"] = 50
+        state["snake"] = [{"x": 7, "y": 5}, {"x": 6, "y": 5}, {"x": 5, "y": 5}]
+        client.put(f"/api/v1/spectate/players/{player_id}/state", json=state, headers=auth_headers)
+        
+        data = client.get(f"/api/v1/spectate/players/{player_id}").json()
+        assert data["username"] == "NeonMaster"
+        assert data["score"] == 50
+        assert data["snake"][0] == {"x": 7, "y": 5}
+        
+        state["is_game_over"] = True
+        client.put(f"/api/v1/spectate/players/{player_id}/state", json=state, headers=auth_headers)
+        assert client.get(f"/api/v1/spectate/players/{player_id}").status_code == 404
+
+        late = client.put(f"/api/v1/spectate/players/{player_id}/state", json=state, headers=auth_headers)
+        assert late.status_code == 409
+    
+    def test_report_state_for_other_users_player(self, client, auth_headers):
+        """Test that players can only report their own games"""
+        response = client.put(
+            "/api/v1/spectate/players/p2/state",
+            json={
+                "mode": "pass-through",
+                "score": 0,
+                "snake": [{"x": 1, "y": 1}],
+                "food": {"x": 2, "y": 2},
+                "direction": "UP",
+            },
+            headers=auth_headers,
+        )
+        
+        assert response.status_code == 403
+    
+    def test_report_state_requires_auth(self, client):
+        """Test that reporting state needs a token"""
+        response = client.put(
+            "/api/v1/spectate/players/p1/state",
+            json={"mode": "walls", "score": 0, "snake": [{"x": 1, "y": 1}],
+                  "food": {"x": 2, "y": 2}, "direction": "UP"},
+        )
+        
+        assert response.status_code in (401, 403)
@@ -0,0 +1,150 @@
+"""Tests for delta-encoded spectate frames"""
+import asyncio
+import json
+
+import pytest
+
+from app.schemas import ActivePlayer, Position
+from app.services.spectate_delta import diff_players, snake_delta
+from app.services.spectate_hub import SpectateChannel, SpectateHub
+
+
+def cells(*coords: tuple[int, int]) -> list[Position]:
+    return [Position(x=x, y=y) for x, y in coords]
+
+
+def make_player(player_id: str, snake: list[Position], **fields) -> ActivePlayer:
+    values = {
+        "id": player_id,
+        "username": f"user-{player_id}",
+        "score": 0,
+        "mode": "walls",
+        "snake": snake,
+        "food": Position(x=0, y=0),
+        "direction": "RIGHT",
+    } | fields
+    return ActivePlayer(**values)
+
+
+def apply(state: dict[str, dict], frame: dict) -> dict[str, dict]:
+    """Client-side application of a delta frame"""
+    state = {pid: p for pid, p in state.items() if pid not in frame["removed"]}
+    for player in frame["added"]:
+        state[player["id"]] = player
+    for delta in frame["players"]:
+        player = dict(state[delta["id"]])
+        if "snake" in delta:
+            player["snake"] = delta["snake"]
+        else:
+            snake = player["snake"][: len(player["snake"]) - delta.get("pop", 0)]
+            player["snake"] = delta.get("heads", []) + snake
+        for field in ("score", "food", "direction"):
+            if field in delta:
+                player[field] = delta[field]
+        state[delta["id"]] = player
+    return state
+
+
+class TestSpectateDelta:
+    """Test snake diffs, frame diffs and keyframe scheduling"""
+
+    def test_snake_move_is_head_and_tail_pop(self):
+        """A normal tick is one new head and one popped tail cell"""
+        old = cells((5, 5), (4, 5), (3, 5))
+
+        assert snake_delta(old, cells((6, 5), (5, 5), (4, 5))) == (cells((6, 5)), 1)
+        assert snake_delta(old, cells((6, 5), (5, 5), (4, 5), (3, 5))) == (cells((6, 5)), 0)
+        assert snake_delta(old, cells((7, 5), (6, 5), (5, 5))) == (cells((7, 5), (6, 5)), 2)
+        assert snake_delta(old, old) == ([], 0)
+        assert snake_delta(old, cells((10, 10), (10, 11), (10, 12))) is None
+
+    def test_delta_size_is_independent_of_snake_length(self):
+        """Moving a long snake costs the same bytes as moving a short one"""
+        def moved_bytes(length: int) -> int:
+            body = cells(*[(i % 20, (i // 20) % 20) for i in range(length - 1)])
+            snake = cells((5, 5)) + body
+            moved = cells((5, 6)) + snake[:-1]
+            frame = diff_players(
+                {"p1": make_player("p1", snake)},
+                {"p1": make_player("p1", moved)},
+                seq=2,
+            )
+            return len(frame.__pydantic_serializer__.to_json(frame, exclude_none=True))
+
+        assert moved_bytes(3) == moved_bytes(200)
+
+    def test_diff_round_trips(self):
+        """Applying the delta to the previous state yields the current state"""
+        previous = {
+            "p1": make_player("p1", cells((5, 5), (4, 5), (3, 5))),
+            "p2": make_player("p2", cells((1, 1), (1, 2), (1, 3))),
+        }
+        current = {
+            "p1": make_player(
+                "p1", cells((6, 5), (5, 5), (4, 5), (3, 5)),
+                score=10, food=Position(x=9, y=9),
+            ),
+            "p3": make_player("p3", cells((0, 0), (0, 1), (0, 2))),
+        }
+        frame = diff_players(previous, current, seq=7)
+        data = json.loads(frame.__pydantic_serializer__.to_json(frame, exclude_none=True))
+
+        assert data["type"] == "delta"
+        assert data["seq"] == 7
+        assert data["removed"] == ["p2"]
+        assert data["players"] == [
+            {"id": "p1", "heads": [{"x": 6, "y": 5}], "score": 10, "food": {"x": 9, "y": 9}}
+        ]
+
+        client = {pid: p.model_dump(mode="json") for pid, p in previous.items()}
+        expected = {pid: p.model_dump(mode="json") for pid, p in current.items()}
+        applied = apply(client, data)
+        assert applied.keys() == expected.keys()
+        for pid in expected:
+            for field in ("snake", "score", "food", "direction"):
+                assert applied[pid][field] == expected[pid][field]
+
+    def test_keyframes_are_periodic(self):
+        """Every frame carries a keyframe; data is a delta between keyframes"""
+        hub = SpectateHub(session_factory=None, tick_interval=0.1, keyframe_interval=3)
+        channel = SpectateChannel(("walls", None, "json"))
+        types = []
+        for step in range(7):
+            state = {"p1": make_player("p1", cells((step, 0), (step, 1), (step, 2)))}
+            frame = hub._encode(channel, state)
+            channel.state = state
+
+            assert json.loads(frame.keyframe)["type"] == "players"
+            assert json.loads(frame.keyframe)["seq"] == frame.seq == step + 1
+            types.append(json.loads(frame.data)["type"])
+
+        assert types == ["players", "delta", "delta", "players", "delta", "delta", "players"]
+
+    @pytest.mark.asyncio
+    async def test_quiet_stream_sends_keyframe_heartbeats(self, monkeypatch):
+        """Unchanged state is resent as a keyframe once the heartbeat interval passes"""
+        hub = SpectateHub(
+            session_factory=None, tick_interval=0.01, heartbeat_interval=0.05
+        )
+        state = {"p1": make_player("p1", cells((5, 5), (4, 5), (3, 5)))}
+
+        async def read_state(key):
+            return state
+
+        monkeypatch.setattr(hub, "_read_state", read_state)
+        received = []
+
+        async def send(data: bytes) -> None:
+            received.append(json.loads(data))
+
+        channel = SpectateChannel(("walls", None, "json"))
+        subscriber = hub.broadcaster.subscribe(channel.key, send)
+        task = asyncio.create_task(hub._produce(channel))
+        await asyncio.sleep(0.18)
+        task.cancel()
+        await hub.broadcaster.unsubscribe(channel.key, subscriber)
+
+        # One frame for the first tick, then only heartbeats, not one per tick
+        assert 3 <= len(received) <= 5
+        assert all(frame["type"] == "players" for frame in received)
+        assert [frame["seq"] for frame in received] == list(range(1, len(received) + 1))
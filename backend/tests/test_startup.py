@@ -0,0 +1,209 @@
+"""Tests for lazy startup and the schema check"""
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app import database, startup as startup_module
+from app.startup import LazyApp, Startup
+
+
+async def ok_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": scope["path"].encode()})
+
+
+@pytest.fixture
+def lazy_app(monkeypatch):
+    """A LazyApp whose services start when ``release`` is set"""
+    release = asyncio.Event()
+
+    async def start_services(app, startup):
+        with startup.phase("services"):
+            await release.wait()
+
+    async def noop(*args):
+        pass
+
+    monkeypatch.setattr(startup_module, "start_services", start_services)
+    monkeypatch.setattr(startup_module, "stop_services", noop)
+    monkeypatch.setattr(startup_module, "prewarm", noop)
+    monkeypatch.setattr(LazyApp, "_build", lambda self: ok_app)
+    app = LazyApp(Startup(), timeout=0.5)
+    return app, release
+
+
+class TestLazyApp:
+    """Test serving before and after a background startup"""
+
+    @pytest.mark.asyncio
+    async def test_lifespan_starts_in_background(self, lazy_app):
+        """The server is told startup is complete before the services start"""
+        app, _ = lazy_app
+        messages, sent = asyncio.Queue(), []
+
+        async def send(message):
+            sent.append(message["type"])
+
+        lifespan = asyncio.create_task(app({"type": "lifespan"}, messages.get, send))
+        await messages.put({"type": "lifespan.startup"})
+        await asyncio.sleep(0.01)
+        assert sent == ["lifespan.startup.complete"]
+        assert not app.startup.ready.is_set()
+
+        await messages.put({"type": "lifespan.shutdown"})
+        await lifespan
+        assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+
+    @pytest.mark.asyncio
+    async def test_health_answers_before_startup(self, lazy_app):
+        """/health answers "starting" at once; other requests wait for readiness"""
+        app, release = lazy_app
+        app.startup.background(app._start())
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            starting = await client.get("/health")
+            assert starting.status_code == 503
+            assert starting.json() == {"status": "starting"}
+
+            pending = asyncio.create_task(client.get("/api/v1/leaderboard"))
+            await asyncio.sleep(0.05)
+            assert not pending.done()
+            release.set()
+            response = await pending
+
+            health = await client.get("/health")
+
+        assert response.status_code == 200
+        assert response.text == "/api/v1/leaderboard"
+        assert health.json() == {"status": "healthy"}
+        assert app.startup.ready_after is not None
+        assert "services" in app.startup.report()
+        await app.startup.stop()
+
+    @pytest.mark.asyncio
+    async def test_requests_time_out_while_starting(self, lazy_app):
+        """Requests get a 503 with Retry-After if startup takes too long"""
+        app, _ = lazy_app
+        app.startup.background(app._start())
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.get("/api/v1/leaderboard")
+
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
+        await app.startup.stop()
+
+    @pytest.mark.asyncio
+    async def test_failed_startup_is_unhealthy(self, lazy_app, monkeypatch):
+        """After a failed startup, /health and every request answer 503"""
+        app, _ = lazy_app
+
+        def broken(self):
+            raise ImportError("broken")
+
+        monkeypatch.setattr(LazyApp, "_build", broken)
+        app.startup.background(app._start())
+        await asyncio.sleep(0.05)
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            assert (await client.get("/health")).status_code == 503
+            assert (await client.get("/api/v1/leaderboard")).status_code == 503
+        assert isinstance(app.startup.error, ImportError)
+
+
+class TestSchemaCheck:
+    """Test that create_all is skipped for migrated databases"""
+
+    def test_head_matches_alembic(self):
+        """The cheap script scan finds the same head as Alembic"""
+        from alembic.config import Config
+        from alembic.script import ScriptDirectory
+
+        config = Config("alembic.ini")
+        assert database.schema_head() == ScriptDirectory.from_config(config).get_current_head()
+
+    @pytest.mark.asyncio
+    async def test_revision_read_from_database(self, tmp_path):
+        """Unmigrated databases have no revision; stamped ones report theirs"""
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'schema.db'}")
+        async with engine.begin() as conn:
+            assert await database._schema_revision(conn) is None
+            await conn.exec_driver_sql("CREATE TABLE alembic_version (version_num VARCHAR(32))")
+            await conn.exec_driver_sql("INSERT INTO alembic_version VALUES ('0005')")
+            assert await database._schema_revision(conn) == "0005"
+        await engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_empty_database_is_stamped_at_head(self, tmp_path, monkeypatch):
+        """A database created from scratch is not created again on the next start"""
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'schema.db'}")
+        monkeypatch.setattr(database, "engine", engine)
+
+        assert await database.init_db() is True
+        async with engine.connect() as conn:
+            assert await database._schema_revision(conn) == database.schema_head()
+        assert await database.init_db() is False
+        await engine.dispose()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("dialect,locked", [("postgresql", True), ("sqlite", False)])
+    async def test_schema_setup_is_serialized(self, dialect, locked):
+        """On Postgres, workers starting together set the schema up one at a time"""
+        statements = []
+
+        async def execute(statement):
+            statements.append(statement)
+
+        conn = SimpleNamespace(dialect=SimpleNamespace(name=dialect), exec_driver_sql=execute)
+        await database._lock_schema(conn)
+
+        expected = [f"SELECT pg_advisory_xact_lock({database.SCHEMA_LOCK_KEY})"] if locked else []
+        assert statements == expected
+
+    @pytest.mark.asyncio
+    async def test_older_revision_is_upgraded(self, tmp_path, monkeypatch):
+        """A database migrated to an earlier revision is upgraded at startup"""
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'schema.db'}")
+        monkeypatch.setattr(database, "engine", engine)
+        upgrades = []
+        monkeypatch.setattr(database, "_upgrade_to_head", lambda connection: upgrades.append(True))
+        async with engine.begin() as conn:
+            await conn.exec_driver_sql("CREATE TABLE alembic_version (version_num VARCHAR(32))")
+            await conn.exec_driver_sql("INSERT INTO alembic_version VALUES ('0003')")
+
+        assert await database.init_db() is True
+        assert upgrades == [True]
+        await engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_database_from_before_migrations_is_upgraded(self, tmp_path, monkeypatch):
+        """A baseline schema without an Alembic revision is stamped and migrated to head"""
+        from alembic import command
+        from alembic.config import Config
+
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'schema.db'}")
+        monkeypatch.setattr(database, "engine", engine)
+
+        def baseline(connection):
+            config = Config()
+            config.set_main_option("script_location", "alembic")
+            config.attributes["connection"] = connection
+            command.upgrade(config, "0001")
+            connection.exec_driver_sql("DROP TABLE alembic_version")
+            connection.exec_driver_sql(
+                "INSERT INTO token_blacklist (token, blacklisted_at, expires_at) "
+                "VALUES ('legacy.jwt', '2026-10-19 00:00:00', '2999-01-01 00:00:00')"
+            )
+
+        async with engine.begin() as conn:
+            await conn.run_sync(baseline)
+            assert await database._schema_revision(conn) is None
+
+        assert await database.init_db() is True
+        async with engine.connect() as conn:
+            assert await database._schema_revision(conn) == database.schema_head()
+            count = await conn.exec_driver_sql("SELECT count(*) FROM token_blacklist WHERE token_hash IS NOT NULL")
+            assert count.scalar_one() == 1
+            assert (await conn.exec_driver_sql("SELECT last_seen_at FROM active_players")).all() == []
+        assert await database.init_db() is False
+        await engine.dispose()
@@ -1,5 +1,6 @@
 """Integration test configuration and fixtures"""
 import asyncio
+from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
 import pytest
@@ -7,8 +8,11 @@ import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
-from app.database import get_db
+from app import database
+from app.database import get_db, get_read_db
 from app.models.db_models import Base
+from app.services import active_player_registry
+from app.utils import clear_response_caches
 from main import app
 
 # Test database URL (in-memory SQLite)
@@ -31,14 +35,24 @@ TestSessionLocal = async_sessionmaker(
 
 
 @pytest_asyncio.fixture(scope="function")
-async def db_session() -> AsyncGenerator[AsyncSession, None]:
+async def db_session(monkeypatch) -> AsyncGenerator[AsyncSession, None]:
     """Create a fresh database session for each test"""
+    # In-memory game state belongs to the previous test's database
+    active_player_registry.clear()
+    clear_response_caches()
+
     # Create all tables
     async with test_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
     # Create session
     async with TestSessionLocal() as session:
+        @asynccontextmanager
+        async def test_session():
+            yield session
+
+        # Response cache loads open their own sessions; give them the test database
+        monkeypatch.setattr(database.read_replicas, "primary", test_session)
         yield session
 
     # Drop all tables after test
@@ -54,6 +68,7 @@ async def client(db_session: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
         yield db_session
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
 
     async with AsyncClient(
         transport=ASGITransport(app=app),
@@ -1,7 +1,13 @@
 """Integration tests for authentication endpoints"""
 import pytest
+import pytest_asyncio
 from httpx import AsyncClient
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.database import get_read_db
+from app.models.db_models import Base
+from main import app
 
 
 @pytest.mark.asyncio
@@ -124,3 +130,137 @@ async def test_unauthorized_access(client: AsyncClient, db_session: AsyncSession
     headers = {"Authorization": "Bearer invalidtoken"}
     response = await client.get("/api/v1/auth/me", headers=headers)
     assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_login_rejected_when_hash_pool_saturated(
+    client: AsyncClient, db_session: AsyncSession, monkeypatch
+):
+    """Test that logins fail fast with 503 when every hashing worker is busy"""
+    signup_data = {
+        "username": "testuser",
+        "email": "test@example.com",
+        "password": "testpassword123",
+    }
+    response = await client.post("/api/v1/auth/signup", json=signup_data)
+    assert response.status_code == 201
+
+    from app.utils.hashing import password_hash_pool
+
+    monkeypatch.setattr(password_hash_pool, "queue_timeout", 0.05)
+    semaphore = password_hash_pool._get_semaphore()
+    for _ in range(password_hash_pool.max_workers):
+        await semaphore.acquire()
+    try:
+        response = await client.post(
+            "/api/v1/auth/login",
+            json={"email": "test@example.com", "password": "testpassword123"},
+        )
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+    finally:
+        for _ in range(password_hash_pool.max_workers):
+            semaphore.release()
+
+    response = await client.post(
+        "/api/v1/auth/login",
+        json={"email": "test@example.com", "password": "testpassword123"},
+    )
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_current_user_served_from_cache(client: AsyncClient, db_session: AsyncSession):
+    """Test that protected routes use the user cache populated at signup"""
+    from app.models.db_models import User
+    from app.utils import user_cache
+
+    signup_data = {
+        "username": "testuser",
+        "email": "test@example.com",
+        "password": "testpassword123",
+    }
+    response = await client.post("/api/v1/auth/signup", json=signup_data)
+    data = response.json()
+    headers = {"Authorization": f"Bearer {data['token']}"}
+
+    # Remove the row behind the cache's back: the cached user still answers
+    await db_session.delete(await db_session.get(User, data["user"]["id"]))
+    await db_session.commit()
+    response = await client.get("/api/v1/auth/me", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["username"] == "testuser"
+
+    # Once invalidated, the database is authoritative again
+    user_cache.invalidate(data["user"]["id"])
+    response = await client.get("/api/v1/auth/me", headers=headers)
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_me_trusts_token_claims(client: AsyncClient, db_session: AsyncSession, monkeypatch):
+    """Test that /auth/me answers from signed claims when configured"""
+    from app.config import settings
+    from app.models.db_models import User
+    from app.utils import user_cache
+
+    signup_data = {
+        "username": "testuser",
+        "email": "test@example.com",
+        "password": "testpassword123",
+    }
+    response = await client.post("/api/v1/auth/signup", json=signup_data)
+    data = response.json()
+    headers = {"Authorization": f"Bearer {data['token']}"}
+    user_cache.invalidate(data["user"]["id"])
+
+    # Without the row or a cache entry, only the token can answer
+    await db_session.delete(await db_session.get(User, data["user"]["id"]))
+    await db_session.commit()
+
+    monkeypatch.setattr(settings, "trust_token_claims", True)
+    response = await client.get("/api/v1/auth/me", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["id"] == data["user"]["id"]
+    assert response.json()["email"] == "test@example.com"
+    assert response.json()["username"] == "testuser"
+
+
+@pytest_asyncio.fixture
+async def lagging_replica(client: AsyncClient):
+    """Serve read sessions from an empty copy of the schema, like a replica
+    that has not caught up with any write yet"""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async def override_get_read_db():
+        async with AsyncSession(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_read_db] = override_get_read_db
+    yield
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_login_right_after_signup_with_lagging_replica(client: AsyncClient, lagging_replica):
+    """Test that a user the replica has not seen yet can still log in"""
+    credentials = {"email": "new@example.com", "password": "testpassword123"}
+    response = await client.post("/api/v1/auth/signup", json={"username": "newuser", **credentials})
+    assert response.status_code == 201
+
+    response = await client.post("/api/v1/auth/login", json=credentials)
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_duplicate_signup_with_lagging_replica(client: AsyncClient, lagging_replica):
+    """Test that a duplicate the replica cannot see is still a 409, not a 500"""
+    signup_data = {"username": "testuser", "email": "test@example.com", "password": "testpassword123"}
+    assert (await client.post("/api/v1/auth/signup", json=signup_data)).status_code == 201
+
+    signup_data["username"] = "anotheruser"
+    response = await client.post("/api/v1/auth/signup", json=signup_data)
+    assert response.status_code == 409
+    assert "already exists" in response.json()["detail"].lower()
@@ -0,0 +1,59 @@
+"""Integration tests for the maintenance scheduler"""
+import hashlib
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app import crud
+from app.models.db_models import TokenBlacklist
+from app.services import MaintenanceJob, MaintenanceScheduler
+
+
+def token_cleanup_job() -> MaintenanceJob:
+    return MaintenanceJob(
+        name="token_blacklist_cleanup",
+        interval=60,
+        run_chunk=lambda db, limit: crud.token_blacklist.cleanup_expired_tokens(db, limit=limit),
+    )
+
+
+@pytest.mark.asyncio
+async def test_job_lease_is_exclusive(db_session: AsyncSession):
+    """Test that only one owner holds a job lease at a time"""
+    assert await crud.job_leases.acquire_lease(db_session, "job", "worker-a", 60)
+    assert not await crud.job_leases.acquire_lease(db_session, "job", "worker-b", 60)
+    # The holder can renew
+    assert await crud.job_leases.acquire_lease(db_session, "job", "worker-a", 60)
+
+    await crud.job_leases.release_lease(db_session, "job", "worker-a")
+    assert await crud.job_leases.acquire_lease(db_session, "job", "worker-b", 60)
+
+
+@pytest.mark.asyncio
+async def test_scheduler_deletes_in_chunks_and_records_stats(db_session: AsyncSession):
+    """Test that a job run removes expired rows in chunks on the leader only"""
+    now = datetime.now(timezone.utc)
+    for i in range(5):
+        await crud.token_blacklist.blacklist_token(
+            db_session, hashlib.sha256(f"old-{i}".encode()).digest(), now - timedelta(hours=1)
+        )
+    await crud.token_blacklist.blacklist_token(
+        db_session, hashlib.sha256(b"live").digest(), now + timedelta(hours=1)
+    )
+
+    session_factory = async_sessionmaker(db_session.bind, expire_on_commit=False)
+    leader = MaintenanceScheduler(session_factory, [token_cleanup_job()], chunk_size=2, owner="a")
+    follower = MaintenanceScheduler(session_factory, [token_cleanup_job()], chunk_size=2, owner="b")
+
+    assert await leader.run_job(leader.jobs[0]) == 5
+    assert await follower.run_job(follower.jobs[0]) is None
+
+    stats = leader.stats["token_blacklist_cleanup"]
+    assert stats.runs == 1
+    assert stats.last_rows == 5
+    assert follower.stats["token_blacklist_cleanup"].skipped == 1
+
+    remaining = await db_session.execute(select(func.count()).select_from(TokenBlacklist))
+    assert remaining.scalar_one() == 1
@@ -0,0 +1,227 @@
+"""Integration tests for the active player registry snapshots"""
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import delete, event, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app import crud
+from app.models.db_models import ActivePlayer
+from app.services import ActivePlayerRegistry, active_player_registry
+
+
+async def create_player(db: AsyncSession, player_id: str, mode: str = "walls"):
+    return await crud.active_players.create_active_player(
+        db,
+        player_id=player_id,
+        username=f"user-{player_id}",
+        mode=mode,
+        snake=[{"x": 5, "y": 5}, {"x": 4, "y": 5}, {"x": 3, "y": 5}],
+        food={"x": 10, "y": 10},
+    )
+
+
+def step_snake(step: int) -> list[dict]:
+    return [{"x": (5 + step) % 20, "y": 5}, {"x": (4 + step) % 20, "y": 5}, {"x": (3 + step) % 20, "y": 5}]
+
+
+@pytest.mark.asyncio
+async def test_updates_coalesce_into_one_batched_write(db_session: AsyncSession):
+    """Test that many updates per player become one UPDATE statement per snapshot"""
+    for i in range(3):
+        await create_player(db_session, f"p{i}")
+
+    for step in range(1, 11):
+        for i in range(3):
+            await crud.active_players.update_player_state(
+                db_session, f"p{i}", score=step * 10, snake=step_snake(step)
+            )
+
+    # Reads see the newest state before anything is written
+    latest = await crud.active_players.get_active_player(db_session, "p0")
+    assert latest.score == 100
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    sync_engine = db_session.bind.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", listener)
+    try:
+        assert await crud.active_players.save_player_states(db_session) == 3
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", listener)
+
+    assert sum(s.lstrip().upper().startswith("UPDATE") for s in statements) == 1
+    assert active_player_registry.dirty_count == 0
+    assert await crud.active_players.save_player_states(db_session) == 0
+
+    db_session.expire_all()
+    rows = (await db_session.execute(select(ActivePlayer))).scalars().all()
+    assert {row.score for row in rows} == {100}
+    assert all(row.snake == step_snake(10) for row in rows)
+
+
+@pytest.mark.asyncio
+async def test_snapshot_skips_rows_deleted_meanwhile(db_session: AsyncSession):
+    """Test that a row removed before the snapshot does not hold up everyone else's state"""
+    for i in range(3):
+        await create_player(db_session, f"p{i}")
+        await crud.active_players.update_player_state(db_session, f"p{i}", score=50)
+    await db_session.execute(delete(ActivePlayer).where(ActivePlayer.id == "p1"))
+    await db_session.commit()
+
+    assert await crud.active_players.save_player_states(db_session) == 3
+    assert active_player_registry.dirty_count == 0
+
+    db_session.expire_all()
+    rows = (await db_session.execute(select(ActivePlayer))).scalars().all()
+    assert {row.id: row.score for row in rows} == {"p0": 50, "p2": 50}
+
+
+@pytest.mark.asyncio
+async def test_listing_needs_no_sql(db_session: AsyncSession):
+    """Test that listings and lookups are served from memory once loaded"""
+    await create_player(db_session, "p1")
+    await crud.active_players.get_active_players(db_session)
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    sync_engine = db_session.bind.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", listener)
+    try:
+        assert len(await crud.active_players.get_active_players(db_session, mode="walls")) == 1
+        assert await crud.active_players.get_active_player(db_session, "p1") is not None
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", listener)
+
+    assert statements == []
+
+
+@pytest.mark.asyncio
+async def test_restart_recovers_live_games(db_session: AsyncSession):
+    """Test that a new registry rebuilds live games from the last snapshot"""
+    await create_player(db_session, "p1")
+    await create_player(db_session, "p2", mode="pass-through")
+    await crud.active_players.update_player_state(db_session, "p1", score=70)
+    await crud.active_players.mark_game_over(db_session, "p2")
+    await crud.active_players.save_player_states(db_session)
+
+    # Finished games are dropped from memory once persisted
+    assert active_player_registry.get("p2") is None
+
+    registry = ActivePlayerRegistry(async_sessionmaker(db_session.bind), snapshot_interval=1.0)
+    assert await registry.load(db_session) == 1
+    recovered = registry.get_active("p1")
+    assert recovered.score == 70
+    assert recovered.snake[0].x == 5
+    assert registry.get_active("p2") is None
+
+
+@pytest.mark.asyncio
+async def test_recovered_games_expire_from_last_seen(db_session: AsyncSession):
+    """Test that games recovered after a restart are not dropped before they can report"""
+    await create_player(db_session, "seeded")
+    await create_player(db_session, "abandoned")
+    await db_session.execute(
+        update(ActivePlayer)
+        .values(last_seen_at=datetime.now(timezone.utc) - timedelta(hours=1))
+        .where(ActivePlayer.id == "abandoned")
+    )
+    await db_session.commit()
+
+    registry = ActivePlayerRegistry(
+        async_sessionmaker(db_session.bind), snapshot_interval=1.0, player_timeout=15.0, recovered_timeout=1800.0
+    )
+    await registry.load(db_session)
+    now = time.monotonic()
+
+    assert registry.expire(now + 1) == ["abandoned"]
+    assert registry.expire(now + 60) == []
+    # Once it reports, a recovered game times out like any other
+    registry.update("seeded", score=5)
+    assert registry.expire(now + 60 + registry.player_timeout) == ["seeded"]
+
+
+@pytest.mark.asyncio
+async def test_expired_players_deleted_in_one_statement(db_session: AsyncSession):
+    """Test that silent players are removed with one DELETE on the next snapshot"""
+    for i in range(3):
+        await create_player(db_session, f"p{i}")
+    await crud.active_players.update_player_state(db_session, "p2", score=10)
+
+    expired = active_player_registry.expire(time.monotonic() + active_player_registry.player_timeout + 1)
+    assert sorted(expired) == ["p0", "p1", "p2"]
+    assert await crud.active_players.get_active_players(db_session) == []
+    # As silent in the table as in memory
+    await db_session.execute(
+        update(ActivePlayer).values(last_seen_at=datetime.now(timezone.utc) - timedelta(minutes=1))
+    )
+    await db_session.commit()
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    sync_engine = db_session.bind.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", listener)
+    try:
+        await crud.active_players.save_player_states(db_session)
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", listener)
+
+    assert [s.lstrip().split()[0].upper() for s in statements] == ["DELETE"]
+    assert (await db_session.execute(select(ActivePlayer))).scalars().all() == []
+
+
+@pytest.mark.asyncio
+async def test_expiry_keeps_rows_another_worker_writes(db_session: AsyncSession):
+    """Test that a worker that stopped hearing about a game leaves a row still being written"""
+    await create_player(db_session, "elsewhere")
+    peer = ActivePlayerRegistry(async_sessionmaker(db_session.bind), snapshot_interval=1.0, player_timeout=15.0)
+    await peer.load(db_session)
+
+    assert peer.expire(time.monotonic() + 1800 + 1) == ["elsewhere"]
+    await peer.snapshot(db_session)
+
+    assert await db_session.get(ActivePlayer, "elsewhere") is not None
+
+
+@pytest.mark.asyncio
+async def test_report_for_unknown_game_adopts_its_row(db_session: AsyncSession):
+    """Test that a report reaching a worker without the game is applied, not dropped"""
+    await create_player(db_session, "roaming")
+    active_player_registry.discard("roaming")  # As if it started on another worker
+
+    player = await crud.active_players.update_player_state(db_session, "roaming", score=40)
+
+    assert player is not None and player.score == 40
+    assert active_player_registry.get("roaming").username == "user-roaming"
+    assert active_player_registry.dirty_count == 1
+
+
+@pytest.mark.asyncio
+async def test_first_report_racing_another_worker_adopts_its_row(db_session: AsyncSession):
+    """Test that a losing first report takes the game the other worker inserted"""
+    await create_player(db_session, "raced")
+    active_player_registry.discard("raced")  # Inserted by another worker
+
+    player = await create_player(db_session, "raced", mode="pass-through")
+
+    assert player.mode == "walls"
+    assert active_player_registry.get("raced") is not None
+    assert len((await db_session.execute(select(ActivePlayer))).scalars().all()) == 1
+
+
+@pytest.mark.asyncio
+async def test_cleanup_uses_last_seen(db_session: AsyncSession):
+    """Test that the backstop sweep keys on the last report, not the start time"""
+    await create_player(db_session, "old")
+    await create_player(db_session, "fresh")
+    long_ago = datetime.now(timezone.utc) - timedelta(hours=2)
+    await db_session.execute(
+        update(ActivePlayer).values(started_at=long_ago, last_seen_at=long_ago).where(ActivePlayer.id == "old")
+    )
+    await db_session.execute(update(ActivePlayer).values(started_at=long_ago).where(ActivePlayer.id == "fresh"))
+    await db_session.commit()
+
+    assert await crud.active_players.cleanup_inactive_players(db_session, inactive_minutes=30) == 1
+    remaining = (await db_session.execute(select(ActivePlayer.id))).scalars().all()
+    assert remaining == ["fresh"]
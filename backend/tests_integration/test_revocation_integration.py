@@ -0,0 +1,30 @@
+"""Integration tests for re-syncing the token revocation filter"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud
+from app.models.db_models import TokenBlacklist
+from app.utils.revocation import RevocationFilter
+
+
+@pytest.mark.asyncio
+async def test_sync_reads_revocations_missed_on_the_bus(db_session: AsyncSession):
+    """Test that a sync adds tokens revoked elsewhere and trusts misses again"""
+    expires_at = datetime.now(timezone.utc) + timedelta(hours=1)
+    await crud.token_blacklist.blacklist_token(db_session, b"o" * 32, expires_at)
+    await db_session.execute(
+        update(TokenBlacklist).values(blacklisted_at=datetime.now(timezone.utc) - timedelta(hours=1))
+    )
+    await db_session.commit()
+    revocation = RevocationFilter(capacity=100, error_rate=0.01)
+    await revocation.load(db_session)
+
+    await crud.token_blacklist.blacklist_token(db_session, b"n" * 32, expires_at)
+    revocation.stale = True  # As after a lost datagram
+
+    assert await revocation.sync(db_session) == 1
+    assert revocation.check(b"n" * 32) is True
+    assert revocation.check(b"u" * 32) is False
@@ -0,0 +1,68 @@
+"""Integration tests for the spectate stream behind a real uvicorn server
+
+The ASGI test client never performs a WebSocket upgrade, so these tests
+bind uvicorn to a local port and connect with a WebSocket client the way
+a browser would. They fail when uvicorn is installed without a WebSocket
+implementation.
+"""
+import asyncio
+import json
+import socket
+from contextlib import asynccontextmanager
+
+import pytest
+import pytest_asyncio
+import uvicorn
+import websockets
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud
+from app.services.spectate_hub import spectate_hub
+from main import app
+
+
+@pytest_asyncio.fixture
+async def server_url(db_session: AsyncSession, monkeypatch):
+    """Serve the app on a free local port, reading from the test database"""
+    @asynccontextmanager
+    async def test_session():
+        yield db_session
+
+    monkeypatch.setattr(spectate_hub, "session_factory", test_session)
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, lifespan="off", log_level="warning")
+    )
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        assert not task.done(), "uvicorn exited before binding"
+        await asyncio.sleep(0.01)
+
+    yield f"ws://127.0.0.1:{port}"
+
+    server.should_exit = True
+    await task
+
+
+@pytest.mark.asyncio
+async def test_stream_upgrades_and_sends_keyframe(server_url: str, db_session: AsyncSession):
+    """A real WebSocket handshake succeeds and the first frame is the full state"""
+    await crud.active_players.create_active_player(
+        db_session,
+        player_id="player1",
+        username="TestPlayer1",
+        mode="walls",
+        snake=[{"x": 5, "y": 5}, {"x": 4, "y": 5}],
+        food={"x": 10, "y": 10},
+        direction="RIGHT",
+    )
+
+    async with websockets.connect(f"{server_url}/api/v1/spectate/stream") as ws:
+        frame = json.loads(await asyncio.wait_for(ws.recv(), timeout=5))
+
+    assert frame["type"] == "players"
+    assert frame["seq"] >= 1
+    assert [p["username"] for p in frame["players"]] == ["TestPlayer1"]
@@ -3,10 +3,56 @@ import { spectateAPI, type ActivePlayer } from "@/services/api";
 import { GRID_SIZE_CONSTANT } from "@/lib/gameEngine";
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 
+type Cell = { x: number; y: number };
+
+interface PlayerDelta {
+  id: string;
+  heads?: Cell[];
+  pop?: number;
+  snake?: Cell[];
+  score?: number;
+  food?: Cell;
+  direction?: ActivePlayer["direction"];
+}
+
+type StreamFrame =
+  | { type: "players"; seq: number; players: ActivePlayer[] }
+  | { type: "delta"; seq: number; players: PlayerDelta[]; added: ActivePlayer[]; removed: string[] };
+
+// Apply a delta frame to the previous frame's players
+const applyDelta = (
+  players: ActivePlayer[],
+  frame: Extract<StreamFrame, { type: "delta" }>
+): ActivePlayer[] => {
+  const byId = new Map(players.map((player) => [player.id, player]));
+  frame.removed.forEach((id) => byId.delete(id));
+  frame.added.forEach((player) => byId.set(player.id, player));
+  frame.players.forEach((delta) => {
+    const player = byId.get(delta.id);
+    if (!player) return;
+    const snake = delta.snake
+      ?? [...(delta.heads ?? []), ...player.snake.slice(0, player.snake.length - (delta.pop ?? 0))];
+    byId.set(delta.id, {
+      ...player,
+      snake,
+      score: delta.score ?? player.score,
+      food: delta.food ?? player.food,
+      direction: delta.direction ?? player.direction,
+    });
+  });
+  return [...byId.values()];
+};
+
 export const SpectateGrid = () => {
   const [players, setPlayers] = useState<ActivePlayer[]>([]);
 
   useEffect(() => {
+    let interval: ReturnType<typeof setInterval> | null = null;
+    let reconnectTimer: ReturnType<typeof setTimeout> | null = null;
+    let socket: WebSocket | null = null;
+    let closed = false;
+    let attempts = 0;
+
     const loadPlayers = async () => {
       try {
         const data = await spectateAPI.getActivePlayers();
@@ -16,10 +62,69 @@ export const SpectateGrid = () => {
       }
     };
 
-    loadPlayers();
-    const interval = setInterval(loadPlayers, 2000); // Update every 2 seconds
+    // Poll while the stream is down
+    const startPolling = () => {
+      if (interval || closed) return;
+      loadPlayers();
+      interval = setInterval(loadPlayers, 2000); // Update every 2 seconds
+    };
+
+    const stopPolling = () => {
+      if (interval) clearInterval(interval);
+      interval = null;
+    };
 
-    return () => clearInterval(interval);
+    // Frames arrive as UTF-8 JSON in binary messages
+    const decoder = new TextDecoder();
+    const connect = () => {
+      let seq: number | null = null;
+      const ws = new WebSocket(spectateAPI.streamUrl());
+      ws.binaryType = 'arraybuffer';
+      ws.onopen = () => {
+        attempts = 0;
+        stopPolling();
+      };
+      ws.onmessage = (event) => {
+        const frame: StreamFrame = JSON.parse(
+          typeof event.data === 'string' ? event.data : decoder.decode(event.data)
+        );
+        if (frame.type === 'players') {
+          setPlayers(frame.players);
+        } else if (frame.type === 'delta') {
+          if (seq === null || frame.seq !== seq + 1) {
+            // Missed a frame: reconnecting starts again from a keyframe
+            ws.onclose = null;
+            ws.onerror = null;
+            ws.close();
+            connect();
+            return;
+          }
+          setPlayers((current) => applyDelta(current, frame));
+        }
+        seq = frame.seq;
+      };
+      // Poll in the meantime and retry the stream with exponential backoff
+      const reconnect = () => {
+        ws.onclose = null;
+        ws.onerror = null;
+        if (closed) return;
+        startPolling();
+        const delay = Math.min(1000 * 2 ** attempts, 30000);
+        attempts += 1;
+        reconnectTimer = setTimeout(connect, delay);
+      };
+      ws.onerror = reconnect;
+      ws.onclose = reconnect;
+      socket = ws;
+    };
+    connect();
+
+    return () => {
+      closed = true;
+      socket?.close();
+      if (reconnectTimer) clearTimeout(reconnectTimer);
+      stopPolling();
+    };
   }, []);
 
   const MiniGameBoard = ({ player }: { player: ActivePlayer }) => {
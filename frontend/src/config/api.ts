@@ -20,6 +20,7 @@ export const API_ENDPOINTS = {
   // Spectate
   SPECTATE_PLAYERS: '/spectate/players',
   SPECTATE_PLAYER: (playerId: string) => `/spectate/players/${playerId}`,
+  SPECTATE_STREAM: '/spectate/stream',
   
   // Users
   USER_PROFILE: (userId: string) => `/users/${userId}`,
@@ -310,6 +310,18 @@ export const spectateAPI = {
     return await apiRequest<ActivePlayer[]>(endpoint);
   },
 
+  streamUrl: (params: { mode?: "walls" | "pass-through"; playerId?: string } = {}): string => {
+    const queryParams = new URLSearchParams();
+    if (params.mode) queryParams.append('mode', params.mode);
+    if (params.playerId) queryParams.append('player_id', params.playerId);
+
+    // API_BASE_URL may be relative (behind nginx) or absolute (local dev)
+    const url = new URL(`${API_BASE_URL}${API_ENDPOINTS.SPECTATE_STREAM}`, window.location.href);
+    url.protocol = url.protocol === 'https:' ? 'wss:' : 'ws:';
+    url.search = queryParams.toString();
+    return url.toString();
+  },
+
   watchPlayer: async (playerId: string): Promise<ActivePlayer | null> => {
     try {
       return await apiRequest<ActivePlayer>(API_ENDPOINTS.SPECTATE_PLAYER(playerId));